@@ -1,22 +1,102 @@
 from constraint import *
 from functools import partial
+import argparse
 import os
 import random
 
+from csp_bitset import MOTORES, ProblemaMantenimiento
+from csp_compilado import CLASES, PRK, SIN_CLASE, SPC, STD, compilar_instancia
+from estadisticas import contar_restriccion, crear_estadisticas, ejecutar_perfilado, fase, guardar_estadisticas
+from csp_paralelo import contar_paralelo, iterar_soluciones_paralelo, optimizar_paralelo
+from optimizacion import OBJETIVOS, optimizar
+from simetrias import grupos_intercambiables, multiplicidad, restriccion_orden_lexicografico
+from soluciones import iterar_soluciones
+
+MAX_SOLUCIONES_SALIDA = 30  # Máximo de soluciones que se escriben en el CSV
+
 # Función principal
 def main():
-    
+    parser = argparse.ArgumentParser(description="Asignación de aviones a talleres y parkings con CSP")
+    parser.add_argument("ruta", nargs="?", default="data.txt", help="Fichero de entrada (por defecto data.txt)")
+    parser.add_argument("--perfil", action="store_true", help="Guardar un perfil de cProfile de la búsqueda")
+    parser.add_argument("--memoria", action="store_true", help="Medir el pico de memoria de la búsqueda con tracemalloc")
+    parser.add_argument("--max-soluciones", "--max-solutions", type=int, help="Detener la búsqueda tras esas soluciones")
+    parser.add_argument("--primera", "--first", action="store_true", help="Detener la búsqueda en la primera solución")
+    parser.add_argument("--contar", "--count", action="store_true", help="Solo contar las soluciones, sin escribirlas")
+    parser.add_argument("--simetrias", action="store_true",
+                        help="Romper simetrías entre aviones idénticos: solo se enumeran las soluciones canónicas")
+    parser.add_argument("--expandido", action="store_true",
+                        help="Con --simetrias, contar todas las soluciones equivalentes a las canónicas")
+    parser.add_argument("--optimizar", choices=list(OBJETIVOS),
+                        help="Buscar solo la solución de coste mínimo (ramificación y poda) según ese objetivo")
+    parser.add_argument("--procesos", "--workers", type=int, default=1,
+                        help="Repartir la búsqueda entre esos procesos (por valores de la primera variable)")
+    parser.add_argument("--motor", "--engine", choices=MOTORES, default="constraint",
+                        help="Motor de resolución: python-constraint o el motor de dominios de bits con propagación")
+    args = parser.parse_args()
+    max_soluciones = 1 if args.primera else args.max_soluciones
+
+    estadisticas = crear_estadisticas("csp")
+
     # Leer archivo de entrada
-    datos = leer_archivo_entrada("data.txt")
+    with fase(estadisticas, "lectura"):
+        datos = leer_archivo_entrada(args.ruta)
 
     # Definir problema
-    problem = define_problem(datos)
+    with fase(estadisticas, "modelo"):
+        instancia = compilar_instancia(datos["num_filas"], datos["num_columnas"], datos["distribucion_matriz"])
+        problem = define_problem(datos, estadisticas, instancia, romper_simetrias=args.simetrias, motor=args.motor)
+    # Cada proceso construye su propio problema; sus contadores de restricciones no se recogen
+    construir = partial(define_problem, datos, None, instancia, args.simetrias, args.motor)
+    paralelo = args.procesos > 1
+    peso = None
+    if args.simetrias and args.expandido:
+        grupos_variables = [[variables_avion(datos, avion) for avion in grupo]
+                            for grupo in grupos_intercambiables(datos["aviones"])]
+        peso = partial(multiplicidad, grupos_variables=grupos_variables)
+
+    ruta_perfil = os.path.splitext(os.path.basename(args.ruta))[0] + ".prof" if args.perfil else None
+    if args.optimizar:
+        # Resolver el problema de optimización: solo se escribe la solución óptima
+        variables_aviones = [variables_avion(datos, avion) for avion in datos["aviones"]]
+        with fase(estadisticas, "busqueda"):
+            if paralelo:
+                (mejor, coste), pico_memoria = ejecutar_perfilado(
+                    optimizar_paralelo, construir, args.procesos, variables_aviones, datos["aviones"],
+                    instancia["clase"], args.optimizar, ruta_perfil=ruta_perfil, memoria=args.memoria)
+            else:
+                (mejor, coste), pico_memoria = ejecutar_perfilado(
+                    optimizar, problem, variables_aviones, datos["aviones"], instancia["clase"], args.optimizar,
+                    estadisticas, ruta_perfil=ruta_perfil, memoria=args.memoria)
+        n_soluciones, primeras = (1, [mejor]) if mejor is not None else (0, [])
+        estadisticas["objetivo"] = args.optimizar
+        estadisticas["coste"] = coste
+        print(f"Coste óptimo ({args.optimizar}): {coste}")
+    else:
+        # Resolver el problema recorriendo las soluciones sin guardarlas (solo las que se van a escribir)
+        with fase(estadisticas, "busqueda"):
+            if paralelo and args.contar and max_soluciones is None:
+                # Solo recuento: cada proceso cuenta su parte y no hace falta pasar las soluciones
+                n_soluciones, pico_memoria = ejecutar_perfilado(
+                    contar_paralelo, construir, args.procesos, peso, ruta_perfil=ruta_perfil, memoria=args.memoria)
+                primeras = []
+            else:
+                if paralelo:
+                    soluciones = iterar_soluciones_paralelo(construir, args.procesos, max_soluciones)
+                else:
+                    soluciones = iterar_soluciones(problem, max_soluciones)
+                (n_soluciones, primeras), pico_memoria = ejecutar_perfilado(
+                    recorrer_soluciones, soluciones, 0 if args.contar else MAX_SOLUCIONES_SALIDA, peso,
+                    ruta_perfil=ruta_perfil, memoria=args.memoria)
+        estadisticas["recuento"] = ("expandido" if peso else "canonico") if args.simetrias else "completo"
+    if pico_memoria is not None:
+        estadisticas["memoria_pico_bytes"] = pico_memoria
+    estadisticas["soluciones"] = n_soluciones
 
-    # Resolver el problema
-    soluciones = problem.getSolutions()
-    
     # Generar el archivo de salida
-    generar_salida_csv("data.txt", soluciones, datos)
+    with fase(estadisticas, "salida"):
+        nombre_salida = generar_salida_csv(args.ruta, n_soluciones, primeras, datos, instancia)
+    guardar_estadisticas(estadisticas, nombre_salida)
 
 
 
@@ -62,9 +142,23 @@ def leer_archivo_entrada(ruta_archivo):
         "aviones": aviones
     }
 
-def generar_salida_csv(nombre_entrada, soluciones, datos):
+def recorrer_soluciones(soluciones, n_guardar, peso=None):
+    """
+    Cuenta las soluciones del iterador guardando solo las n_guardar primeras. Con peso,
+    cada solución cuenta peso(solucion) (las soluciones equivalentes a una canónica).
+    Devuelve (número total de soluciones, primeras soluciones).
     """
-    Genera un archivo CSV con las soluciones encontradas.
+    n_soluciones = 0
+    primeras = []
+    for solucion in soluciones:
+        n_soluciones += 1 if peso is None else peso(solucion)
+        if len(primeras) < n_guardar:
+            primeras.append(solucion)
+    return n_soluciones, primeras
+
+def generar_salida_csv(nombre_entrada, n_soluciones, soluciones, datos, instancia):
+    """
+    Genera un archivo CSV con el número total de soluciones y algunas de las primeras soluciones encontradas.
     """
     # Construir el nombre del archivo de salida
     base_name = os.path.splitext(os.path.basename(nombre_entrada))[0]
@@ -72,224 +166,240 @@ def generar_salida_csv(nombre_entrada, soluciones, datos):
 
     with open(nombre_salida, 'w') as archivo_salida:
         # Escribir el número de soluciones
-        archivo_salida.write(f"N. Sol: {len(soluciones)}\n")
+        archivo_salida.write(f"N. Sol: {n_soluciones}\n")
 
-        # Generamos un número aleatorio para seleccionar un número de soluciones
-        soluciones_a_escribir = random.sample(soluciones, random.randint(1, len(soluciones))) if soluciones else []
-        
-        # Limitar el número de soluciones a 30 si es necesario
-        n_soluciones = min(len(soluciones_a_escribir), 30)
+        # Generamos un número aleatorio de soluciones a escribir, limitado a las guardadas (30 como mucho)
+        n_escribir = min(random.randint(1, n_soluciones), len(soluciones)) if n_soluciones else 0
         # Formatear y escribir las soluciones
-        for i, solucion in enumerate(soluciones[:n_soluciones], 1):  # Limitar a 10 soluciones
+        for i, solucion in enumerate(soluciones[:n_escribir], 1):
             archivo_salida.write(f"Solucion {i}:\n")
             for avion in datos["aviones"]:
                 fila = [f"{avion['ID']}-{avion['TIPO']}-{avion['RESTR']}-{avion['T1']}-{avion['T2']}: "]
                 for franja in range(datos["franjas"]):
                     variable_name = f"{franja+1}-{avion['ID']}"
-                    posicion = solucion[variable_name]
-                    tipo_taller = obtener_tipo_taller(posicion, datos)
-                    fila.append(f"{tipo_taller}{posicion}")
+                    celda = solucion[variable_name]
+                    tipo_taller = obtener_tipo_taller(celda, instancia)
+                    fila.append(f"{tipo_taller}{instancia['posiciones'][celda]}")
                 archivo_salida.write(" ".join(fila) + "\n")
 
+    return nombre_salida
 
-def obtener_tipo_taller(posicion, datos):
+
+def obtener_tipo_taller(celda, instancia):
     """
-    Devuelve el tipo de taller en base a la posición.
+    Devuelve el tipo de taller de una casilla de la instancia compilada.
     """
-    if posicion in datos["distribucion_matriz"]["SPC"]:
-        return "SPC"
-    elif posicion in datos["distribucion_matriz"]["STD"]:
-        return "STD"
-    elif posicion in datos["distribucion_matriz"]["PRK"]:
-        return "PRK"
-    else:
-        print(f"Posición desconocida: {posicion}")
+    clase = instancia["clase"][celda]
+    if clase == SIN_CLASE:
+        print(f"Posición desconocida: {instancia['posiciones'][celda]}")
+        return None
+    return CLASES[clase]
+
+def variables_avion(datos, avion):
+    """
+    Variables de las franjas de un avión, en orden.
+    """
+    return [f"{franja+1}-{avion['ID']}" for franja in range(datos["franjas"])]
 
-def define_problem(datos):
+def define_problem(datos, estadisticas=None, instancia=None, romper_simetrias=False, motor="constraint"):
     """
     Define el problema CSP y agrega las variables y restricciones.
+    Las restricciones se declaran por avión o por parejas de aviones y admiten asignaciones
+    parciales (FunctionConstraint con assigned=False), de modo que el solver poda en cuanto
+    una asignación parcial ya no puede completarse, en lugar de esperar a tener todas las variables.
+    Los valores de las variables son los ids de casilla de la instancia compilada (se compila aquí
+    si no se pasa); decodificar_solucion los traduce a posiciones.
+    Con romper_simetrias, las franjas de aviones idénticos se ordenan lexicográficamente y solo
+    se obtiene una solución por cada permutación de esos aviones (ver simetrias.multiplicidad).
+    Si se pasa estadisticas, se cuentan las comprobaciones de cada función de restricción.
+    Con motor="bitset" se devuelve un csp_bitset.ProblemaMantenimiento con las mismas soluciones.
     """
+    if instancia is None:
+        instancia = compilar_instancia(datos["num_filas"], datos["num_columnas"], datos["distribucion_matriz"])
+    if motor == "bitset":
+        return ProblemaMantenimiento(instancia, datos["aviones"], datos["franjas"],
+                                     lambda avion, franja: f"{franja+1}-{avion['ID']}", instancia["vecinos"],
+                                     t2_contiguo=True, romper_simetrias=romper_simetrias, estadisticas=estadisticas)
+
     # Crear el problema de CSP
     problem = Problem()
 
+    def anadir(restriccion, variables, parcial=True):
+        restriccion = contar_restriccion(estadisticas, restriccion)
+        problem.addConstraint(FunctionConstraint(restriccion, assigned=not parcial), variables)
+
     # Crear las variables: cada avión puede estar en cualquier posición en cualquier franja
     for franja in range(datos["franjas"]):
         for avion in datos["aviones"]:
             variable_name = f"{franja+1}-{avion['ID']}"
-            domain = datos["distribucion_matriz"]["STD"] + datos["distribucion_matriz"]["SPC"] + datos["distribucion_matriz"]["PRK"]
-            problem.addVariable(variable_name, domain)
+            problem.addVariable(variable_name, instancia["dominio"])
 
     # Restricción 0: Asegurar que cada avión pueda completar sus tareas (T1 + T2)
     for avion in datos["aviones"]:
         variables = [f"{franja+1}-{avion['ID']}" for franja in range(datos["franjas"])]
-        restriccion_parcial = partial(restriccion_completar_tareas, datos=datos, id_avion=avion["ID"])
-        problem.addConstraint(restriccion_parcial, variables)
+        anadir(partial(restriccion_completar_tareas, clase=instancia["clase"], avion=avion), variables)
 
-    # Restricción 1: Capacidad máxima de un taller o parking
+    # Restricción 1: Capacidad máxima de un taller o parking (conteo por franja y JMB por parejas)
     for franja in range(datos["franjas"]):
         variables = [f"{franja+1}-{avion['ID']}" for avion in datos["aviones"]]
-        restriccion_parcial = partial(constrain_capacidad_maxima, datos=datos)
-        problem.addConstraint(restriccion_parcial, variables)
+        anadir(constrain_capacidad_maxima, variables)
+        for variables_jumbos in parejas_jumbos(datos, franja):
+            anadir(restriccion_jumbos_distinta_posicion, variables_jumbos, parcial=False)
 
     # Restricción 2: Asignación de tareas correctamente
     for avion in datos["aviones"]:
         variables = [f"{franja+1}-{avion['ID']}" for franja in range(datos["franjas"])]
-        restriccion_parcial = partial(restriccion_asignacion_tareas, datos=datos, avion=avion)
-        problem.addConstraint(restriccion_parcial, variables)
+        anadir(partial(restriccion_asignacion_tareas, clase=instancia["clase"], avion=avion), variables)
 
-    # Restricción 3: Adyacencia de posiciones
+    # Restricción 3: Adyacencia de posiciones (maniobrabilidad por franja y JMB por parejas)
     for franja in range(datos["franjas"]):
         variables = [f"{franja+1}-{avion['ID']}" for avion in datos["aviones"]]
-        restriccion_parcial = partial(restriccion_adyacencia, datos=datos)
-        problem.addConstraint(restriccion_parcial, variables)
+        anadir(partial(restriccion_adyacencia, vecinos=instancia["vecinos"]), variables)
+        for variables_jumbos in parejas_jumbos(datos, franja):
+            anadir(partial(restriccion_jumbos_no_adyacentes, vecinos=instancia["vecinos"]), variables_jumbos,
+                   parcial=False)
+
+    # Rotura de simetrías: cada avión de un grupo idéntico no va lexicográficamente por delante del siguiente
+    if romper_simetrias:
+        for grupo in grupos_intercambiables(datos["aviones"]):
+            for avion, siguiente in zip(grupo, grupo[1:]):
+                anadir(restriccion_orden_lexicografico, variables_avion(datos, avion) + variables_avion(datos, siguiente))
 
     return problem
 
+def parejas_jumbos(datos, franja):
+    """
+    Variables de cada pareja de aviones JMB en una franja.
+    """
+    jumbos = [f"{franja+1}-{avion['ID']}" for avion in datos["aviones"] if avion["TIPO"] == "JMB"]
+    return [[jumbos[i], jumbos[j]] for i in range(len(jumbos)) for j in range(i + 1, len(jumbos))]
+
 # Restricción 0: Cada avión debe completar todas sus tareas
-def restriccion_completar_tareas(*variables, datos, id_avion):
+def restriccion_completar_tareas(*variables, clase, avion):
     """
     Asegura que las tareas requeridas (T1 + T2) de un avión puedan ser completadas en las franjas horarias asignadas,
-    excluyendo las franjas asignadas a posiciones PRK.
+    excluyendo las franjas asignadas a posiciones PRK. Las franjas aún sin asignar cuentan como disponibles.
     """
-    total_tareas = datos["aviones"][id_avion - 1]["T1"] + datos["aviones"][id_avion - 1]["T2"]
-    posiciones_prk = datos["distribucion_matriz"]["PRK"]
-
     # Contar solo las posiciones donde no esté en PRK
-    tareas_realizadas = sum(1 for posicion in variables if posicion not in posiciones_prk)
+    tareas_realizadas = 0
+    for celda in variables:
+        if celda is Unassigned or clase[celda] != PRK:
+            tareas_realizadas += 1
 
     # Validar si se pueden completar todas las tareas
-    return tareas_realizadas >= total_tareas
+    return tareas_realizadas >= avion["T1"] + avion["T2"]
 
 # Restricción 1: Capacidad máxima de un taller o parking
-def constrain_capacidad_maxima(*variables, datos):
+def constrain_capacidad_maxima(*variables):
     """
     No puede haber más de dos aviones en un espacio de la matriz.
-    Si el avión que ya esta en una posición es de tipo JMB, solo puede haber un avión más STD en esa posición.
+    Con una asignación parcial basta con que ya haya tres aviones asignados a la misma posición para fallar.
+    Las casillas usadas una y dos veces se llevan en dos máscaras de bits.
     """
-    conteo_veces_usada_posicion = {}
-    tipos_aviones_en_posicion = {}
-
-    for index, posicion_matriz in enumerate(variables):
-        tipo_avion = datos['aviones'][index]['TIPO']
-        if posicion_matriz not in conteo_veces_usada_posicion:
-            conteo_veces_usada_posicion[posicion_matriz] = 0
-            tipos_aviones_en_posicion[posicion_matriz] = []
-        conteo_veces_usada_posicion[posicion_matriz] += 1
-        tipos_aviones_en_posicion[posicion_matriz].append(tipo_avion)
-
-    # Validar restricciones
-    for posicion_matriz in variables:
-        if conteo_veces_usada_posicion[posicion_matriz] > 2:
-            return False
-        if tipos_aviones_en_posicion[posicion_matriz].count("JMB") > 1:
+    usadas_una_vez = 0
+    usadas_dos_veces = 0
+    for celda in variables:
+        if celda is Unassigned:
+            continue
+        bit = 1 << celda
+        if usadas_dos_veces & bit:
             return False
-
+        if usadas_una_vez & bit:
+            usadas_dos_veces |= bit
+        else:
+            usadas_una_vez |= bit
     return True
 
+def restriccion_jumbos_distinta_posicion(celda_1, celda_2):
+    """
+    Dos aviones JMB no pueden estar en la misma posición (con un JMB solo cabe otro avión STD).
+    """
+    return celda_1 != celda_2
 
 #Restricción asignación de tareas correctamente
-def restriccion_asignacion_tareas(*variables, datos, avion):
+def restriccion_asignacion_tareas(*variables, clase, avion):
     """
     Verifica que las tareas asignadas a cada avión sean correctas.
+    El orden de las tareas solo se comprueba en las franjas asignadas consecutivas desde la primera,
+    y los mínimos de talleres cuentan las franjas sin asignar como posibles talleres.
     """
     tareas_t1 = avion["T1"]
     tareas_t2 = avion["T2"]
+    restr = avion["RESTR"] == "T"
     talleres_spc = 0
     talleres_std = 0
+    sin_asignar = 0
     tareas_t2_comenzadas = False
     tareas_t2_finalizadas = False
-    for posicion_matriz in variables:
-        if posicion_matriz in datos["distribucion_matriz"]["SPC"]:
+    for celda in variables:
+        if celda is Unassigned:
+            sin_asignar += 1
+            continue
+
+        clase_celda = clase[celda]
+        if clase_celda == SPC:
             talleres_spc += 1
             tareas_t2_comenzadas = True
             if talleres_spc >= tareas_t2:
                 tareas_t2_finalizadas = True 
             
-        elif posicion_matriz in datos["distribucion_matriz"]["STD"]:
-            talleres_std += 1
-            if avion["RESTR"] == "T" and tareas_t2_comenzadas and not tareas_t2_finalizadas:
-                return False
-            
-        elif posicion_matriz in datos["distribucion_matriz"]["PRK"]:
-            
-            if avion["RESTR"] == "T" and tareas_t2_comenzadas and not tareas_t2_finalizadas:
+        elif clase_celda == STD or clase_celda == PRK:
+            if clase_celda == STD:
+                talleres_std += 1
+            if restr and tareas_t2_comenzadas and not tareas_t2_finalizadas and not sin_asignar:
                 return False
         
-        total_tareas_asignadas = talleres_spc + talleres_std
+    total_tareas_asignadas = talleres_spc + talleres_std
 
     
     #Si existen tareas de tipo 2, deben de realizarse en talleres especializados (SPC)
-    if tareas_t2 > 0 and talleres_spc < tareas_t2:
+    if tareas_t2 > 0 and talleres_spc + sin_asignar < tareas_t2:
         return False
     
     #Las tareas t1, deben de realizarse todas da igual el tipo de taller
-    if tareas_t1 > 0 and (total_tareas_asignadas-tareas_t2) < tareas_t1:
+    if tareas_t1 > 0 and (total_tareas_asignadas + sin_asignar - tareas_t2) < tareas_t1:
         return False
     
     # Validar que si el avión tiene RESTR = 'T', T2 ocurre antes que T1, suponiendo que NO puede ir a STD antes de terminar T2
-    if avion["RESTR"] == "T":
+    if restr:
         tareas_t2_restantes = tareas_t2
-        for index, posicion_matriz in enumerate(variables):
-            if posicion_matriz in datos["distribucion_matriz"]["SPC"] and tareas_t2_restantes > 0:
+        for celda in variables:
+            if celda is Unassigned:
+                break
+            if clase[celda] == SPC and tareas_t2_restantes > 0:
                 tareas_t2_restantes -= 1
-            elif tareas_t2_restantes > 0 and posicion_matriz in datos["distribucion_matriz"]["STD"]:
+            elif tareas_t2_restantes > 0 and clase[celda] == STD:
                 # Si encuentra un STD antes de terminar T2, es inválido
                 return False
 
     return True
 
-def restriccion_adyacencia(*variables, datos):
+# Restricción 3: Adyacencia de posiciones
+def restriccion_adyacencia(*variables, vecinos):
     """
-    Verifica que las posiciones de los aviones cumplan con las siguientes restricciones:
-    1. Al menos una posición adyacente debe estar libre (maniobrabilidad).
-    2. Dos aviones tipo JMB no pueden estar adyacentes.
+    Verifica que al menos una posición adyacente a cada avión esté libre (maniobrabilidad).
+    Ocupar más posiciones nunca libera ninguna, así que basta con los aviones ya asignados para fallar.
     """
-    # Obtener el tamaño de la matriz para limitar los bordes
-    num_filas = datos["num_filas"]
-    num_columnas = datos["num_columnas"]
-
-    # Crear una matriz de ocupación para la franja horaria actual
-    matriz_ocupacion = [[None for col in range(num_columnas)] for fil in range(num_filas)]
-
-    # Asignar aviones a las posiciones en la matriz según las variables
-    for index, posicion in enumerate(variables):
-        fila, columna = posicion
-        matriz_ocupacion[fila][columna] = datos["aviones"][index]  # Asignar el avión a la posición
-
-    # Verificar restricciones para cada posición ocupada
-    for fila in range(num_filas):
-        for columna in range(num_columnas):
-            avion_actual = matriz_ocupacion[fila][columna]
-            if avion_actual is not None:
-                # Generar las posiciones adyacentes (arriba, abajo, izquierda, derecha)
-                adyacentes = [
-                    (fila - 1, columna),  # Arriba
-                    (fila + 1, columna),  # Abajo
-                    (fila, columna - 1),  # Izquierda
-                    (fila, columna + 1)   # Derecha
-                ]
-
-                # Filtrar las posiciones adyacentes válidas (dentro de los límites de la matriz)
-                adyacentes_validas = [
-                    (f, c) for f, c in adyacentes
-                    if 0 <= f < num_filas and 0 <= c < num_columnas
-                ]
-
-                # Verificar maniobrabilidad: al menos una posición adyacente debe estar libre
-                if all(matriz_ocupacion[f][c] is not None for f, c in adyacentes_validas):
-                    return False  # No hay maniobrabilidad
-
-                # Verificar que no haya JUMBOS adyacentes
-                if avion_actual["TIPO"] == "JMB":
-                    for f, c in adyacentes_validas:
-                        avion_adyacente = matriz_ocupacion[f][c]
-                        if avion_adyacente is not None and avion_adyacente["TIPO"] == "JMB":
-                            return False  # No puede haber dos JUMBOS adyacentes
-
-    # Si cumple con todas las restricciones, retornar True
+    ocupadas = 0
+    for celda in variables:
+        if celda is not Unassigned:
+            ocupadas |= 1 << celda
+
+    # Verificar maniobrabilidad: al menos una casilla vecina (dentro de la matriz) debe estar libre
+    for celda in variables:
+        if celda is not Unassigned and not vecinos[celda] & ~ocupadas:
+            return False  # No hay maniobrabilidad
+
     return True
 
+def restriccion_jumbos_no_adyacentes(celda_1, celda_2, vecinos):
+    """
+    Dos aviones JMB no pueden estar en posiciones adyacentes.
+    """
+    return not vecinos[celda_1] >> celda_2 & 1
+
    
 
 # Ejecutar función principal
-main()
+if __name__ == "__main__":
+    main()
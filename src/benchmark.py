@@ -0,0 +1,419 @@
+import argparse
+import glob
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from functools import partial
+
+import parte_2
+from cbs import cbs
+from csp_compilado import compilar_instancia
+from estadisticas import crear_estadisticas
+from generador import generar_mantenimiento, generar_mapa_rodaje
+from planificacion_priorizada import PlanificadorPriorizado
+from replanificacion import Planificador
+from soluciones import contar_soluciones, iterar_soluciones
+
+DIRECTORIO_MAPAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "result")
+RUTA_BASELINE = "benchmark_baseline.json"
+UMBRAL_REGRESION = 0.25  # Fracción de empeoramiento de tiempo permitida respecto al baseline
+TIEMPO_MINIMO = 0.01  # Por debajo de este tiempo (s) las diferencias son ruido y no cuentan como regresión
+SEMILLA = 2024  # Semilla fija de las instancias generadas, para que el baseline sea comparable
+
+# =========================================
+# INSTANCIAS
+# =========================================
+def generar_mapa_abierto(filas, columnas, n_aviones):
+    """
+    Mapa de pista abierta ('B') con los aviones en la primera columna que deben cruzar a la
+    última en orden inverso, lo que obliga a que sus rutas se corten.
+    """
+    mapa = [['B'] * columnas for _ in range(filas)]
+    aviones = [((i, 0), (n_aviones - 1 - i, columnas - 1)) for i in range(n_aviones)]
+    return n_aviones, aviones, mapa
+
+def instancias_mapas():
+    """
+    Todos los mapas de result/ más varios mapas generados de mayor tamaño.
+    """
+    instancias = []
+    for ruta in sorted(glob.glob(os.path.join(DIRECTORIO_MAPAS, "mapa*.csv"))):
+        instancias.append((os.path.basename(ruta), parte_2.leer_mapa(ruta)))
+    for filas, columnas, n in ((4, 6, 3), (6, 8, 4), (10, 10, 8), (16, 16, 12)):
+        instancias.append((f"abierto_{filas}x{columnas}_{n}", generar_mapa_abierto(filas, columnas, n)))
+    for lado, n in ((8, 4), (12, 8), (16, 12)):
+        instancias.append((f"sintetico_{lado}x{lado}_{n}", generar_mapa_rodaje(lado, lado, n, semilla=SEMILLA)))
+    return instancias
+
+def instancias_csp():
+    """
+    Instancias de mantenimiento pequeñas en el formato de CSPMaintenance.leer_archivo_entrada.
+    """
+    distribucion = {
+        "STD": [(0, 1), (1, 0), (1, 1), (1, 2)],
+        "SPC": [(2, 1), (2, 0)],
+        "PRK": [(0, 0), (0, 2), (2, 2)],
+    }
+    def avion(id_avion, tipo, restr, t1, t2):
+        return {"ID": id_avion, "TIPO": tipo, "RESTR": restr, "T1": t1, "T2": t2}
+    def datos(franjas, aviones):
+        return {"franjas": franjas, "num_filas": 3, "num_columnas": 3,
+                "distribucion_matriz": distribucion, "aviones": aviones}
+    return [
+        ("csp_1franja_3aviones", datos(1, [avion(1, "JMB", "T", 0, 1), avion(2, "STD", "F", 1, 0), avion(3, "STD", "F", 1, 0)])),
+        ("csp_2franjas_2aviones", datos(2, [avion(1, "JMB", "T", 1, 1), avion(2, "STD", "F", 1, 0)])),
+        ("csp_sintetico_3x3_3aviones", generar_mantenimiento(3, 3, 2, 3, semilla=SEMILLA)),
+    ]
+
+def instancias_escalado(parametro, valores, lado=12, n_aviones=8):
+    """
+    Mapas generados en los que solo varía el número de aviones (lado fijo) o el lado de
+    la rejilla (aviones fijos), para trazar curvas de escalado. Con parametro="flota" son
+    instancias de mantenimiento de 2 franjas con una matriz que crece con la flota.
+    """
+    for valor in valores:
+        if parametro == "flota":
+            lado_matriz = max(3, math.ceil(math.sqrt(2 * valor)))
+            yield valor, generar_mantenimiento(lado_matriz, lado_matriz, 2, valor, semilla=SEMILLA)
+        elif parametro == "aviones":
+            yield valor, generar_mapa_rodaje(lado, lado, valor, semilla=SEMILLA)
+        else:
+            yield valor, generar_mapa_rodaje(valor, valor, n_aviones, semilla=SEMILLA)
+
+def argumentos_main(datos):
+    """
+    Adapta los datos de CSPMaintenance a los argumentos de main.define_problem.
+    """
+    distribucion = datos["distribucion_matriz"]
+    aviones = [dict(avion, ID=str(avion["ID"])) for avion in datos["aviones"]]
+    return (datos["franjas"], (datos["num_filas"], datos["num_columnas"]),
+            distribucion["STD"], distribucion["SPC"], distribucion["PRK"], aviones)
+
+# =========================================
+# BACKENDS
+# =========================================
+def backends_mapas():
+    """
+    Nombre -> (función que resuelve y rellena las estadísticas, máximo de aviones, si cuenta nodos).
+    El A* conjunto crece como 5^n, así que solo se mide en instancias pequeñas. deteccion_independencia
+    y cbs no llevan estadísticas de nodos, así que en sus filas los nodos quedan a None.
+    """
+    def astar(n, aviones, mapa, estadisticas):
+        return parte_2.a_estrella_multi(n, aviones, mapa, estadisticas=estadisticas)
+    def odid(n, aviones, mapa, estadisticas):
+        return parte_2.deteccion_independencia(n, aviones, mapa)
+    def conflictos(n, aviones, mapa, estadisticas):
+        return cbs(n, aviones, mapa)
+    return {"astar": (astar, 4, True), "odid": (odid, None, False), "cbs": (conflictos, None, False)}
+
+def backends_csp():
+    import CSPMaintenance
+    import main as csp_main
+
+    def maintenance(datos, estadisticas, max_soluciones=None, motor="constraint"):
+        problem = CSPMaintenance.define_problem(datos, estadisticas, motor=motor)
+        return contar_soluciones(iterar_soluciones(problem, max_soluciones))
+    def maintenance_main(datos, estadisticas, max_soluciones=None, motor="constraint"):
+        problem = csp_main.define_problem(*argumentos_main(datos), estadisticas, motor=motor)
+        return contar_soluciones(iterar_soluciones(problem, max_soluciones))
+    return {"CSPMaintenance": maintenance, "main": maintenance_main,
+            "CSPMaintenance_bitset": partial(maintenance, motor="bitset"),
+            "main_bitset": partial(maintenance_main, motor="bitset")}
+
+# =========================================
+# MEDICIÓN
+# =========================================
+def medir(funcion, repeticiones):
+    """
+    Ejecuta funcion() una vez de calentamiento y repeticiones veces cronometradas, y una
+    última vez bajo tracemalloc (aparte, para no distorsionar los tiempos).
+    Devuelve (resultado, estadísticas de la última ejecución cronometrada, tiempos, pico de memoria).
+    """
+    funcion(crear_estadisticas("benchmark"))
+    tiempos = []
+    for _ in range(repeticiones):
+        estadisticas = crear_estadisticas("benchmark")
+        inicio = time.perf_counter()
+        resultado = funcion(estadisticas)
+        tiempos.append(time.perf_counter() - inicio)
+    tracemalloc.start()
+    funcion(crear_estadisticas("benchmark"))
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, estadisticas, tiempos, pico
+
+def ejecutar_benchmark(repeticiones, filtro=None):
+    resultados = {}
+
+    for nombre, (n, aviones, mapa) in instancias_mapas():
+        for backend, (resolver, max_aviones, cuenta_nodos) in backends_mapas().items():
+            clave = f"{nombre}/{backend}"
+            if (filtro and filtro not in clave) or (max_aviones is not None and n > max_aviones):
+                continue
+            solucion, estadisticas, tiempos, pico = medir(
+                lambda est: resolver(n, aviones, mapa, est), repeticiones)
+            resultados[clave] = {
+                "tiempo": min(tiempos),
+                "tiempo_mediana": statistics.median(tiempos),
+                "memoria_pico_bytes": pico,
+                "nodos_expandidos": estadisticas["nodos_expandidos"] if cuenta_nodos else None,
+                "nodos_generados": estadisticas["nodos_generados"] if cuenta_nodos else None,
+                "makespan": len(solucion[0]) - 1 if solucion else None,
+            }
+            print(f"{clave:40s} {min(tiempos):9.4f} s  makespan={resultados[clave]['makespan']}")
+
+    for nombre, datos in instancias_csp():
+        for backend, resolver in backends_csp().items():
+            clave = f"{nombre}/{backend}"
+            if filtro and filtro not in clave:
+                continue
+            n_soluciones, estadisticas, tiempos, pico = medir(lambda est: resolver(datos, est), repeticiones)
+            resultados[clave] = {
+                "tiempo": min(tiempos),
+                "tiempo_mediana": statistics.median(tiempos),
+                "memoria_pico_bytes": pico,
+                "comprobaciones_restricciones": sum(estadisticas["comprobaciones_restricciones"].values()),
+                "soluciones": n_soluciones,
+            }
+            print(f"{clave:40s} {min(tiempos):9.4f} s  soluciones={n_soluciones}")
+
+    return resultados
+
+def curva_escalado(parametro, valores, backend, repeticiones, max_soluciones=None):
+    """
+    Mide un backend sobre instancias_escalado e imprime una fila CSV por valor, lista para
+    pegar en una hoja de cálculo: valor;tiempo;nodos_expandidos;makespan en los mapas y
+    valor;tiempo;comprobaciones;soluciones (hasta max_soluciones) en la flota del CSP.
+    """
+    if parametro == "flota":
+        resolver = backends_csp()[backend]
+        print(f"{parametro};tiempo;comprobaciones;soluciones")
+        for valor, datos in instancias_escalado(parametro, valores):
+            n_soluciones, estadisticas, tiempos, _ = medir(
+                lambda est: resolver(datos, est, max_soluciones), repeticiones)
+            comprobaciones = sum(estadisticas["comprobaciones_restricciones"].values())
+            print(f"{valor};{min(tiempos):.4f};{comprobaciones};{n_soluciones}")
+        return
+
+    resolver, max_aviones, cuenta_nodos = backends_mapas()[backend]
+    print(f"{parametro};tiempo;nodos_expandidos;makespan")
+    for valor, (n, aviones, mapa) in instancias_escalado(parametro, valores):
+        if max_aviones is not None and n > max_aviones:
+            continue
+        solucion, estadisticas, tiempos, _ = medir(lambda est: resolver(n, aviones, mapa, est), repeticiones)
+        makespan = len(solucion[0]) - 1 if solucion else None
+        nodos = estadisticas["nodos_expandidos"] if cuenta_nodos else "-"
+        print(f"{valor};{min(tiempos):.4f};{nodos};{makespan}")
+
+def escenario_replanificacion(eventos, lado=12, n_aviones=5):
+    """
+    Aplica a un Planificador una secuencia de eventos aleatorios (con SEMILLA): bloquear una
+    casilla que usa el plan, desbloquear una, añadir un avión o cambiar un objetivo. Tras
+    cada uno imprime una fila CSV con el tiempo y makespan del plan reparado frente a
+    replanificar desde cero con deteccion_independencia.
+    """
+    rng = random.Random(SEMILLA)
+    n, aviones, mapa = generar_mapa_rodaje(lado, lado, n_aviones, semilla=SEMILLA)
+    planificador = Planificador(n, aviones, mapa)
+    planificador.planificar()
+    print("evento;tipo;modo;replanificados;tiempo;tiempo_completa;makespan;makespan_completa")
+    for evento in range(1, eventos + 1):
+        ocupadas = {casilla for par in planificador.aviones for casilla in par}
+        libres = [(x, y) for x in range(lado) for y in range(lado)
+                  if planificador.mapa[x][y] == 'B' and (x, y) not in ocupadas]
+        usadas = sorted({paso[:2] for camino in planificador.caminos or [] for paso in camino} & set(libres))
+        bloqueadas = [(x, y) for x in range(lado) for y in range(lado) if planificador.mapa[x][y] == 'G']
+        tipo = rng.choice(["bloquear", "bloquear", "desbloquear", "anadir", "objetivo"])
+        if tipo == "bloquear" and usadas:
+            planificador.bloquear(rng.choice(usadas))
+        elif tipo == "desbloquear" and bloqueadas:
+            planificador.desbloquear(rng.choice(bloqueadas))
+        elif tipo == "anadir" and len(libres) >= 2:
+            planificador.anadir_avion(*rng.sample(libres, 2))
+        else:
+            tipo = "objetivo"
+            planificador.cambiar_objetivo(rng.randrange(planificador.n_aviones), rng.choice(libres))
+
+        caminos = planificador.planificar()
+        resultado = planificador.historial[-1]
+        inicio = time.perf_counter()
+        completa = parte_2.deteccion_independencia(planificador.n_aviones, planificador.aviones, planificador.mapa)
+        tiempo_completa = time.perf_counter() - inicio
+        makespan_completa = len(completa[0]) - 1 if completa else None
+        if caminos is None:
+            print(f"{evento};{tipo};sin solución;-;{resultado['segundos']:.4f};{tiempo_completa:.4f};-;-")
+            return
+        print(f"{evento};{tipo};{resultado['modo']};{resultado['replanificados']};{resultado['segundos']:.4f};"
+              f"{tiempo_completa:.4f};{resultado['makespan']};{makespan_completa}")
+
+def escenario_llegadas(n_llegadas, lado=16, pistas=3, llegadas_por_instante=2):
+    """
+    Peticiones de rodaje una a una sobre un PlanificadorPriorizado: en cada instante llegan
+    hasta llegadas_por_instante aviones (con SEMILLA) en casillas libres con destino a una de
+    las pistas. Imprime la latencia de planificar cada petición, las rechazadas y el tamaño
+    máximo de la tabla de reservas, que se mantiene acotado porque las reservas expiran.
+    """
+    rng = random.Random(SEMILLA)
+    _, _, mapa = generar_mapa_rodaje(lado, lado, 1, semilla=SEMILLA)
+    planificador = PlanificadorPriorizado(mapa)
+    transitables = [(x, y) for x in range(lado) for y in range(lado) if mapa[x][y] in ('A', 'B')]
+    destinos = rng.sample(transitables, pistas)
+    origenes = [casilla for casilla in transitables if casilla not in destinos]
+
+    latencias = []
+    rechazadas = max_reservas = 0
+    t = 0
+    while len(latencias) + rechazadas < n_llegadas:
+        planificador.avanzar(t)
+        for _ in range(rng.randint(0, llegadas_por_instante)):
+            inicio = time.perf_counter()
+            camino = planificador.solicitar(len(latencias) + rechazadas, rng.choice(origenes), rng.choice(destinos))
+            if camino is None:
+                rechazadas += 1
+            else:
+                latencias.append(time.perf_counter() - inicio)
+            max_reservas = max(max_reservas, len(planificador.reservas))
+        t += 1
+
+    latencias.sort()
+    print(f"Peticiones: {n_llegadas} en {t} instantes, rechazadas {rechazadas}")
+    print(f"Latencia (ms): mediana {statistics.median(latencias) * 1000:.3f}, "
+          f"p99 {latencias[int(0.99 * (len(latencias) - 1))] * 1000:.3f}, máxima {latencias[-1] * 1000:.3f}")
+    print(f"Reservas como máximo: {max_reservas}")
+
+def escenario_validacion(n_soluciones):
+    """
+    Mide cuántas soluciones por segundo comprueba el validador vectorizado: horarios de una
+    instancia de mantenimiento generada (las soluciones del motor bitset, repetidas hasta
+    n_soluciones, la mitad con una franja cambiada al azar) y caminos de rodaje (la solución
+    de deteccion_independencia repetida). Necesita numpy.
+    """
+    import numpy as np
+    import CSPMaintenance
+    from validacion import caminos_a_matriz, horarios_a_matriz, resumen, validar_caminos, validar_horarios
+
+    rng = np.random.default_rng(SEMILLA)
+    datos = generar_mantenimiento(6, 6, 4, 10, semilla=SEMILLA)
+    instancia = compilar_instancia(datos["num_filas"], datos["num_columnas"], datos["distribucion_matriz"])
+    problem = CSPMaintenance.define_problem(datos, instancia=instancia, motor="bitset")
+    soluciones = list(iterar_soluciones(problem, n_soluciones))
+    if not soluciones:
+        print("La instancia de mantenimiento no tiene soluciones")
+        return
+    matriz = horarios_a_matriz(soluciones, datos["aviones"], datos["franjas"],
+                               lambda avion, franja: f"{franja+1}-{avion['ID']}")
+    matriz = np.resize(matriz, (n_soluciones,) + matriz.shape[1:])
+    cambiadas = rng.permutation(n_soluciones)[:n_soluciones // 2]
+    matriz[cambiadas, rng.integers(0, matriz.shape[1], len(cambiadas)),
+           rng.integers(0, matriz.shape[2], len(cambiadas))] = rng.choice(instancia["dominio"], len(cambiadas))
+    inicio = time.perf_counter()
+    violaciones = validar_horarios(matriz, instancia, datos["aviones"], t2_contiguo=True)
+    segundos = time.perf_counter() - inicio
+    print(f"Horarios: {n_soluciones / segundos:.0f} soluciones/s {resumen(violaciones)}")
+
+    n, aviones, mapa = generar_mapa_rodaje(12, 12, 6, semilla=SEMILLA)
+    solucion = parte_2.deteccion_independencia(n, aviones, mapa)
+    matriz, longitudes = caminos_a_matriz([solucion], len(mapa[0]))
+    matriz, longitudes = np.repeat(matriz, n_soluciones, axis=0), np.repeat(longitudes, n_soluciones)
+    inicio = time.perf_counter()
+    violaciones = validar_caminos(matriz, longitudes, aviones, mapa)
+    segundos = time.perf_counter() - inicio
+    print(f"Caminos: {n_soluciones / segundos:.0f} soluciones/s {resumen(violaciones)}")
+
+def comparar_con_baseline(resultados, baseline, umbral):
+    """
+    Devuelve la lista de regresiones: tiempos que empeoran más de umbral respecto al
+    baseline o resultados (makespan, número de soluciones) que cambian.
+    """
+    regresiones = []
+    for clave, actual in resultados.items():
+        referencia = baseline.get(clave)
+        if referencia is None:
+            continue
+        for campo in ("makespan", "soluciones"):
+            if campo in referencia and referencia[campo] != actual.get(campo):
+                regresiones.append(f"{clave}: {campo} {referencia[campo]} -> {actual.get(campo)}")
+        limite = max(referencia["tiempo"], TIEMPO_MINIMO) * (1 + umbral)
+        if actual["tiempo"] > limite:
+            regresiones.append(f"{clave}: tiempo {referencia['tiempo']:.4f} s -> {actual['tiempo']:.4f} s")
+    return regresiones
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de los solvers de rodaje (A*) y de mantenimiento (CSP)")
+    parser.add_argument("--repeticiones", type=int, default=3, help="Ejecuciones cronometradas por instancia")
+    parser.add_argument("--filtro", help="Solo instancias cuyo nombre/backend contenga este texto")
+    parser.add_argument("--baseline", default=RUTA_BASELINE, help="Fichero JSON con el baseline")
+    parser.add_argument("--guardar-baseline", action="store_true", help="Guardar los resultados como nuevo baseline")
+    parser.add_argument("--umbral", type=float, default=UMBRAL_REGRESION,
+                        help="Empeoramiento relativo de tiempo a partir del cual se falla (0.25 = 25%%)")
+    parser.add_argument("--salida", help="Guardar los resultados de esta ejecución en JSON")
+    parser.add_argument("--escalado", choices=["aviones", "rejilla", "flota"],
+                        help="En lugar del benchmark, medir una curva de escalado por número de aviones o lado del "
+                             "mapa (rodaje) o por tamaño de la flota (CSP)")
+    parser.add_argument("--valores", type=int, nargs="+", default=[2, 4, 8, 12, 16],
+                        help="Valores del parámetro de la curva de escalado")
+    parser.add_argument("--backend", choices=list(backends_mapas()) + list(backends_csp()),
+                        help="Solver de la curva de escalado (por defecto odid en rodaje y CSPMaintenance en flota)")
+    parser.add_argument("--max-soluciones", type=int, default=1,
+                        help="Soluciones que se buscan en cada punto de la curva de flota")
+    parser.add_argument("--replanificacion", type=int, metavar="EVENTOS",
+                        help="En lugar del benchmark, medir la replanificación incremental tras EVENTOS cambios "
+                             "del mapa y de la flota frente a replanificar desde cero")
+    parser.add_argument("--llegadas", type=int, metavar="PETICIONES",
+                        help="En lugar del benchmark, medir la latencia de la planificación por prioridades con "
+                             "PETICIONES aviones que piden rodaje de uno en uno")
+    parser.add_argument("--validacion", type=int, metavar="SOLUCIONES",
+                        help="En lugar del benchmark, medir el validador vectorizado con SOLUCIONES horarios y "
+                             "SOLUCIONES caminos de rodaje")
+    args = parser.parse_args()
+
+    if args.validacion:
+        escenario_validacion(args.validacion)
+        return
+
+    if args.llegadas:
+        escenario_llegadas(args.llegadas)
+        return
+
+    if args.replanificacion:
+        escenario_replanificacion(args.replanificacion)
+        return
+
+    if args.escalado:
+        backend = args.backend or ("CSPMaintenance" if args.escalado == "flota" else "odid")
+        curva_escalado(args.escalado, args.valores, backend, args.repeticiones, args.max_soluciones)
+        return
+
+    resultados = ejecutar_benchmark(args.repeticiones, args.filtro)
+
+    if args.salida:
+        with open(args.salida, 'w') as archivo:
+            json.dump(resultados, archivo, indent=2)
+
+    if args.guardar_baseline:
+        with open(args.baseline, 'w') as archivo:
+            json.dump(resultados, archivo, indent=2)
+        print(f"Baseline guardado en {args.baseline}")
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No hay baseline en {args.baseline}; ejecuta con --guardar-baseline para crearlo.")
+        return
+
+    with open(args.baseline, 'r') as archivo:
+        baseline = json.load(archivo)
+    regresiones = comparar_con_baseline(resultados, baseline, args.umbral)
+    if regresiones:
+        print("Regresiones respecto al baseline:")
+        for regresion in regresiones:
+            print(f"  {regresion}")
+        sys.exit(1)
+    print("Sin regresiones respecto al baseline.")
+
+if __name__ == "__main__":
+    main()
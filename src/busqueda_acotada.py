@@ -0,0 +1,230 @@
+import heapq
+import time
+from array import array
+from itertools import count
+
+from heuristicas import crear_heuristica, heuristica_conflictos
+from mapa_compilado import compilar_mapa
+from parte_2 import (TiempoAgotado, a_estrella_multi, bits_por_avion, desempaquetar_estado, empaquetar_estado,
+                     generar_sucesores, reconstruir_caminos)
+
+PESOS_ANYTIME = (5, 3, 2, 1.5, 1.25, 1)  # Pesos sucesivos de la búsqueda anytime, de más rápido a óptimo
+
+# Las cotas de subóptimo solo son válidas con una heurística admisible y consistente para el
+# makespan; por eso la heurística por defecto es la distancia real con agregación max.
+def heuristica_por_defecto(aviones, mapa):
+    return crear_heuristica("distancia", aviones, mapa, "max")
+
+# =========================================
+# BÚSQUEDA FOCAL
+# =========================================
+def busqueda_focal(n_aviones, aviones, mapa, peso, heuristica=None, conflictos=None, estadisticas=None, cota=None,
+                   limite_tiempo=None, compilado=None):
+    """
+    Búsqueda focal sobre el estado conjunto: de la lista abierta (ordenada por f = g + h) se
+    expande, entre los nodos con f <= peso * f_min (la lista focal), el de menor valor de
+    conflictos (por defecto heuristicas.heuristica_conflictos). Con h admisible el makespan es como mucho peso
+    veces el óptimo. cota y limite_tiempo funcionan igual que en a_estrella_multi.
+    Devuelve (caminos, cota inferior del makespan óptimo) o (None, None) si no hay solución.
+    """
+    if compilado is None:
+        compilado = compilar_mapa(mapa)
+    vecinos, columnas = compilado["vecinos"], compilado["columnas"]
+    bits = bits_por_avion(compilado)
+    celdas_iniciales = [x * columnas + y for (x, y), _ in aviones]
+    estado_inicial = empaquetar_estado(celdas_iniciales, bits)
+    estado_objetivo = empaquetar_estado([x * columnas + y for _, (x, y) in aviones], bits)
+    if heuristica is None:
+        heuristica = heuristica_por_defecto(aviones, mapa)
+    if conflictos is None:
+        conflictos = heuristica_conflictos(aviones, mapa)
+
+    h_inicial = heuristica(celdas_iniciales)
+    if h_inicial == float('inf'):
+        return None, None
+
+    def decodificar(estado):
+        return tuple(divmod(celda, columnas) for celda in desempaquetar_estado(estado, n_aviones, bits))
+
+    # Pool de nodos con estados empaquetados, como en a_estrella_multi
+    nodo_estados = [estado_inicial]
+    nodo_g = array('i', [0])
+    nodo_padre = array('i', [-1])
+    nodo_movimientos = [0]
+
+    contador = count()
+    orden = next(contador)
+    open_heap = [(h_inicial, 0, orden, 0)]  # (f, -g, orden, índice del nodo)
+    focal_heap = [(conflictos(celdas_iniciales), h_inicial, 0, orden, 0)]  # (conflictos, f, -g, orden, índice)
+    en_focal = {0}
+    f_min = h_inicial
+    mejor_g = {estado_inicial: 0}
+    visited = set()
+    generados, expandidos, reabiertos, evaluaciones, max_abiertos = 1, 0, 0, 1, 1
+
+    def obsoleto(indice):
+        estado = nodo_estados[indice]
+        return estado in visited or nodo_g[indice] > mejor_g[estado]
+
+    try:
+        while True:
+            if limite_tiempo is not None and time.monotonic() > limite_tiempo:
+                raise TiempoAgotado()
+            while open_heap and obsoleto(open_heap[0][3]):
+                heapq.heappop(open_heap)
+            if not open_heap:
+                return None, None
+
+            # Al subir f_min entran en la lista focal los nodos abiertos que ahora cumplen el límite.
+            # f es entero, así que esto ocurre como mucho una vez por valor del makespan.
+            if open_heap[0][0] > f_min:
+                f_min = open_heap[0][0]
+                for f, menos_g, orden, indice in open_heap:
+                    if f <= peso * f_min and indice not in en_focal and not obsoleto(indice):
+                        celdas = desempaquetar_estado(nodo_estados[indice], n_aviones, bits)
+                        heapq.heappush(focal_heap, (conflictos(celdas), f, menos_g, orden, indice))
+                        en_focal.add(indice)
+
+            # La cima de la lista abierta está en la focal, así que queda al menos un nodo válido
+            _, _, _, _, indice = heapq.heappop(focal_heap)
+            if obsoleto(indice):
+                continue
+            estado = nodo_estados[indice]
+            g = nodo_g[indice]
+            visited.add(estado)
+            expandidos += 1
+
+            if estado == estado_objetivo:
+                caminos = reconstruir_caminos(indice, n_aviones, nodo_estados, nodo_padre, nodo_movimientos, decodificar)
+                return caminos, f_min
+
+            g_nuevo = g + 1
+            for nuevo_estado, codigos, nuevas_celdas in generar_sucesores(desempaquetar_estado(estado, n_aviones, bits),
+                                                                          vecinos, bits):
+                if nuevo_estado in visited:
+                    continue
+                g_anterior = mejor_g.get(nuevo_estado)
+                if g_anterior is not None and g_nuevo >= g_anterior:
+                    continue
+                h = heuristica(nuevas_celdas)
+                evaluaciones += 1
+                if h == float('inf'):
+                    continue
+                if cota is not None and g_nuevo + h >= cota:
+                    continue
+                if g_anterior is not None:
+                    reabiertos += 1
+                mejor_g[nuevo_estado] = g_nuevo
+
+                nuevo_indice = len(nodo_estados)
+                nodo_estados.append(nuevo_estado)
+                nodo_g.append(g_nuevo)
+                nodo_padre.append(indice)
+                nodo_movimientos.append(codigos)
+
+                f = g_nuevo + h
+                orden = next(contador)
+                heapq.heappush(open_heap, (f, -g_nuevo, orden, nuevo_indice))
+                if f <= peso * f_min:
+                    heapq.heappush(focal_heap, (conflictos(nuevas_celdas), f, -g_nuevo, orden, nuevo_indice))
+                    en_focal.add(nuevo_indice)
+                generados += 1
+            max_abiertos = max(max_abiertos, len(open_heap))
+    finally:
+        if estadisticas is not None:
+            estadisticas["nodos_generados"] += generados
+            estadisticas["nodos_expandidos"] += expandidos
+            estadisticas["nodos_reabiertos"] += reabiertos
+            estadisticas["evaluaciones_heuristica"] += evaluaciones
+            estadisticas["max_abiertos"] = max(estadisticas["max_abiertos"], max_abiertos)
+
+# =========================================
+# BÚSQUEDA ANYTIME
+# =========================================
+def a_estrella_anytime(n_aviones, aviones, mapa, limite_segundos=None, pesos=PESOS_ANYTIME, metodo="ponderado",
+                       heuristica=None, estadisticas=None, compilado=None):
+    """
+    Búsqueda anytime: repite la búsqueda (A* ponderado o focal, según metodo) con los pesos
+    de pesos en orden decreciente, exigiendo cada vez una solución estrictamente mejor que la
+    anterior, hasta agotar los pesos, demostrar el óptimo o superar limite_segundos.
+    Genera un diccionario por mejora con caminos, makespan, peso, segundos desde el inicio y
+    cota: factor garantizado respecto al óptimo (makespan <= cota * óptimo). Si una búsqueda con
+    peso 1 termina sin encontrar nada mejor, la última solución es óptima y se vuelve a generar con
+    cota 1; con peso > 1 no se reabren nodos cerrados, así que un fallo no lo demuestra y se sigue
+    con el siguiente peso.
+    """
+    inicio = time.monotonic()
+    limite_tiempo = inicio + limite_segundos if limite_segundos is not None else None
+    if heuristica is None:
+        heuristica = heuristica_por_defecto(aviones, mapa)
+    conflictos = heuristica_conflictos(aviones, mapa) if metodo == "focal" else None
+    columnas = len(mapa[0])
+    cota_inferior = heuristica([x * columnas + y for (x, y), _ in aviones])
+    if cota_inferior == float('inf'):
+        return
+    if compilado is None:
+        compilado = compilar_mapa(mapa)
+
+    mejor = None
+    for peso in pesos:
+        cota = mejor["makespan"] if mejor else None
+        try:
+            if metodo == "focal":
+                caminos, inferior = busqueda_focal(n_aviones, aviones, mapa, peso, heuristica, conflictos, estadisticas,
+                                                   cota, limite_tiempo, compilado)
+                if inferior is not None:
+                    cota_inferior = max(cota_inferior, inferior)
+            else:
+                caminos = a_estrella_multi(n_aviones, aviones, mapa, heuristica=heuristica, estadisticas=estadisticas,
+                                           peso=peso, cota=cota, limite_tiempo=limite_tiempo, admisible=True,
+                                           compilado=compilado)
+        except TiempoAgotado:
+            return
+
+        segundos = time.monotonic() - inicio
+        if caminos is None:
+            if peso > 1 and mejor is not None:
+                continue  # Sin reabrir nodos, el fallo de una búsqueda ponderada no demuestra nada
+            # Nada mejora la solución actual: es óptima (o el problema no tiene solución)
+            if mejor is not None and mejor["cota"] > 1:
+                yield dict(mejor, cota=1.0, peso=peso, segundos=segundos)
+            return
+        makespan = len(caminos[0]) - 1
+        mejor = {"caminos": caminos, "makespan": makespan, "peso": peso, "segundos": segundos,
+                 "cota": min(peso, makespan / cota_inferior) if cota_inferior else 1.0}
+        yield mejor
+        if mejor["cota"] <= 1:
+            return
+
+# =========================================
+# PUNTOS DE ENTRADA PARA parte_2.py
+# =========================================
+def resolver_anytime(n_aviones, aviones, mapa, limite_segundos=None, metodo="ponderado", heuristica=None,
+                     estadisticas=None, compilado=None):
+    """
+    Ejecuta a_estrella_anytime mostrando cada mejora, las guarda (sin los caminos) en
+    estadisticas["mejoras"] y devuelve los caminos de la mejor solución, o None.
+    """
+    caminos = None
+    mejoras = []
+    for mejora in a_estrella_anytime(n_aviones, aviones, mapa, limite_segundos, metodo=metodo, heuristica=heuristica,
+                                     estadisticas=estadisticas, compilado=compilado):
+        print(f"Mejora: makespan {mejora['makespan']}, cota {mejora['cota']:.3f}, peso {mejora['peso']}, "
+              f"{mejora['segundos']:.3f} s")
+        caminos = mejora["caminos"]
+        mejoras.append({clave: valor for clave, valor in mejora.items() if clave != "caminos"})
+    if estadisticas is not None:
+        estadisticas["mejoras"] = mejoras
+    return caminos
+
+def resolver_focal(n_aviones, aviones, mapa, peso, heuristica=None, estadisticas=None, compilado=None):
+    """
+    Una búsqueda focal con el peso dado. Guarda en estadisticas["cota_suboptimo"] el factor
+    garantizado respecto al óptimo y devuelve los caminos, o None.
+    """
+    caminos, inferior = busqueda_focal(n_aviones, aviones, mapa, peso, heuristica, estadisticas=estadisticas,
+                                       compilado=compilado)
+    if caminos is not None and estadisticas is not None:
+        makespan = len(caminos[0]) - 1
+        estadisticas["cota_suboptimo"] = min(peso, makespan / inferior) if inferior else 1.0
+    return caminos
@@ -0,0 +1,160 @@
+import heapq
+from itertools import count
+
+from mapa_compilado import compilar_mapa
+from parte_2 import a_estrella_od, buscar_conflicto, distancias_desde, reservas_de_caminos
+
+UMBRAL_FUSION = 5  # Conflictos entre dos grupos a partir de los cuales se planifican juntos
+
+# =========================================
+# NIVEL BAJO: A* ESPACIO-TIEMPO
+# =========================================
+def planificar_grupo(grupo, aviones, mapa, horizonte, distancias, restricciones, caminos, compilado=None):
+    """
+    Caminos de los aviones del grupo que llegan a su objetivo justo en el instante horizonte
+    y cumplen las restricciones del grupo. Con un solo avión es un A* espacio-tiempo; los
+    caminos actuales del resto se usan como tabla de choques a evitar.
+    """
+    evitar = reservas_de_caminos([camino for j, camino in enumerate(caminos) if j not in grupo and camino is not None])
+    return a_estrella_od(list(grupo), aviones, mapa, horizonte, distancias, restricciones, evitar, compilado=compilado)
+
+def restricciones_vacias():
+    return {"vertices": set(), "aristas": set()}
+
+def anadir_restriccion(restricciones, conflicto, avion):
+    """
+    Copia las restricciones de un grupo añadiendo la que resuelve el conflicto para el avión dado.
+    Las aristas se guardan como en reservas_de_caminos, es decir, prohibir que el grupo vaya
+    de origen a destino entre t y t+1 se anota como (t, destino, origen).
+    """
+    nuevas = {"vertices": set(restricciones["vertices"]), "aristas": set(restricciones["aristas"])}
+    tipo, i, _, t, dato = conflicto
+    if tipo == 'vertice':
+        nuevas["vertices"].add((t, dato))
+    else:
+        origen, destino = dato if avion == i else dato[::-1]
+        nuevas["aristas"].add((t - 1, destino, origen))
+    return nuevas
+
+def contar_conflictos(caminos):
+    """
+    Número de pares (avión, avión, instante) en conflicto; guía el orden del nivel alto.
+    """
+    total = 0
+    for t in range(1, len(caminos[0])):
+        ocupadas = {}
+        aristas = set()
+        for camino in caminos:
+            anterior, nueva = camino[t - 1][:2], camino[t][:2]
+            total += ocupadas.get(nueva, 0)
+            ocupadas[nueva] = ocupadas.get(nueva, 0) + 1
+            if anterior != nueva:
+                total += (nueva, anterior) in aristas
+                aristas.add((anterior, nueva))
+    return total
+
+# =========================================
+# NIVEL ALTO: ÁRBOL DE CONFLICTOS
+# =========================================
+def cbs_horizonte(n_aviones, aviones, mapa, horizonte, distancias, umbral_fusion=UMBRAL_FUSION, compilado=None):
+    """
+    Conflict-Based Search con makespan fijo. Todos los nodos del árbol cuestan lo mismo
+    (horizonte), así que se expande primero el que tiene menos conflictos.
+    Las restricciones se imponen a grupos de aviones: al principio cada avión es un grupo y,
+    cuando dos grupos acumulan umbral_fusion conflictos, se fusionan y se planifican juntos
+    (meta-agente). Así el árbol no explota cuando no hay solución con este makespan.
+    Devuelve los caminos sin conflictos o None.
+    """
+    if compilado is None:
+        compilado = compilar_mapa(mapa)
+    grupos = tuple((i,) for i in range(n_aviones))
+    restricciones = {grupo: restricciones_vacias() for grupo in grupos}
+    caminos = [None] * n_aviones
+    for grupo in grupos:
+        caminos_grupo = planificar_grupo(grupo, aviones, mapa, horizonte, distancias, restricciones[grupo], caminos,
+                                         compilado)
+        if caminos_grupo is None:
+            return None
+        for i, camino in zip(grupo, caminos_grupo):
+            caminos[i] = camino
+
+    contador = count()
+    abiertos = [(contar_conflictos(caminos), next(contador), grupos, restricciones, caminos)]
+    vistos = set()
+    conflictos_entre = {}
+
+    while abiertos:
+        _, _, grupos, restricciones, caminos = heapq.heappop(abiertos)
+        conflicto = buscar_conflicto(caminos)
+        if conflicto is None:
+            return caminos
+
+        _, i, j, _, _ = conflicto
+        grupo_i = next(grupo for grupo in grupos if i in grupo)
+        grupo_j = next(grupo for grupo in grupos if j in grupo)
+        par = (min(grupo_i, grupo_j), max(grupo_i, grupo_j))
+        conflictos_entre[par] = conflictos_entre.get(par, 0) + 1
+
+        if conflictos_entre[par] >= umbral_fusion:
+            # Fusión: el nuevo grupo parte sin restricciones, lo que relaja el nodo sin perder soluciones
+            fusion = tuple(sorted(grupo_i + grupo_j))
+            grupos_hijo = tuple(grupo for grupo in grupos if grupo not in par) + (fusion,)
+            restricciones_hijo = {grupo: restricciones[grupo] for grupo in grupos_hijo if grupo != fusion}
+            restricciones_hijo[fusion] = restricciones_vacias()
+            hijos = [(grupos_hijo, restricciones_hijo, fusion)]
+        else:
+            hijos = []
+            for avion, grupo in ((i, grupo_i), (j, grupo_j)):
+                restricciones_hijo = dict(restricciones)
+                restricciones_hijo[grupo] = anadir_restriccion(restricciones[grupo], conflicto, avion)
+                hijos.append((grupos, restricciones_hijo, grupo))
+
+        for grupos_hijo, restricciones_hijo, grupo in hijos:
+            # El mismo conjunto de restricciones puede alcanzarse por varias ramas
+            clave = tuple(
+                (g, frozenset(restricciones_hijo[g]["vertices"]), frozenset(restricciones_hijo[g]["aristas"]))
+                for g in sorted(grupos_hijo)
+            )
+            if clave in vistos:
+                continue
+            vistos.add(clave)
+
+            caminos_grupo = planificar_grupo(grupo, aviones, mapa, horizonte, distancias, restricciones_hijo[grupo],
+                                             caminos, compilado)
+            if caminos_grupo is None:
+                continue
+            caminos_hijo = list(caminos)
+            for a, camino in zip(grupo, caminos_grupo):
+                caminos_hijo[a] = camino
+            heapq.heappush(abiertos, (contar_conflictos(caminos_hijo), next(contador), grupos_hijo, restricciones_hijo, caminos_hijo))
+
+    return None
+
+def cbs(n_aviones, aviones, mapa, horizonte_max=None, umbral_fusion=UMBRAL_FUSION, compilado=None):
+    """
+    Conflict-Based Search para el rodaje de todos los aviones.
+    Igual que deteccion_independencia, prueba makespans crecientes desde la mayor distancia
+    individual, por lo que la primera solución tiene makespan óptimo.
+    Devuelve los caminos con el formato de a_estrella_multi o None.
+    """
+    objetivos = [avion[1] for avion in aviones]
+    if len(set(objetivos)) < n_aviones:
+        return None  # Dos aviones no pueden terminar en la misma casilla
+    distancias = [distancias_desde(objetivo, mapa) for objetivo in objetivos]
+    if any(avion[0] not in distancias[i] for i, avion in enumerate(aviones)):
+        return None
+    if compilado is None:
+        compilado = compilar_mapa(mapa)
+
+    if horizonte_max is None:
+        libres = sum(fila.count('A') + fila.count('B') for fila in mapa)
+        horizonte_max = libres * n_aviones
+    horizonte = max(distancias[i][avion[0]] for i, avion in enumerate(aviones))
+
+    while horizonte <= horizonte_max:
+        caminos = cbs_horizonte(n_aviones, aviones, mapa, horizonte, distancias, umbral_fusion, compilado)
+        if caminos is not None:
+            return caminos
+        horizonte += 1
+
+    return None
@@ -0,0 +1,380 @@
+from collections import deque
+
+from constraint import InSetConstraint
+
+from csp_compilado import PRK, SPC, STD
+from estadisticas import contar_restriccion
+from simetrias import grupos_intercambiables
+
+# Motores de resolución que admite define_problem
+MOTORES = ("constraint", "bitset")
+
+# =========================================
+# UTILIDADES DE MÁSCARAS
+# =========================================
+def celdas_de(mascara):
+    """
+    Ids de las casillas de una máscara de bits, de menor a mayor.
+    """
+    while mascara:
+        bit = mascara & -mascara
+        yield bit.bit_length() - 1
+        mascara ^= bit
+
+def es_unitario(mascara):
+    return not mascara & (mascara - 1)
+
+# =========================================
+# AUTÓMATA DE TAREAS
+# =========================================
+# La restricción de tareas de un avión solo depende de la clase (STD, SPC, PRK) de cada franja,
+# así que se recorre como un autómata cuyo estado es (franjas SPC, franjas en taller), ambos
+# topados en lo que hace falta. Un conjunto de clases es una máscara con el bit 1 << clase.
+def automata_tareas(avion, t2_contiguo):
+    """
+    Devuelve (transicion, estado final) para las tareas del avión. Con RESTR = 'T' no se puede
+    pasar por un STD antes de terminar las T2, y con t2_contiguo (el modelo de CSPMaintenance.py) tampoco
+    por un PRK una vez empezadas.
+    """
+    t2 = avion["T2"]
+    total = avion["T1"] + t2
+    restr = avion["RESTR"] == "T"
+
+    def transicion(estado, clase):
+        spc, talleres = estado
+        if clase == SPC:
+            return min(spc + 1, t2), min(talleres + 1, total)
+        if restr and spc < t2 and (clase == STD or (t2_contiguo and spc > 0)):
+            return None
+        if clase == STD:
+            return spc, min(talleres + 1, total)
+        return estado
+
+    return transicion, (t2, total)
+
+def clases_permitidas(conjuntos, transicion, final):
+    """
+    Consistencia de arco generalizada de la restricción de tareas: para cada franja, el
+    conjunto de clases de conjuntos que forma parte de algún recorrido del autómata hasta el
+    estado final. Devuelve None si no hay ninguno.
+    """
+    adelante = [{(0, 0)}]
+    for conjunto in conjuntos:
+        siguientes = set()
+        for estado in adelante[-1]:
+            for clase in celdas_de(conjunto):
+                nuevo = transicion(estado, clase)
+                if nuevo is not None:
+                    siguientes.add(nuevo)
+        adelante.append(siguientes)
+    if final not in adelante[-1]:
+        return None
+
+    viables = {final}
+    permitidas = [0] * len(conjuntos)
+    for t in range(len(conjuntos) - 1, -1, -1):
+        anteriores = set()
+        for estado in adelante[t]:
+            for clase in celdas_de(conjuntos[t]):
+                if transicion(estado, clase) in viables:
+                    anteriores.add(estado)
+                    permitidas[t] |= 1 << clase
+        viables = anteriores
+    return tuple(permitidas)
+
+# =========================================
+# PROBLEMA DE MANTENIMIENTO CON DOMINIOS DE BITS
+# =========================================
+class ProblemaMantenimiento:
+    """
+    Motor específico del problema de mantenimiento con la misma interfaz que usa el resto del
+    código de constraint.Problem (addConstraint, getSolution, getSolutions, getSolutionIter) y
+    las mismas soluciones, con los ids de casilla como valores. Cada dominio es una máscara de
+    bits sobre los ids y las restricciones son propagadores que podan los dominios:
+    - por franja: capacidad (2 por casilla, 1 JMB), JMB no adyacentes y maniobrabilidad;
+    - por avión: las tareas, con un autómata sobre las clases de casilla;
+    - por pareja de aviones idénticos (romper_simetrias): el orden lexicográfico.
+    Una variable con dominio unitario cuenta como asignada. La búsqueda mantiene la
+    consistencia tras cada asignación (MAC) y elige la variable con menor dom/wdeg: tamaño del
+    dominio entre la suma de pesos de sus restricciones, que aumentan cada vez que una de ellas
+    vacía un dominio. addConstraint admite InSetConstraint (reduce el dominio) y cualquier otra
+    restricción de python-constraint, que se comprueba con las variables asignadas.
+    vecinos_maniobra[id] son las casillas que cuentan como salida para la maniobrabilidad, y
+    t2_contiguo es la variante de CSPMaintenance.py de la restricción de tareas (ver automata_tareas).
+    """
+
+    def __init__(self, instancia, aviones, franjas, nombre_variable, vecinos_maniobra, t2_contiguo=False,
+                 romper_simetrias=False, estadisticas=None):
+        self._estadisticas = estadisticas
+        self._nombres = [nombre_variable(avion, franja) for avion in aviones for franja in range(franjas)]
+        self._indices = {nombre: i for i, nombre in enumerate(self._nombres)}
+        self._dominio = instancia["mascara_dominio"]
+        self._restricciones_dominio = []  # (índices, máscara) de InSetConstraint
+        self._propagadores = []
+        self._variables_restriccion = []
+
+        clase = instancia["clase"]
+        mascaras_clase = [0, 0, 0]
+        for celda in instancia["dominio"]:
+            mascaras_clase[clase[celda]] |= 1 << celda
+        self._mascaras_clase = mascaras_clase
+        self._mascaras_conjunto = [sum(mascaras_clase[c] for c in celdas_de(conjunto)) for conjunto in range(8)]
+
+        for franja in range(franjas):
+            variables = [a * franjas + franja for a in range(len(aviones))]
+            jumbos = [avion["TIPO"] == "JMB" for avion in aviones]
+            self._anadir_propagador(self._propagador_franja(variables, jumbos, vecinos_maniobra, instancia["vecinos"]),
+                                    variables)
+        automatas = {}
+        for a, avion in enumerate(aviones):
+            clave = (avion["T1"], avion["T2"], avion["RESTR"])
+            if clave not in automatas:
+                automatas[clave] = automata_tareas(avion, t2_contiguo) + ({},)
+            variables = list(range(a * franjas, (a + 1) * franjas))
+            self._anadir_propagador(self._propagador_tareas(variables, *automatas[clave]), variables)
+        if romper_simetrias:
+            posicion = {avion["ID"]: a for a, avion in enumerate(aviones)}
+            for grupo in grupos_intercambiables(aviones):
+                for avion, siguiente in zip(grupo, grupo[1:]):
+                    primero = [posicion[avion["ID"]] * franjas + franja for franja in range(franjas)]
+                    segundo = [posicion[siguiente["ID"]] * franjas + franja for franja in range(franjas)]
+                    self._anadir_propagador(self._propagador_orden_lexicografico(primero, segundo), primero + segundo)
+
+    # ---- Interfaz de constraint.Problem ----
+    def addConstraint(self, restriccion, variables=None):
+        indices = [self._indices[v] for v in variables] if variables is not None else list(range(len(self._nombres)))
+        if isinstance(restriccion, InSetConstraint):
+            mascara = 0
+            for celda in restriccion._set:
+                mascara |= 1 << celda
+            self._restricciones_dominio.append((indices, mascara))
+        else:
+            self._anadir_propagador(self._propagador_generico(restriccion, indices), indices)
+
+    def getSolution(self):
+        return next(self.getSolutionIter(), None)
+
+    def getSolutions(self):
+        return list(self.getSolutionIter())
+
+    def getSolutionIter(self):
+        dominios = self._dominios_iniciales()
+        if dominios is not None:
+            yield from self._buscar(dominios)
+
+    def variable_de_reparto(self):
+        """
+        Para csp_paralelo: la primera variable en la que ramifica la búsqueda y sus valores en
+        orden, o (None, []) si el problema no tiene solución.
+        """
+        dominios = self._dominios_iniciales()
+        if dominios is None:
+            return None, []
+        i = self._elegir_variable(dominios)
+        if i is None:
+            i = 0
+        return self._nombres[i], list(celdas_de(dominios[i]))
+
+    # ---- Búsqueda ----
+    def _preparar(self):
+        n = len(self._nombres)
+        self._restricciones_variable = [[] for _ in range(n)]
+        self._wdeg = [0] * n
+        for r, variables in enumerate(self._variables_restriccion):
+            for i in variables:
+                self._restricciones_variable[i].append(r)
+                self._wdeg[i] += self._pesos[r]
+
+    def _dominios_iniciales(self):
+        self._pesos = [1] * len(self._propagadores)
+        self._preparar()
+        dominios = [self._dominio] * len(self._nombres)
+        for indices, mascara in self._restricciones_dominio:
+            for i in indices:
+                dominios[i] &= mascara
+        if not all(dominios) or not self._propagar(dominios, range(len(self._propagadores))):
+            return None
+        return dominios
+
+    def _propagar(self, dominios, restricciones):
+        """
+        Aplica los propagadores hasta el punto fijo. Devuelve False si alguno falla, y entonces
+        aumenta su peso.
+        """
+        cola = deque(restricciones)
+        en_cola = set(cola)
+        while cola:
+            r = cola.popleft()
+            en_cola.discard(r)
+            cambiadas = self._propagadores[r](dominios)
+            if cambiadas is None:
+                self._pesos[r] += 1
+                for i in self._variables_restriccion[r]:
+                    self._wdeg[i] += 1
+                return False
+            for i in cambiadas:
+                for otra in self._restricciones_variable[i]:
+                    if otra != r and otra not in en_cola:
+                        en_cola.add(otra)
+                        cola.append(otra)
+        return True
+
+    def _elegir_variable(self, dominios):
+        """
+        Variable sin asignar con menor dom/wdeg (la primera en caso de empate), o None.
+        """
+        mejor, mejor_valor = None, None
+        wdeg = self._wdeg
+        for i, dominio in enumerate(dominios):
+            if dominio & (dominio - 1):
+                valor = dominio.bit_count() / wdeg[i]
+                if mejor_valor is None or valor < mejor_valor:
+                    mejor, mejor_valor = i, valor
+        return mejor
+
+    def _buscar(self, dominios):
+        """
+        Búsqueda en profundidad con una pila explícita de (dominios del padre, variable, valores
+        por probar), para no encadenar un generador por nivel.
+        """
+        estadisticas = self._estadisticas
+        pila = []
+        while True:
+            i = self._elegir_variable(dominios)
+            if i is None:
+                yield dict(zip(self._nombres, [dominio.bit_length() - 1 for dominio in dominios]))
+            else:
+                if estadisticas is not None:
+                    estadisticas["nodos_expandidos"] += 1
+                pila.append((dominios, i, dominios[i]))
+
+            # Siguiente valor consistente, deshaciendo niveles agotados
+            while pila:
+                padre, i, pendientes = pila[-1]
+                if not pendientes:
+                    pila.pop()
+                    continue
+                bit = pendientes & -pendientes
+                pila[-1] = (padre, i, pendientes ^ bit)
+                hijos = list(padre)
+                hijos[i] = bit
+                if estadisticas is not None:
+                    estadisticas["nodos_generados"] += 1
+                if self._propagar(hijos, self._restricciones_variable[i]):
+                    dominios = hijos
+                    break
+            else:
+                return
+
+    # ---- Propagadores ----
+    # Cada propagador recibe la lista de dominios, la poda en el sitio y devuelve los índices de
+    # las variables que ha cambiado, o None si alguna asignación ya no puede completarse.
+    def _anadir_propagador(self, propagador, variables):
+        self._propagadores.append(contar_restriccion(self._estadisticas, propagador))
+        self._variables_restriccion.append(list(variables))
+
+    def _propagador_franja(self, variables, jumbos, vecinos_maniobra, vecinos):
+        def propagar_franja(dominios):
+            cambiadas = []
+            nuevas_asignadas = True
+            while nuevas_asignadas:
+                nuevas_asignadas = False
+                una_vez = dos_veces = 0
+                prohibidas_jumbo = 0
+                libres_dominios = 0
+                for i, jumbo in zip(variables, jumbos):
+                    dominio = dominios[i]
+                    if dominio & (dominio - 1):
+                        libres_dominios |= dominio
+                        continue
+                    if dos_veces & dominio:
+                        return None
+                    if una_vez & dominio:
+                        dos_veces |= dominio
+                    else:
+                        una_vez |= dominio
+                    if jumbo:
+                        if prohibidas_jumbo & dominio:
+                            return None
+                        prohibidas_jumbo |= dominio | vecinos[dominio.bit_length() - 1]
+
+                # Maniobrabilidad: cada casilla ocupada necesita una vecina libre; si solo le queda una,
+                # nadie puede ocuparla, y no se puede ocupar una casilla sin ninguna vecina libre
+                prohibidas = dos_veces
+                for celda in celdas_de(una_vez):
+                    salidas = vecinos_maniobra[celda] & ~una_vez
+                    if not salidas:
+                        return None
+                    if es_unitario(salidas):
+                        prohibidas |= salidas
+                for celda in celdas_de(libres_dominios & ~una_vez):
+                    if not vecinos_maniobra[celda] & ~una_vez:
+                        prohibidas |= 1 << celda
+
+                for i, jumbo in zip(variables, jumbos):
+                    dominio = dominios[i]
+                    if not dominio & (dominio - 1):
+                        continue
+                    nuevo = dominio & ~prohibidas
+                    if jumbo:
+                        nuevo &= ~prohibidas_jumbo
+                    if nuevo != dominio:
+                        if not nuevo:
+                            return None
+                        dominios[i] = nuevo
+                        cambiadas.append(i)
+                        nuevas_asignadas = nuevas_asignadas or not nuevo & (nuevo - 1)
+            return cambiadas
+        return propagar_franja
+
+    def _propagador_tareas(self, variables, transicion, final, memoria):
+        mascaras_clase = self._mascaras_clase
+        mascaras_conjunto = self._mascaras_conjunto
+
+        def propagar_tareas(dominios):
+            conjuntos = tuple((dominios[i] & mascaras_clase[STD] != 0) |
+                              (dominios[i] & mascaras_clase[SPC] != 0) << SPC |
+                              (dominios[i] & mascaras_clase[PRK] != 0) << PRK for i in variables)
+            if conjuntos not in memoria:
+                memoria[conjuntos] = clases_permitidas(conjuntos, transicion, final)
+            permitidas = memoria[conjuntos]
+            if permitidas is None:
+                return None
+            cambiadas = []
+            for i, conjunto, permitido in zip(variables, conjuntos, permitidas):
+                if permitido != conjunto:
+                    dominios[i] &= mascaras_conjunto[permitido]
+                    cambiadas.append(i)
+            return cambiadas
+        return propagar_tareas
+
+    def _propagador_orden_lexicografico(self, primero, segundo):
+        def propagar_orden_lexicografico(dominios):
+            # Mientras las franjas coinciden asignadas, el orden lo decide la siguiente: en la primera
+            # que no está decidida, el valor del primer avión no puede superar al del segundo
+            cambiadas = []
+            for i, j in zip(primero, segundo):
+                menor = (dominios[i] & -dominios[i]).bit_length() - 1
+                dominio_i = dominios[i] & ((1 << dominios[j].bit_length()) - 1)
+                dominio_j = dominios[j] & ~((1 << menor) - 1)
+                if not dominio_i or not dominio_j:
+                    return None
+                if dominio_i != dominios[i]:
+                    dominios[i] = dominio_i
+                    cambiadas.append(i)
+                if dominio_j != dominios[j]:
+                    dominios[j] = dominio_j
+                    cambiadas.append(j)
+                if not (es_unitario(dominio_i) and dominio_i == dominio_j):
+                    break
+            return cambiadas
+        return propagar_orden_lexicografico
+
+    def _propagador_generico(self, restriccion, indices):
+        nombres = [self._nombres[i] for i in indices]
+
+        def propagar_generico(dominios):
+            asignaciones = {nombre: dominios[i].bit_length() - 1
+                            for nombre, i in zip(nombres, indices) if es_unitario(dominios[i])}
+            return [] if restriccion(nombres, {}, asignaciones) else None
+        return propagar_generico
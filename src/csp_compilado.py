@@ -0,0 +1,60 @@
+from array import array
+
+# Clases de posición en la instancia compilada
+STD, SPC, PRK = 0, 1, 2
+SIN_CLASE = -1
+CLASES = ("STD", "SPC", "PRK")
+
+# =========================================
+# COMPILACIÓN DE LA INSTANCIA
+# =========================================
+def compilar_instancia(num_filas, num_columnas, distribucion_matriz):
+    """
+    Compila la matriz de talleres y parkings a índices enteros (id = fila * columnas + columna)
+    para que las restricciones trabajen sin listas ni tuplas:
+    - clase[id]: STD, SPC, PRK o SIN_CLASE. Si una posición aparece en varias listas prevalece
+      SPC y después STD, el mismo orden en que las comprobaban las restricciones.
+    - dominio: ids de las posiciones STD + SPC + PRK, en ese orden (el dominio de las variables).
+    - vecinos[id]: máscara de bits con las casillas adyacentes dentro de la matriz.
+    - mascara_dominio: máscara de bits con todas las posiciones del dominio.
+    - posiciones[id]: la tupla (fila, columna) original, para escribir las soluciones.
+    """
+    n_celdas = num_filas * num_columnas
+    clase = array('b', [SIN_CLASE] * n_celdas)
+    for codigo in (PRK, STD, SPC):
+        for x, y in distribucion_matriz[CLASES[codigo]]:
+            clase[x * num_columnas + y] = codigo
+
+    dominio = [x * num_columnas + y for tipo in ("STD", "SPC", "PRK") for x, y in distribucion_matriz[tipo]]
+    mascara_dominio = 0
+    for celda in dominio:
+        mascara_dominio |= 1 << celda
+
+    vecinos = []
+    for x in range(num_filas):
+        for y in range(num_columnas):
+            mascara = 0
+            for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+                if 0 <= nx < num_filas and 0 <= ny < num_columnas:
+                    mascara |= 1 << (nx * num_columnas + ny)
+            vecinos.append(mascara)
+
+    return {
+        "num_filas": num_filas,
+        "num_columnas": num_columnas,
+        "clase": clase,
+        "dominio": dominio,
+        "vecinos": vecinos,
+        "mascara_dominio": mascara_dominio,
+        "posiciones": [(x, y) for x in range(num_filas) for y in range(num_columnas)],
+    }
+
+# =========================================
+# TRADUCCIÓN DE SOLUCIONES
+# =========================================
+def decodificar_solucion(solucion, instancia):
+    """
+    Traduce una solución con ids de casilla a otra con las posiciones (fila, columna).
+    """
+    posiciones = instancia["posiciones"]
+    return {variable: posiciones[celda] for variable, celda in solucion.items()}
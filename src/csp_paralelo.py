@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from constraint import InSetConstraint
+
+from csp_bitset import ProblemaMantenimiento
+from optimizacion import anadir_restriccion_cota, buscar_optimo
+from soluciones import contar_soluciones, iterar_soluciones
+
+# =========================================
+# REPARTO DEL ESPACIO DE BÚSQUEDA
+# =========================================
+# construir es una función sin argumentos (p. ej. un partial de define_problem) que crea el
+# problema; se envía a cada proceso, así que debe poder serializarse con pickle.
+def variable_de_reparto(problem):
+    """
+    Devuelve (variable, valores) con la primera variable que asigna el BacktrackingSolver
+    (grado y MRV, la misma clave con la que ordena él) y sus valores en el orden en que los
+    prueba (los saca del final del dominio). Cada parte es justo el subárbol que la búsqueda
+    secuencial recorre para ese valor, así que las partes juntas tienen las mismas soluciones.
+    Dentro de una parte el orden puede variar: al deshacer la poda el solver devuelve los
+    valores ocultos al final del dominio, y ese orden depende de lo ya recorrido.
+    Usa Problem._getArgs, que es lo que hace getSolutionIter antes de llamar al solver; el
+    motor de csp_bitset tiene su propio variable_de_reparto.
+    """
+    if isinstance(problem, ProblemaMantenimiento):
+        return problem.variable_de_reparto()
+    dominios, _, vrestricciones = problem._getArgs()
+    if not dominios:
+        return None, []
+    variable = min(dominios, key=lambda v: (-len(vrestricciones[v]), len(dominios[v]), v))
+    return variable, list(reversed(dominios[variable]))
+
+def fijar(problem, variable, valor):
+    problem.addConstraint(InSetConstraint([valor]), [variable])
+    return problem
+
+# =========================================
+# TRABAJO DE CADA PROCESO
+# =========================================
+def contar_parte(construir, variable, valor, peso=None):
+    return contar_soluciones(iterar_soluciones(fijar(construir(), variable, valor)), peso)
+
+def volcar_parte(construir, variable, valor, ruta, max_soluciones=None):
+    """
+    Escribe las soluciones de una parte en ruta, una por línea en JSON, y devuelve cuántas son.
+    """
+    n_soluciones = 0
+    with open(ruta, 'w') as archivo:
+        for n_soluciones, solucion in enumerate(iterar_soluciones(fijar(construir(), variable, valor), max_soluciones), 1):
+            archivo.write(json.dumps(solucion) + "\n")
+    return n_soluciones
+
+def optimizar_parte(construir, variable, valor, variables_aviones, aviones, clase, objetivo):
+    problem = construir()
+    incumbente = anadir_restriccion_cota(problem, variables_aviones, aviones, clase, objetivo)
+    return buscar_optimo(fijar(problem, variable, valor), incumbente, variables_aviones, aviones, clase, objetivo)
+
+# =========================================
+# RESOLUCIÓN EN PARALELO
+# =========================================
+def contar_paralelo(construir, procesos, peso=None):
+    """
+    Cuenta las soluciones repartiendo las partes entre procesos y sumando los recuentos.
+    """
+    variable, valores = variable_de_reparto(construir())
+    with ProcessPoolExecutor(procesos) as pool:
+        futuros = [pool.submit(contar_parte, construir, variable, valor, peso) for valor in valores]
+        return sum(futuro.result() for futuro in futuros)
+
+def iterar_soluciones_paralelo(construir, procesos, max_soluciones=None):
+    """
+    Generador con las mismas soluciones que iterar_soluciones, parte a parte en el orden de
+    variable_de_reparto (el mismo sea cual sea el número de procesos). Cada proceso vuelca su
+    parte a un fichero temporal y aquí se leen en orden, así que en memoria solo hay una
+    solución a la vez. Con max_soluciones se cancelan las partes que ya no hacen falta.
+    """
+    variable, valores = variable_de_reparto(construir())
+    with tempfile.TemporaryDirectory() as directorio, ProcessPoolExecutor(procesos) as pool:
+        rutas = [os.path.join(directorio, f"parte_{i}.jsonl") for i in range(len(valores))]
+        futuros = [pool.submit(volcar_parte, construir, variable, valor, ruta, max_soluciones)
+                   for valor, ruta in zip(valores, rutas)]
+        emitidas = 0
+        try:
+            for futuro, ruta in zip(futuros, rutas):
+                futuro.result()
+                with open(ruta, 'r') as archivo:
+                    for linea in archivo:
+                        if max_soluciones is not None and emitidas >= max_soluciones:
+                            return
+                        emitidas += 1
+                        yield json.loads(linea)
+        finally:
+            for futuro in futuros:
+                futuro.cancel()
+
+def optimizar_paralelo(construir, procesos, variables_aviones, aviones, clase, objetivo):
+    """
+    Ramificación y poda por partes: cada proceso busca el óptimo de su parte y se queda el de
+    menor coste (el mismo que optimizar); con empate, el de la primera parte, de modo que la
+    solución no depende del número de procesos. Devuelve (mejor solución, coste) o (None, None).
+    """
+    problem = construir()
+    anadir_restriccion_cota(problem, variables_aviones, aviones, clase, objetivo)
+    variable, valores = variable_de_reparto(problem)
+    with ProcessPoolExecutor(procesos) as pool:
+        futuros = [pool.submit(optimizar_parte, construir, variable, valor, variables_aviones, aviones, clase, objetivo)
+                   for valor in valores]
+        mejor, mejor_coste = None, None
+        for futuro in futuros:
+            solucion, coste = futuro.result()
+            if solucion is not None and (mejor_coste is None or coste < mejor_coste):
+                mejor, mejor_coste = solucion, coste
+    return mejor, mejor_coste
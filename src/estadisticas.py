@@ -0,0 +1,101 @@
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import partial, wraps
+
+# =========================================
+# REGISTRO DE ESTADÍSTICAS
+# =========================================
+def crear_estadisticas(solver):
+    """
+    Diccionario donde los solvers (A* y CSP) van dejando sus contadores.
+    """
+    return {
+        "solver": solver,
+        "tiempos": {},  # Segundos por fase: lectura, modelo, busqueda, salida
+        "nodos_generados": 0,
+        "nodos_expandidos": 0,
+        "nodos_reabiertos": 0,
+        "max_abiertos": 0,
+        "evaluaciones_heuristica": 0,
+        "comprobaciones_restricciones": {},  # Llamadas por función de restricción
+    }
+
+@contextmanager
+def fase(estadisticas, nombre):
+    """
+    Mide el tiempo de una fase y lo acumula en estadisticas["tiempos"][nombre].
+    Con estadisticas=None no hace nada.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        if estadisticas is not None:
+            tiempos = estadisticas["tiempos"]
+            tiempos[nombre] = tiempos.get(nombre, 0.0) + time.perf_counter() - inicio
+
+def nombre_restriccion(funcion):
+    while isinstance(funcion, partial):
+        funcion = funcion.func
+    return getattr(funcion, "__name__", repr(funcion))
+
+def contar_restriccion(estadisticas, funcion):
+    """
+    Envuelve una función de restricción para contar cuántas veces la evalúa el solver.
+    Con estadisticas=None devuelve la función sin cambios.
+    """
+    if estadisticas is None:
+        return funcion
+    nombre = nombre_restriccion(funcion)
+    contadores = estadisticas["comprobaciones_restricciones"]
+    contadores.setdefault(nombre, 0)
+
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        contadores[nombre] += 1
+        return funcion(*args, **kwargs)
+    return envoltura
+
+# =========================================
+# SALIDA Y PERFILADO
+# =========================================
+def ruta_estadisticas(ruta_salida):
+    return os.path.splitext(ruta_salida)[0] + ".stat"
+
+def guardar_estadisticas(estadisticas, ruta_salida):
+    """
+    Escribe las estadísticas en JSON en un fichero .stat junto a la salida indicada.
+    """
+    ruta = ruta_estadisticas(ruta_salida)
+    with open(ruta, 'w') as archivo:
+        json.dump(estadisticas, archivo, indent=2, ensure_ascii=False)
+        archivo.write("\n")
+    return ruta
+
+def ejecutar_perfilado(funcion, *args, ruta_perfil=None, memoria=False, **kwargs):
+    """
+    Ejecuta funcion(*args, **kwargs) con los ganchos de perfilado pedidos y devuelve
+    (resultado, pico de memoria en bytes o None):
+    - ruta_perfil: guarda un perfil de cProfile en esa ruta (se lee con pstats).
+    - memoria: mide el pico de memoria con tracemalloc.
+    """
+    perfil = cProfile.Profile() if ruta_perfil else None
+    if memoria:
+        tracemalloc.start()
+    if perfil:
+        perfil.enable()
+    try:
+        resultado = funcion(*args, **kwargs)
+    finally:
+        if perfil:
+            perfil.disable()
+            perfil.dump_stats(ruta_perfil)
+        pico = None
+        if memoria:
+            _, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+    return resultado, pico
@@ -0,0 +1,204 @@
+import argparse
+import random
+from collections import deque
+
+# =========================================
+# INSTANCIAS DE MANTENIMIENTO (CSP)
+# =========================================
+def generar_mantenimiento(filas, columnas, franjas, n_aviones, proporciones=(0.4, 0.2, 0.4),
+                          fraccion_jmb=0.3, max_tareas=(2, 2), fraccion_restr=0.5, semilla=None):
+    """
+    Genera una instancia de mantenimiento con la estructura de CSPMaintenance.leer_archivo_entrada.
+    proporciones son las fracciones (STD, SPC, PRK) de las casillas de la matriz y max_tareas
+    el máximo de tareas (T1, T2) por avión. Cada avión tiene como mucho tantas tareas como
+    franjas, y solo se piden tareas T2 si hay algún taller SPC.
+    """
+    rng = random.Random(semilla)
+    casillas = [(x, y) for x in range(filas) for y in range(columnas)]
+    rng.shuffle(casillas)
+
+    n_std = max(1, round(len(casillas) * proporciones[0]))
+    n_spc = max(1, round(len(casillas) * proporciones[1]))
+    n_prk = max(1, min(len(casillas) - n_std - n_spc, round(len(casillas) * proporciones[2])))
+    distribucion = {
+        "STD": sorted(casillas[:n_std]),
+        "SPC": sorted(casillas[n_std:n_std + n_spc]),
+        "PRK": sorted(casillas[n_std + n_spc:n_std + n_spc + n_prk]),
+    }
+
+    aviones = []
+    for id_avion in range(1, n_aviones + 1):
+        t2 = rng.randint(0, min(max_tareas[1], franjas)) if distribucion["SPC"] else 0
+        t1 = rng.randint(0, min(max_tareas[0], franjas - t2))
+        aviones.append({
+            "ID": id_avion,
+            "TIPO": "JMB" if rng.random() < fraccion_jmb else "STD",
+            "RESTR": "T" if rng.random() < fraccion_restr else "F",
+            "T1": t1,
+            "T2": t2,
+        })
+
+    return {
+        "franjas": franjas,
+        "num_filas": filas,
+        "num_columnas": columnas,
+        "distribucion_matriz": distribucion,
+        "aviones": aviones,
+    }
+
+def escribir_mantenimiento(ruta, datos, formato="maintenance"):
+    """
+    Escribe la instancia en disco. formato="maintenance" usa la cabecera "Franjas: N" que lee
+    CSPMaintenance.leer_archivo_entrada; formato="main" usa solo "N", como main.read_input.
+    """
+    def posiciones(lista):
+        return " ".join(f"({x},{y})" for x, y in lista)
+
+    lineas = [f"Franjas: {datos['franjas']}" if formato == "maintenance" else str(datos["franjas"])]
+    lineas.append(f"{datos['num_filas']}x{datos['num_columnas']}")
+    for tipo in ("STD", "SPC", "PRK"):
+        lineas.append(f"{tipo}:{posiciones(datos['distribucion_matriz'][tipo])}")
+    for avion in datos["aviones"]:
+        lineas.append(f"{avion['ID']}-{avion['TIPO']}-{avion['RESTR']}-{avion['T1']}-{avion['T2']}")
+    with open(ruta, 'w') as archivo:
+        archivo.write("\n".join(lineas))
+
+# =========================================
+# MAPAS DE RODAJE (A*)
+# =========================================
+def componente_mayor(mapa):
+    filas, columnas = len(mapa), len(mapa[0])
+    vistas = set()
+    mayor = set()
+    for inicio in ((x, y) for x in range(filas) for y in range(columnas)):
+        if inicio in vistas or mapa[inicio[0]][inicio[1]] == 'G':
+            continue
+        componente = {inicio}
+        cola = deque([inicio])
+        while cola:
+            x, y = cola.popleft()
+            for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                if 0 <= nx < filas and 0 <= ny < columnas and mapa[nx][ny] != 'G' and (nx, ny) not in componente:
+                    componente.add((nx, ny))
+                    cola.append((nx, ny))
+        vistas |= componente
+        if len(componente) > len(mayor):
+            mayor = componente
+    return mayor
+
+def hay_camino_evitando(mapa, origen, destino, prohibidas):
+    filas, columnas = len(mapa), len(mapa[0])
+    vistas = {origen}
+    cola = deque([origen])
+    while cola:
+        actual = cola.popleft()
+        if actual == destino:
+            return True
+        x, y = actual
+        for siguiente in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            nx, ny = siguiente
+            if (0 <= nx < filas and 0 <= ny < columnas and mapa[nx][ny] != 'G'
+                    and siguiente not in vistas and siguiente not in prohibidas):
+                vistas.add(siguiente)
+                cola.append(siguiente)
+    return False
+
+def es_bien_formada(mapa, aviones):
+    """
+    Una instancia es bien formada si cada avión puede ir de su origen a su destino sin pisar
+    el origen ni el destino de ningún otro y todos esos extremos son casillas 'B'.
+    Entonces siempre tiene solución: planificando por prioridades, cada avión espera en su
+    origen a que pasen los anteriores y luego recorre un camino que no toca sus extremos.
+    """
+    extremos = [extremo for avion in aviones for extremo in avion]
+    if len(set(extremos)) < len(extremos):
+        return False
+    if any(mapa[x][y] != 'B' for x, y in extremos):
+        return False
+    for i, (origen, destino) in enumerate(aviones):
+        prohibidas = {extremo for j, avion in enumerate(aviones) if j != i for extremo in avion}
+        if not hay_camino_evitando(mapa, origen, destino, prohibidas):
+            return False
+    return True
+
+def generar_mapa_rodaje(filas, columnas, n_aviones, densidad_obstaculos=0.15, fraccion_a=0.1,
+                        semilla=None, intentos=100):
+    """
+    Genera un mapa en el formato de parte_2.leer_mapa con solución garantizada.
+    Las casillas son 'G' con probabilidad densidad_obstaculos y, del resto, 'A' con
+    probabilidad fraccion_a. Se reintenta hasta que la instancia es bien formada.
+    Devuelve (n_aviones, aviones, mapa).
+    """
+    rng = random.Random(semilla)
+    for _ in range(intentos):
+        mapa = [
+            ['G' if rng.random() < densidad_obstaculos else ('A' if rng.random() < fraccion_a else 'B')
+             for _ in range(columnas)]
+            for _ in range(filas)
+        ]
+        # Las casillas fuera de la componente principal no sirven de pista
+        principal = componente_mayor(mapa)
+        for x in range(filas):
+            for y in range(columnas):
+                if (x, y) not in principal:
+                    mapa[x][y] = 'G'
+
+        candidatas = sorted(casilla for casilla in principal if mapa[casilla[0]][casilla[1]] == 'B')
+        if len(candidatas) < 2 * n_aviones:
+            continue
+        extremos = rng.sample(candidatas, 2 * n_aviones)
+        aviones = [(extremos[2 * i], extremos[2 * i + 1]) for i in range(n_aviones)]
+        if es_bien_formada(mapa, aviones):
+            return n_aviones, aviones, mapa
+    raise ValueError(f"No se pudo generar un mapa resoluble de {filas}x{columnas} con {n_aviones} aviones")
+
+def escribir_mapa(ruta, n_aviones, aviones, mapa):
+    with open(ruta, 'w') as archivo:
+        archivo.write(f"{n_aviones}\n")
+        for (x1, y1), (x2, y2) in aviones:
+            archivo.write(f"({x1},{y1}) ({x2},{y2})\n")
+        archivo.write("\n".join(";".join(fila) for fila in mapa))
+
+# =========================================
+# PROGRAMA PRINCIPAL
+# =========================================
+def main():
+    parser = argparse.ArgumentParser(description="Generador de instancias sintéticas de rodaje y mantenimiento")
+    subparsers = parser.add_subparsers(dest="tipo", required=True)
+
+    p_mapa = subparsers.add_parser("mapa", help="Mapa de rodaje para parte_2.py")
+    p_mapa.add_argument("salida")
+    p_mapa.add_argument("--filas", type=int, default=10)
+    p_mapa.add_argument("--columnas", type=int, default=10)
+    p_mapa.add_argument("--aviones", type=int, default=5)
+    p_mapa.add_argument("--obstaculos", type=float, default=0.15, help="Densidad de casillas 'G'")
+    p_mapa.add_argument("--fraccion-a", type=float, default=0.1, help="Fracción de casillas libres que son 'A'")
+    p_mapa.add_argument("--semilla", type=int)
+
+    p_mant = subparsers.add_parser("mantenimiento", help="Instancia de mantenimiento para el CSP")
+    p_mant.add_argument("salida")
+    p_mant.add_argument("--filas", type=int, default=3)
+    p_mant.add_argument("--columnas", type=int, default=3)
+    p_mant.add_argument("--franjas", type=int, default=2)
+    p_mant.add_argument("--aviones", type=int, default=3)
+    p_mant.add_argument("--proporciones", type=float, nargs=3, default=(0.4, 0.2, 0.4), metavar=("STD", "SPC", "PRK"))
+    p_mant.add_argument("--jmb", type=float, default=0.3, help="Fracción de aviones JMB")
+    p_mant.add_argument("--max-t1", type=int, default=2)
+    p_mant.add_argument("--max-t2", type=int, default=2)
+    p_mant.add_argument("--formato", choices=["maintenance", "main"], default="maintenance",
+                        help="maintenance: CSPMaintenance.py; main: main.py")
+    p_mant.add_argument("--semilla", type=int)
+    args = parser.parse_args()
+
+    if args.tipo == "mapa":
+        n, aviones, mapa = generar_mapa_rodaje(args.filas, args.columnas, args.aviones, args.obstaculos,
+                                               args.fraccion_a, args.semilla)
+        escribir_mapa(args.salida, n, aviones, mapa)
+    else:
+        datos = generar_mantenimiento(args.filas, args.columnas, args.franjas, args.aviones, args.proporciones,
+                                      args.jmb, (args.max_t1, args.max_t2), semilla=args.semilla)
+        escribir_mantenimiento(args.salida, datos, args.formato)
+    print(f"Instancia guardada en {args.salida}")
+
+if __name__ == "__main__":
+    main()
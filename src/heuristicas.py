@@ -0,0 +1,150 @@
+from collections import deque
+
+INALCANZABLE = -1  # Valor de la tabla para casillas desde las que no se llega al objetivo
+
+HEURISTICAS = ["manhattan", "distancia", "congestion"]
+AGREGACIONES = ["suma", "max"]
+
+# =========================================
+# TABLAS DE DISTANCIA REAL (BFS INVERSO)
+# =========================================
+def tabla_distancias(destino, mapa):
+    """
+    BFS inverso desde el destino por las casillas transitables ('A' y 'B').
+    Devuelve una lista plana indexada por id de casilla (fila * columnas + columna) con la
+    distancia al destino, o INALCANZABLE.
+    """
+    filas, columnas = len(mapa), len(mapa[0])
+    tabla = [INALCANZABLE] * (filas * columnas)
+    x, y = destino
+    if mapa[x][y] not in ('A', 'B'):
+        return tabla
+    tabla[x * columnas + y] = 0
+    cola = deque([destino])
+    while cola:
+        x, y = cola.popleft()
+        d = tabla[x * columnas + y] + 1
+        for nx, ny in ((x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)):
+            if 0 <= nx < filas and 0 <= ny < columnas and mapa[nx][ny] in ('A', 'B'):
+                celda = nx * columnas + ny
+                if tabla[celda] == INALCANZABLE:
+                    tabla[celda] = d
+                    cola.append((nx, ny))
+    return tabla
+
+def tablas_aviones(aviones, mapa):
+    """
+    Una tabla de distancias por avión, calculada una sola vez al cargar el mapa.
+    """
+    return [tabla_distancias(avion[1], mapa) for avion in aviones]
+
+def tablas_manhattan(aviones, mapa):
+    """
+    Una tabla plana por avión con la distancia Manhattan de cada casilla a su objetivo.
+    """
+    filas, columnas = len(mapa), len(mapa[0])
+    return [[abs(x - ox) + abs(y - oy) for x in range(filas) for y in range(columnas)] for _, (ox, oy) in aviones]
+
+# =========================================
+# HEURÍSTICAS CONJUNTAS
+# =========================================
+# Las heurísticas reciben la casilla de cada avión como id (fila * columnas + columna), que
+# es como a_estrella_multi guarda los estados, y cada término es una consulta en una tabla.
+def heuristica_tablas(tablas, agregacion="suma"):
+    """
+    Suma (o máximo) por avión del valor de su tabla en su casilla.
+    """
+    if agregacion == "max":
+        def h(celdas):
+            return max((tabla[celda] for tabla, celda in zip(tablas, celdas)), default=0)
+    else:
+        def h(celdas):
+            return sum(tabla[celda] for tabla, celda in zip(tablas, celdas))
+    return h
+
+def heuristica_manhattan(aviones, mapa, agregacion="suma"):
+    return heuristica_tablas(tablas_manhattan(aviones, mapa), agregacion)
+
+def heuristica_distancia(tablas, agregacion="suma"):
+    """
+    Distancia real sorteando los obstáculos 'G', con consulta O(1) en las tablas.
+    Devuelve infinito si algún avión ya no puede llegar a su objetivo.
+    """
+    infinito = float('inf')
+    return heuristica_tablas([[infinito if d == INALCANZABLE else d for d in tabla] for tabla in tablas], agregacion)
+
+def heuristica_congestion(tablas, objetivos, agregacion="suma"):
+    """
+    Distancia real más un paso por cada avión cuyo objetivo está ocupado por otro avión:
+    el que ocupa la casilla tiene que apartarse antes de que el otro pueda entrar.
+    Informa mejor en pistas saturadas pero no es admisible en general.
+    objetivos son los ids de casilla de los objetivos.
+    """
+    base = heuristica_distancia(tablas, agregacion)
+    def h(celdas):
+        valor = base(celdas)
+        ocupadas = set(celdas)
+        bloqueados = sum(
+            1 for celda, objetivo in zip(celdas, objetivos)
+            if celda != objetivo and objetivo in ocupadas
+        )
+        return valor + bloqueados
+    return h
+
+def heuristica_conflictos(aviones, mapa):
+    """
+    Heurística secundaria de la búsqueda focal: suma de las distancias reales que faltan más
+    el número de aviones en conflicto, es decir, que no están en su objetivo y lo tienen
+    ocupado por otro avión o tienen ocupadas todas las casillas vecinas que los acercan a él.
+    La distancia hace que la lista focal avance hacia los objetivos (solo con los conflictos
+    se queda explorando estados sin bloqueos); no es admisible, solo ordena la lista focal.
+    """
+    filas, columnas = len(mapa), len(mapa[0])
+    tablas = tablas_aviones(aviones, mapa)
+    objetivos = tuple(x * columnas + y for _, (x, y) in aviones)
+    # Por avión y casilla, las casillas vecinas a un paso menos de su objetivo
+    avances = []
+    for tabla in tablas:
+        avance = [()] * (filas * columnas)
+        for celda, d in enumerate(tabla):
+            if d > 0:
+                x, y = divmod(celda, columnas)
+                avance[celda] = tuple(
+                    nx * columnas + ny for nx, ny in ((x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y))
+                    if 0 <= nx < filas and 0 <= ny < columnas and tabla[nx * columnas + ny] == d - 1
+                )
+        avances.append(avance)
+
+    def h(celdas):
+        ocupadas = set(celdas)
+        valor = 0
+        for tabla, avance, objetivo, celda in zip(tablas, avances, objetivos, celdas):
+            if celda == objetivo:
+                continue
+            valor += tabla[celda]
+            if objetivo in ocupadas or all(vecina in ocupadas for vecina in avance[celda]):
+                valor += 1
+        return valor
+    return h
+
+def es_admisible(nombre, agregacion):
+    """
+    Si la heurística nunca sobrestima el makespan: manhattan y distancia con agregación max.
+    congestion suma 1 por avión bloqueado, así que puede sobrestimar incluso con max.
+    """
+    return nombre in ("manhattan", "distancia") and agregacion == "max"
+
+def crear_heuristica(nombre, aviones, mapa, agregacion="suma"):
+    """
+    Construye la heurística conjunta indicada ('manhattan', 'distancia' o 'congestion')
+    con la agregación 'suma' (suma de costes) o 'max' (makespan), sobre ids de casilla.
+    """
+    if nombre == "manhattan":
+        return heuristica_manhattan(aviones, mapa, agregacion)
+    tablas = tablas_aviones(aviones, mapa)
+    if nombre == "distancia":
+        return heuristica_distancia(tablas, agregacion)
+    if nombre == "congestion":
+        columnas = len(mapa[0])
+        return heuristica_congestion(tablas, tuple(x * columnas + y for _, (x, y) in aviones), agregacion)
+    raise ValueError(f"Heurística desconocida: {nombre}")
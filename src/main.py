@@ -1,7 +1,16 @@
-import sys
+import argparse
+import os
 import time
-from constraint import Problem
-from collections import defaultdict
+from constraint import FunctionConstraint, Problem, Unassigned
+from functools import partial
+
+from csp_bitset import MOTORES, ProblemaMantenimiento
+from csp_compilado import SPC, STD, compilar_instancia
+from estadisticas import contar_restriccion, crear_estadisticas, ejecutar_perfilado, fase, guardar_estadisticas
+from csp_paralelo import contar_paralelo, iterar_soluciones_paralelo, optimizar_paralelo
+from optimizacion import OBJETIVOS, optimizar
+from simetrias import grupos_intercambiables, multiplicidad, restriccion_orden_lexicografico
+from soluciones import escribir_soluciones, iterar_soluciones
 
 # Function to read input file
 def read_input(path):
@@ -32,142 +41,195 @@ def read_input(path):
 
     return franjas, matriz_dim, talleres_std, talleres_spc, parkings, aviones
 
-# Save results
-def save_output(output_path, solutions, aviones, franjas, talleres_spc, talleres_std):
-    with open(output_path, 'w') as file:
-        file.write(f"N. Sol: {len(solutions)}\n")
-        if not solutions:
+# Save results as they are found; only the solution count is kept in memory
+def save_output(output_path, solutions, aviones, franjas, instancia, write_solutions=True, peso=None):
+    clase = instancia["clase"]
+    posiciones = instancia["posiciones"]
+
+    def write_solution(file, i, solution):
+        file.write(f"\nSolucion {i}:\n")
+        for avion in aviones:
+            id_avion = avion["ID"]
+            tipo = avion["TIPO"]
+            restr = avion["RESTR"]
+            tareas_1 = avion["T1"]
+            tareas_2 = avion["T2"]
+            file.write(f"{id_avion}-{tipo}-{restr}-{tareas_1}-{tareas_2}: ")
+            for franja in range(franjas):
+                celda = solution[f"{id_avion}-{franja}"]
+                if clase[celda] == SPC:
+                    tipo_taller = "SPC"
+                elif clase[celda] == STD:
+                    tipo_taller = "STD"
+                else:
+                    tipo_taller = "PRK"
+                file.write(f"{tipo_taller}{posiciones[celda]} ")
+            file.write("\n")
+
+    n_solutions = escribir_soluciones(output_path, solutions, write_solution if write_solutions else None, peso=peso)
+    if n_solutions == 0:
+        with open(output_path, 'a') as file:
             file.write("No se encontraron soluciones válidas.\n")
-            print("No se encontraron soluciones válidas.")
-            return
-
-        for i, solution in enumerate(solutions):
-            file.write(f"\nSolucion {i + 1}:\n")
-            for avion in aviones:
-                id_avion = avion["ID"]
-                tipo = avion["TIPO"]
-                restr = avion["RESTR"]
-                tareas_1 = avion["T1"]
-                tareas_2 = avion["T2"]
-                file.write(f"{id_avion}-{tipo}-{restr}-{tareas_1}-{tareas_2}: ")
-                for franja in range(franjas):
-                    pos = solution[f"{id_avion}-{franja}"]
-                    if pos in talleres_spc:
-                        tipo_taller = "SPC"
-                    elif pos in talleres_std:
-                        tipo_taller = "STD"
-                    else:
-                        tipo_taller = "PRK"
-                    file.write(f"{tipo_taller}{pos} ")
-                file.write("\n")
+        print("No se encontraron soluciones válidas.")
+    return n_solutions
 
 # Define the CSP problem
-def define_problem(franjas, tamano, talleres_std, talleres_spc, parkings, aviones):
+# Constraints are declared per aircraft or per pair of aircraft and accept partial assignments
+# (FunctionConstraint with assigned=False), so the solver prunes as soon as a partial assignment
+# can no longer be completed instead of waiting for every variable to be assigned.
+# Variable values are the cell ids of the compiled instance (built here unless one is given),
+# so the constraints only do array lookups and bitmask operations.
+# With romper_simetrias, identical aircraft get lexicographically ordered slots and only one
+# solution per permutation of them is produced (see simetrias.multiplicidad).
+# With motor="bitset" a csp_bitset.ProblemaMantenimiento with the same solutions is returned instead.
+def define_problem(franjas, tamano, talleres_std, talleres_spc, parkings, aviones, estadisticas=None, instancia=None,
+                   romper_simetrias=False, motor="constraint"):
+    if instancia is None:
+        instancia = compilar_instancia(tamano[0], tamano[1], {"STD": talleres_std, "SPC": talleres_spc, "PRK": parkings})
+    dominio = instancia["dominio"]
+    clase = instancia["clase"]
+    # Neighbours restricted to domain cells: cells outside the domain never count as free space
+    vecinos = [mascara & instancia["mascara_dominio"] for mascara in instancia["vecinos"]]
+    if motor == "bitset":
+        return ProblemaMantenimiento(instancia, aviones, franjas, lambda avion, franja: f"{avion['ID']}-{franja}",
+                                     vecinos, romper_simetrias=romper_simetrias, estadisticas=estadisticas)
     problem = Problem()
 
-    dominio = talleres_std + talleres_spc + parkings
+    def anadir(restriccion, variables, parcial=True):
+        restriccion = contar_restriccion(estadisticas, restriccion)
+        problem.addConstraint(FunctionConstraint(restriccion, assigned=not parcial), variables)
 
     # Variables
     for avion in aviones:
         for franja in range(franjas):
             problem.addVariable(f"{avion['ID']}-{franja}", dominio)
 
-    # Restricción: Máximo 2 aviones por taller
+    # Restricción: Máximo 2 aviones por taller (a third assigned aircraft already breaks it)
     def restriccion_max_2_aviones(*asignaciones):
-        conteo_talleres = defaultdict(int)
-        for posicion in asignaciones:
-            conteo_talleres[posicion] += 1
-            if conteo_talleres[posicion] > 2:
+        una_vez = 0
+        dos_veces = 0
+        for celda in asignaciones:
+            if celda is Unassigned:
+                continue
+            bit = 1 << celda
+            if dos_veces & bit:
                 return False
+            if una_vez & bit:
+                dos_veces |= bit
+            else:
+                una_vez |= bit
         return True
 
-    # Restricción: Máximo 1 JUMBO por taller
-    def restriccion_max_1_jumbo(*asignaciones):
-        conteo_jumbo = defaultdict(int)
-        for avion, posicion in zip(aviones, asignaciones):
-            if avion["TIPO"] == "JMB":
-                conteo_jumbo[posicion] += 1
-                if conteo_jumbo[posicion] > 1:
-                    return False
-        return True
+    # Restricción: Máximo 1 JUMBO por taller (per pair of jumbos)
+    def restriccion_max_1_jumbo(celda_1, celda_2):
+        return celda_1 != celda_2
 
     # Restricción: Completar tareas en talleres válidos con orden si aplica
-    def restriccion_tareas(*asignaciones):
-        for avion in aviones:
-            tareas_restantes = {"T1": avion["T1"], "T2": avion["T2"]}
-            talleres_spc_count = 0
-            talleres_count = 0
+    # The order is only checked on the assigned prefix of slots; unassigned slots may still be workshops
+    def restriccion_tareas(*asignaciones, avion):
+        restr = avion["RESTR"] == "T"
+        restantes_t1 = avion["T1"]
+        restantes_t2 = avion["T2"]
+        talleres_spc_count = 0
+        talleres_count = 0
+        sin_asignar = 0
+
+        for celda in asignaciones:
+            if celda is Unassigned:
+                sin_asignar += 1
+            elif clase[celda] == SPC:
+                talleres_spc_count += 1
+                talleres_count += 1
+                if restantes_t2 > 0:
+                    restantes_t2 -= 1
+                elif restr and restantes_t1 > 0:
+                    restantes_t1 -= 1
+            elif clase[celda] == STD:
+                talleres_count += 1
+                if restantes_t2 > 0 and restr and not sin_asignar:
+                    return False
+                if restantes_t1 > 0:
+                    restantes_t1 -= 1
 
-            for franja in range(franjas):
-                posicion = asignaciones[aviones.index(avion) * franjas + franja]
-                if posicion in talleres_spc:
-                    talleres_spc_count += 1
-                    talleres_count += 1
-                    if tareas_restantes["T2"] > 0:
-                        tareas_restantes["T2"] -= 1
-                    elif avion["RESTR"] == "T" and tareas_restantes["T2"] == 0 and tareas_restantes["T1"] > 0:
-                        tareas_restantes["T1"] -= 1
-                elif posicion in talleres_std:
-                    talleres_count += 1
-                    if tareas_restantes["T2"] > 0 and avion["RESTR"] == "T":
-                        return False
-                    if tareas_restantes["T1"] > 0:
-                        tareas_restantes["T1"] -= 1
-
-            # Validar que las tareas tipo 2 se realizaron en talleres especializados
-            if talleres_spc_count < avion["T2"]:
-                return False
+        # Validar que las tareas tipo 2 se realizaron en talleres especializados
+        if talleres_spc_count + sin_asignar < avion["T2"]:
+            return False
 
-            # Validar que las tareas tipo 1 se realizaron en talleres válidos
-            if talleres_count < avion["T1"] + avion["T2"]:
-                return False
+        # Validar que las tareas tipo 1 se realizaron en talleres válidos
+        if talleres_count + sin_asignar < avion["T1"] + avion["T2"]:
+            return False
 
         return True
 
-    # Restricción: Asegurar adyacencia libre
+    # Restricción: Asegurar adyacencia libre (occupying more cells never frees one)
     def restriccion_adyacencia(*asignaciones):
-        ocupados = set(asignaciones)
-        for posicion in ocupados:
-            if posicion in parkings + talleres_std + talleres_spc:
-                x, y = posicion
-                adyacentes = [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
-                if all(adj in ocupados for adj in adyacentes if adj in dominio):
-                    return False
-        return True
-
-    # Restricción: Evitar aviones JUMBO adyacentes
-    def restriccion_jumbos_no_adyacentes(*asignaciones):
-        posiciones_jumbos = [pos for avion, pos in zip(aviones, asignaciones) if avion["TIPO"] == "JMB"]
-        for pos in posiciones_jumbos:
-            x, y = pos
-            adyacentes = [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
-            if any(adj in posiciones_jumbos for adj in adyacentes if adj in dominio):
+        ocupados = 0
+        for celda in asignaciones:
+            if celda is not Unassigned:
+                ocupados |= 1 << celda
+        for celda in asignaciones:
+            if celda is not Unassigned and not vecinos[celda] & ~ocupados:
                 return False
         return True
 
+    # Restricción: Evitar aviones JUMBO adyacentes (per pair of jumbos)
+    def restriccion_jumbos_no_adyacentes(celda_1, celda_2):
+        return not vecinos[celda_1] >> celda_2 & 1
+
+    jumbos = [avion for avion in aviones if avion["TIPO"] == "JMB"]
     for franja in range(franjas):
         variables_franja = [f"{avion['ID']}-{franja}" for avion in aviones]
-        problem.addConstraint(restriccion_max_2_aviones, variables_franja)
-        problem.addConstraint(restriccion_max_1_jumbo, variables_franja)
-        problem.addConstraint(restriccion_adyacencia, variables_franja)
-        problem.addConstraint(restriccion_jumbos_no_adyacentes, variables_franja)
+        anadir(restriccion_max_2_aviones, variables_franja)
+        anadir(restriccion_adyacencia, variables_franja)
+        for i, jumbo_1 in enumerate(jumbos):
+            for jumbo_2 in jumbos[i + 1:]:
+                variables_jumbos = [f"{jumbo_1['ID']}-{franja}", f"{jumbo_2['ID']}-{franja}"]
+                anadir(restriccion_max_1_jumbo, variables_jumbos, parcial=False)
+                anadir(restriccion_jumbos_no_adyacentes, variables_jumbos, parcial=False)
 
     # Añadir restricciones
-    problem.addConstraint(restriccion_tareas, [f"{avion['ID']}-{franja}" for avion in aviones for franja in range(franjas)])
+    for avion in aviones:
+        anadir(partial(restriccion_tareas, avion=avion), [f"{avion['ID']}-{franja}" for franja in range(franjas)])
+
+    # Symmetry breaking: each aircraft of an identical group is lexicographically <= the next one
+    if romper_simetrias:
+        for grupo in grupos_intercambiables(aviones):
+            for avion, siguiente in zip(grupo, grupo[1:]):
+                variables = [f"{avion['ID']}-{franja}" for franja in range(franjas)]
+                variables += [f"{siguiente['ID']}-{franja}" for franja in range(franjas)]
+                anadir(restriccion_orden_lexicografico, variables)
 
     return problem
 
 # Main function
 def main():
-    if len(sys.argv) != 2:
-        print("Uso: python CSPMaintenance.py <path maintenance>")
-        sys.exit(1)
-
-    input_path = sys.argv[1]
+    parser = argparse.ArgumentParser(prog="CSPMaintenance.py", description="Maintenance scheduling CSP")
+    parser.add_argument("maintenance", help="path maintenance")
+    parser.add_argument("--perfil", action="store_true", help="Save a cProfile profile of the search next to the output")
+    parser.add_argument("--memoria", action="store_true", help="Measure peak search memory with tracemalloc")
+    parser.add_argument("--max-solutions", type=int, help="Stop the search after this many solutions")
+    parser.add_argument("--first", action="store_true", help="Stop at the first solution (same as --max-solutions 1)")
+    parser.add_argument("--count", action="store_true", help="Only count the solutions, without writing them")
+    parser.add_argument("--symmetry", action="store_true",
+                        help="Break symmetries between identical aircraft: only canonical solutions are enumerated")
+    parser.add_argument("--expanded-count", action="store_true",
+                        help="With --symmetry, count every solution equivalent to the canonical ones")
+    parser.add_argument("--optimize", choices=list(OBJETIVOS),
+                        help="Only look for the minimum-cost solution (branch and bound) for this objective")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Split the search across this many processes (by values of the first variable)")
+    parser.add_argument("--engine", choices=MOTORES, default="constraint",
+                        help="Solver engine: python-constraint or the bitset-domain engine with propagation")
+    args = parser.parse_args()
+    max_solutions = 1 if args.first else args.max_solutions
+
+    input_path = args.maintenance
     output_path = input_path.replace(".txt", ".csv")
+    estadisticas = crear_estadisticas("csp")
 
     # Read input data
-    franjas, tamano, talleres_std, talleres_spc, parkings, aviones = read_input(input_path)
+    with fase(estadisticas, "lectura"):
+        franjas, tamano, talleres_std, talleres_spc, parkings, aviones = read_input(input_path)
 
     # Debugging output
     print(f"Franjas: {franjas}")
@@ -178,17 +240,67 @@ def main():
     print(f"Aviones: {aviones}")
 
     # Define the CSP problem
-    problem = define_problem(franjas, tamano, talleres_std, talleres_spc, parkings, aviones)
-
-    # Solve the problem and measure time
+    with fase(estadisticas, "modelo"):
+        instancia = compilar_instancia(tamano[0], tamano[1], {"STD": talleres_std, "SPC": talleres_spc, "PRK": parkings})
+        problem = define_problem(franjas, tamano, talleres_std, talleres_spc, parkings, aviones, estadisticas, instancia,
+                                 romper_simetrias=args.symmetry, motor=args.engine)
+    # Each worker builds its own problem; its constraint counters are not collected
+    construir = partial(define_problem, franjas, tamano, talleres_std, talleres_spc, parkings, aviones, None, instancia,
+                        args.symmetry, args.engine)
+    parallel = args.workers > 1
+    peso = None
+    if args.symmetry and args.expanded_count:
+        grupos_variables = [[[f"{avion['ID']}-{franja}" for franja in range(franjas)] for avion in grupo]
+                            for grupo in grupos_intercambiables(aviones)]
+        peso = partial(multiplicidad, grupos_variables=grupos_variables)
+
+    # Solve the problem, streaming solutions to the output file as they are found
+    ruta_perfil = os.path.splitext(output_path)[0] + ".prof" if args.perfil else None
     start_time = time.time()
-    solutions = problem.getSolutions()
+    if args.optimize:
+        # Optimisation mode: branch and bound, only the optimal solution is written
+        variables_aviones = [[f"{avion['ID']}-{franja}" for franja in range(franjas)] for avion in aviones]
+        with fase(estadisticas, "busqueda"):
+            if parallel:
+                (mejor, coste), pico_memoria = ejecutar_perfilado(
+                    optimizar_paralelo, construir, args.workers, variables_aviones, aviones, instancia["clase"],
+                    args.optimize, ruta_perfil=ruta_perfil, memoria=args.memoria)
+            else:
+                (mejor, coste), pico_memoria = ejecutar_perfilado(
+                    optimizar, problem, variables_aviones, aviones, instancia["clase"], args.optimize, estadisticas,
+                    ruta_perfil=ruta_perfil, memoria=args.memoria)
+            n_solutions = save_output(output_path, [mejor] if mejor is not None else [], aviones, franjas, instancia)
+        estadisticas["objetivo"] = args.optimize
+        estadisticas["coste"] = coste
+        print(f"Coste óptimo ({args.optimize}): {coste}")
+    else:
+        with fase(estadisticas, "busqueda"):
+            if parallel and args.count and max_solutions is None:
+                # Count only: each worker counts its part, no solutions are passed back
+                n_solutions, pico_memoria = ejecutar_perfilado(
+                    contar_paralelo, construir, args.workers, peso, ruta_perfil=ruta_perfil, memoria=args.memoria)
+                with open(output_path, 'w') as file:
+                    file.write(f"N. Sol: {n_solutions}\n")
+                    if n_solutions == 0:
+                        file.write("No se encontraron soluciones válidas.\n")
+            else:
+                if parallel:
+                    solutions = iterar_soluciones_paralelo(construir, args.workers, max_solutions)
+                else:
+                    solutions = iterar_soluciones(problem, max_solutions)
+                n_solutions, pico_memoria = ejecutar_perfilado(
+                    save_output, output_path, solutions, aviones, franjas, instancia, not args.count, peso,
+                    ruta_perfil=ruta_perfil, memoria=args.memoria)
+        estadisticas["recuento"] = ("expandido" if peso else "canonico") if args.symmetry else "completo"
     end_time = time.time()
+    if pico_memoria is not None:
+        estadisticas["memoria_pico_bytes"] = pico_memoria
+    estadisticas["soluciones"] = n_solutions
 
     print(f"Tiempo: {end_time - start_time:.2f} segundos")
-    print(f"Número de soluciones encontradas: {len(solutions)}")
+    print(f"Número de soluciones encontradas: {n_solutions}")
 
-    save_output(output_path, solutions, aviones, franjas, talleres_spc, talleres_std)
+    guardar_estadisticas(estadisticas, output_path)
 
-if _name_ == "_main_":
-    main()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
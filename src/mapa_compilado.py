@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+
+FORMATO_CACHE = 2  # Cambiarlo invalida las cachés guardadas con un formato anterior
+# Caché por usuario, independiente del directorio desde el que se lance el programa
+DIRECTORIO_CACHE = os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache"),
+                                "mapas_rodaje")
+
+MOVIMIENTOS = [(0, -1, '←'), (0, 1, '→'), (-1, 0, '↑'), (1, 0, '↓'), (0, 0, 'w')]
+
+# Tipos de casilla en la rejilla compilada
+OBSTACULO, CAMINO, SIN_ESPERA = 0, 1, 2
+TIPOS_CASILLA = {'G': OBSTACULO, 'B': CAMINO, 'A': SIN_ESPERA}
+
+# =========================================
+# COMPILACIÓN DEL MAPA
+# =========================================
+def compilar_mapa(mapa):
+    """
+    Compila el mapa a una rejilla de enteros y a una tabla de vecinos por casilla (id =
+    fila * columnas + columna), con la regla de no esperar en casillas 'A' ya aplicada.
+    - celdas[id]: OBSTACULO, CAMINO o SIN_ESPERA.
+    - movimientos[id]: lista de (fila, columna, flecha) alcanzables en un paso.
+    - vecinos[id]: lista de (id destino, código de movimiento) con el mismo contenido.
+    """
+    filas, columnas = len(mapa), len(mapa[0])
+    compilado = {
+        "filas": filas,
+        "columnas": columnas,
+        "celdas": [TIPOS_CASILLA.get(mapa[x][y], OBSTACULO) for x in range(filas) for y in range(columnas)],
+        "movimientos": [[] for _ in range(filas * columnas)],
+        "vecinos": [[] for _ in range(filas * columnas)],
+    }
+    for x in range(filas):
+        for y in range(columnas):
+            compilar_casilla(compilado, x, y)
+    return compilado
+
+def compilar_casilla(compilado, x, y):
+    """
+    Rellena movimientos y vecinos de la casilla (x, y) a partir de compilado["celdas"].
+    """
+    filas, columnas, celdas = compilado["filas"], compilado["columnas"], compilado["celdas"]
+    celda = x * columnas + y
+    movimientos, vecinos = [], []
+    for codigo, (dx, dy, movimiento) in enumerate(MOVIMIENTOS):
+        nx, ny = x + dx, y + dy
+        if not (0 <= nx < filas and 0 <= ny < columnas):
+            continue
+        destino = nx * columnas + ny
+        if celdas[destino] == OBSTACULO:
+            continue
+        if celdas[celda] == SIN_ESPERA and movimiento == 'w':
+            continue
+        movimientos.append((nx, ny, movimiento))
+        vecinos.append((destino, codigo))
+    compilado["movimientos"][celda] = movimientos
+    compilado["vecinos"][celda] = vecinos
+
+def actualizar_casilla(compilado, mapa, x, y):
+    """
+    Actualiza en el sitio el mapa compilado tras cambiar mapa[x][y]: solo se recalculan la
+    casilla y sus vecinas, que son las únicas cuyas listas de movimientos dependen de ella.
+    """
+    filas, columnas = compilado["filas"], compilado["columnas"]
+    compilado["celdas"][x * columnas + y] = TIPOS_CASILLA.get(mapa[x][y], OBSTACULO)
+    for dx, dy, _ in MOVIMIENTOS:
+        nx, ny = x + dx, y + dy
+        if 0 <= nx < filas and 0 <= ny < columnas:
+            compilar_casilla(compilado, nx, ny)
+
+# =========================================
+# CACHÉ EN DISCO
+# =========================================
+def hash_fichero(ruta_archivo):
+    with open(ruta_archivo, 'rb') as archivo:
+        return hashlib.sha256(archivo.read()).hexdigest()
+
+def leer_cache(ruta_cache, mapa):
+    """
+    Lee un mapa compilado guardado en JSON y comprueba que corresponde a mapa: mismas
+    dimensiones y tipos de casilla, y tablas del tamaño esperado con casillas dentro del mapa.
+    Devuelve None si el fichero no existe, está corrupto o no pasa la comprobación.
+    """
+    try:
+        with open(ruta_cache, encoding="utf-8") as archivo:
+            datos = json.load(archivo)
+        filas, columnas = len(mapa), len(mapa[0])
+        total = filas * columnas
+        celdas = [TIPOS_CASILLA.get(mapa[x][y], OBSTACULO) for x in range(filas) for y in range(columnas)]
+        if datos["filas"] != filas or datos["columnas"] != columnas or datos["celdas"] != celdas:
+            return None
+        movimientos = [[(int(nx), int(ny), str(mov)) for nx, ny, mov in lista] for lista in datos["movimientos"]]
+        vecinos = [[(int(destino), int(codigo)) for destino, codigo in lista] for lista in datos["vecinos"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    if len(movimientos) != total or len(vecinos) != total:
+        return None
+    if any(not (0 <= nx < filas and 0 <= ny < columnas) for lista in movimientos for nx, ny, _ in lista):
+        return None
+    if any(not (0 <= destino < total and 0 <= codigo < len(MOVIMIENTOS))
+           for lista in vecinos for destino, codigo in lista):
+        return None
+    return {"filas": filas, "columnas": columnas, "celdas": celdas, "movimientos": movimientos, "vecinos": vecinos}
+
+def cargar_mapa_compilado(ruta_archivo, mapa, directorio_cache=DIRECTORIO_CACHE):
+    """
+    Devuelve el mapa compilado, reutilizando la copia guardada en directorio_cache si el
+    fichero del mapa no ha cambiado (la clave es el hash SHA-256 de su contenido).
+    La copia se guarda en JSON, no con pickle, para que leerla nunca ejecute código.
+    """
+    ruta_cache = os.path.join(directorio_cache, f"{hash_fichero(ruta_archivo)}-v{FORMATO_CACHE}.json")
+    compilado = leer_cache(ruta_cache, mapa)
+    if compilado is not None:
+        return compilado
+
+    compilado = compilar_mapa(mapa)
+    try:
+        os.makedirs(directorio_cache, exist_ok=True)
+        # Se escribe en un temporal y se renombra para que otro proceso nunca lea un fichero a medias
+        temporal = f"{ruta_cache}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding="utf-8") as archivo:
+            json.dump(compilado, archivo, separators=(",", ":"))
+        os.replace(temporal, ruta_cache)
+    except OSError as e:
+        print(f"No se pudo guardar la caché del mapa: {e}")
+    return compilado
@@ -0,0 +1,98 @@
+from math import inf
+
+from constraint import FunctionConstraint, Unassigned
+
+from csp_compilado import PRK, SPC
+from estadisticas import contar_restriccion
+
+# =========================================
+# OBJETIVOS
+# =========================================
+# Cada objetivo es el coste de un avión a partir de las casillas de sus franjas, en orden.
+# Con franjas sin asignar (Unassigned) devuelve una cota inferior admisible del coste final,
+# y la suma sobre los aviones es la cota (o el coste exacto) de la asignación completa.
+def coste_parkings(celdas, avion, clase):
+    """
+    Franjas que el avión pasa en un parking.
+    """
+    return sum(1 for celda in celdas if celda is not Unassigned and clase[celda] == PRK)
+
+def coste_ocupacion_spc(celdas, avion, clase):
+    """
+    Franjas que el avión ocupa un taller SPC. Necesitará al menos T2, aunque aún no las tenga asignadas.
+    """
+    return max(avion["T2"], sum(1 for celda in celdas if celda is not Unassigned and clase[celda] == SPC))
+
+def coste_movimientos(celdas, avion, clase):
+    """
+    Cambios de posición del avión entre franjas consecutivas.
+    """
+    return sum(1 for anterior, siguiente in zip(celdas, celdas[1:])
+               if anterior is not Unassigned and siguiente is not Unassigned and anterior != siguiente)
+
+OBJETIVOS = {
+    "parkings": coste_parkings,
+    "spc": coste_ocupacion_spc,
+    "movimientos": coste_movimientos,
+}
+
+def coste_solucion(solucion, variables_aviones, aviones, clase, objetivo):
+    coste_avion = OBJETIVOS[objetivo]
+    return sum(coste_avion([solucion[variable] for variable in variables], avion, clase)
+               for variables, avion in zip(variables_aviones, aviones))
+
+# =========================================
+# RAMIFICACIÓN Y PODA
+# =========================================
+def anadir_restriccion_cota(problem, variables_aviones, aviones, clase, objetivo, estadisticas=None):
+    """
+    Añade al problema una restricción de cota sobre todas las variables que rechaza cualquier
+    asignación parcial cuya cota inferior no mejore la mejor solución encontrada hasta el momento.
+    variables_aviones tiene, por avión, sus variables en orden de franja.
+    Devuelve la lista de un elemento con el coste de esa mejor solución, que lee la restricción.
+    """
+    coste_avion = OBJETIVOS[objetivo]
+    incumbente = [inf]
+
+    tramos = []
+    inicio = 0
+    for variables in variables_aviones:
+        tramos.append((inicio, inicio + len(variables)))
+        inicio += len(variables)
+
+    def restriccion_cota(*celdas):
+        cota = 0
+        for (inicio, fin), avion in zip(tramos, aviones):
+            cota += coste_avion(celdas[inicio:fin], avion, clase)
+            if cota >= incumbente[0]:
+                return False
+        return True
+
+    todas = [variable for variables in variables_aviones for variable in variables]
+    problem.addConstraint(FunctionConstraint(contar_restriccion(estadisticas, restriccion_cota), assigned=False), todas)
+    return incumbente
+
+def buscar_optimo(problem, incumbente, variables_aviones, aviones, clase, objetivo, estadisticas=None):
+    """
+    Recorre las soluciones de un problema con restricción de cota: como getSolutionIter es
+    perezoso, cada solución que devuelve endurece la cota para el resto de la búsqueda.
+    Devuelve (mejor solución, coste), o (None, None) si el problema no tiene solución.
+    """
+    mejor = None
+    for solucion in problem.getSolutionIter():
+        # La restricción de cota garantiza que cada solución mejora estrictamente la anterior
+        mejor = solucion
+        incumbente[0] = coste_solucion(solucion, variables_aviones, aviones, clase, objetivo)
+        if estadisticas is not None:
+            estadisticas["mejoras_incumbente"] = estadisticas.get("mejoras_incumbente", 0) + 1
+        if incumbente[0] == 0:
+            break
+    return (mejor, incumbente[0]) if mejor is not None else (None, None)
+
+def optimizar(problem, variables_aviones, aviones, clase, objetivo, estadisticas=None):
+    """
+    Busca la solución de coste mínimo del problema por ramificación y poda.
+    Devuelve (mejor solución, coste), o (None, None) si el problema no tiene solución.
+    """
+    incumbente = anadir_restriccion_cota(problem, variables_aviones, aviones, clase, objetivo, estadisticas)
+    return buscar_optimo(problem, incumbente, variables_aviones, aviones, clase, objetivo, estadisticas)
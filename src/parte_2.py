@@ -1,4 +1,13 @@
-from itertools import product
+import argparse
+import heapq
+import os
+import time
+from array import array
+from itertools import count, product
+
+from heuristicas import AGREGACIONES, HEURISTICAS, INALCANZABLE, crear_heuristica, es_admisible, tabla_distancias
+from mapa_compilado import MOVIMIENTOS, cargar_mapa_compilado, compilar_mapa
+from estadisticas import crear_estadisticas, ejecutar_perfilado, fase, guardar_estadisticas
 
 # =========================================
 # FUNCIÓN PARA LEER EL MAPA Y LOS AVIONES
@@ -22,26 +31,51 @@ def leer_mapa(ruta_archivo):
 def heuristica_global(posiciones, objetivos):
     return sum(abs(x1 - x2) + abs(y1 - y2) for (x1, y1), (x2, y2) in zip(posiciones, objetivos))
 
+def distancias_desde(destino, mapa):
+    """
+    Distancias reales al destino como diccionario casilla -> distancia, a partir de la tabla
+    plana de heuristicas.tabla_distancias; las casillas inalcanzables no aparecen.
+    """
+    columnas = len(mapa[0])
+    tabla = tabla_distancias(destino, mapa)
+    return {divmod(celda, columnas): d for celda, d in enumerate(tabla) if d != INALCANZABLE}
+
 # =========================================
 # GENERACIÓN DE MOVIMIENTOS VÁLIDOS
 # =========================================
-def generar_movimientos_validos(n_aviones, posiciones, mapa):
+BITS_MOVIMIENTO = 3  # Bits por avión al empaquetar los códigos de movimiento de un nodo
+
+# Los solvers reciben el mapa compilado (ver mapa_compilado.compilar_mapa) en el parámetro
+# compilado; si no se pasa, lo compilan una vez al empezar a partir del estado actual del mapa.
+# Estados conjuntos empaquetados: la casilla (id) del avión i ocupa los bits [bits * i, bits * (i + 1))
+# de un único entero, que es lo que se guarda, se compara y se usa como clave en las tablas.
+def bits_por_avion(compilado):
+    return max(1, (compilado["filas"] * compilado["columnas"] - 1).bit_length())
+
+def empaquetar_estado(celdas, bits):
+    estado = 0
+    for i, celda in enumerate(celdas):
+        estado |= celda << (bits * i)
+    return estado
+
+def desempaquetar_estado(estado, n_aviones, bits):
+    mascara = (1 << bits) - 1
+    return tuple((estado >> (bits * i)) & mascara for i in range(n_aviones))
+
+def generar_movimientos_validos(n_aviones, posiciones, mapa, compilado=None):
+    if compilado is None:
+        compilado = compilar_mapa(mapa)
+    movimientos, columnas = compilado["movimientos"], compilado["columnas"]
     dicc_posiciones = {}
     for i in range(n_aviones):
-        movimientos_posibles = []
         x, y = posiciones[i]
-        filas, columnas = len(mapa), len(mapa[0])
-        posibles_movimientos = [
-            (0, -1, '←'), (0, 1, '→'), (-1, 0, '↑'), (1, 0, '↓'), (0, 0, 'w')
-        ]
-        for dx, dy, movimiento in posibles_movimientos:
-            nx, ny = x + dx, y + dy
-            if 0 <= nx < filas and 0 <= ny < columnas and (mapa[nx][ny] == 'A' or mapa[nx][ny] == 'B'):
-                if not (mapa[x][y] == 'A' and movimiento == 'w'):
-                    movimientos_posibles.append((nx, ny, movimiento))
-        dicc_posiciones[i] = movimientos_posibles
+        dicc_posiciones[i] = movimientos[x * columnas + y]
     return dicc_posiciones
 
+def movimientos_validos_avion(posicion, compilado):
+    x, y = posicion
+    return compilado["movimientos"][x * compilado["columnas"] + y]
+
 # =========================================
 # VERIFICACIÓN DE CRUCES ENTRE AVIONES
 # =========================================
@@ -56,11 +90,232 @@ def no_hay_cruces(anteriores, nuevas):
                 return False
     return True
 
+def generar_sucesores(celdas, vecinos, bits):
+    """
+    Genera de forma perezosa las combinaciones de movimientos sin cruces a partir de las
+    casillas (ids) de los aviones, en el mismo orden que product(...) filtrado con no_hay_cruces.
+    Los aviones se asignan de uno en uno y una asignación parcial se poda en cuanto pisa una
+    casilla ocupada o invierte una arista ya usada. vecinos es la tabla del mapa compilado.
+    Devuelve tuplas (estado empaquetado, movimientos empaquetados, nuevas casillas); la lista
+    de nuevas casillas se reutiliza entre sucesores, así que hay que leerla antes del siguiente.
+    """
+    n = len(celdas)
+    nuevas = [0] * n
+    ocupadas = set()
+    aristas = set()
+
+    def asignar(i, estado, codigos):
+        if i == n:
+            yield estado, codigos, nuevas
+            return
+        anterior = celdas[i]
+        desplazamiento = bits * i
+        desplazamiento_movimiento = BITS_MOVIMIENTO * i
+        for nueva, codigo in vecinos[anterior]:
+            if nueva in ocupadas or (nueva, anterior) in aristas:
+                continue
+            nuevas[i] = nueva
+            ocupadas.add(nueva)
+            arista = (anterior, nueva)
+            nueva_arista = arista not in aristas
+            if nueva_arista:
+                aristas.add(arista)
+            yield from asignar(i + 1, estado | nueva << desplazamiento, codigos | codigo << desplazamiento_movimiento)
+            ocupadas.discard(nueva)
+            if nueva_arista:
+                aristas.discard(arista)
+
+    return asignar(0, 0, 0)
+
+def buscar_conflicto(caminos):
+    """
+    Busca el primer conflicto entre caminos de igual longitud con las reglas de no_hay_cruces.
+    Devuelve None o una tupla (tipo, i, j, t, dato):
+    - ('vertice', i, j, t, casilla): i y j ocupan la misma casilla en el instante t.
+    - ('arista', i, j, t, (origen, destino)): entre t-1 y t, i va de origen a destino y j al revés.
+    """
+    for t in range(1, len(caminos[0])):
+        ocupadas = {}
+        aristas = {}
+        for i, camino in enumerate(caminos):
+            anterior, nueva = camino[t - 1][:2], camino[t][:2]
+            if nueva in ocupadas:
+                return ('vertice', ocupadas[nueva], i, t, nueva)
+            ocupadas[nueva] = i
+            if anterior != nueva:
+                if (nueva, anterior) in aristas:
+                    return ('arista', i, aristas[(nueva, anterior)], t, (anterior, nueva))
+                aristas[(anterior, nueva)] = i
+    return None
+
+def reservas_de_caminos(caminos):
+    """
+    Tabla de reservas espacio-tiempo ocupada por unos caminos:
+    vertices contiene (t, casilla) y aristas contiene (t, origen, destino) para el paso t -> t+1.
+    """
+    reservas = {"vertices": set(), "aristas": set()}
+    for camino in caminos:
+        for t in range(1, len(camino)):
+            reservas["vertices"].add((t, camino[t][:2]))
+            reservas["aristas"].add((t - 1, camino[t - 1][:2], camino[t][:2]))
+    return reservas
+
 # =========================================
 # IMPLEMENTACIÓN DEL ALGORITMO A*
 # =========================================
-def a_estrella_multi(n_aviones, aviones, mapa):
+# Desempate entre entradas de la lista abierta con el mismo f y g: por orden de inserción
+# (fifo) o la más reciente primero (lifo, que tiende a profundizar en la última rama)
+DESEMPATES = ["fifo", "lifo"]
+CERRADO = -1  # Valor de mejor_g para los estados ya expandidos
+
+class TiempoAgotado(Exception):
+    """
+    La búsqueda ha superado su limite_tiempo sin terminar.
+    """
+
+def a_estrella_multi(n_aviones, aviones, mapa, ordenacion_clasica=False, heuristica=None, estadisticas=None,
+                     desempate="fifo", peso=1, cota=None, limite_tiempo=None, admisible=False, compilado=None):
+    """
+    A* sobre el estado conjunto de todos los aviones.
+    La lista abierta es un montículo binario (heapq) ordenado por f y, con admisible=True
+    (la heurística no sobrestima el makespan, ver heuristicas.es_admisible), a igualdad de f
+    por mayor g. Con una heurística que sobrestima, preferir la mayor g lleva a planes peores,
+    así que entonces se desempata solo por orden de inserción, como la versión clásica.
+    Las entradas obsoletas se descartan al extraerlas (borrado perezoso) y la tabla mejor_g
+    evita insertar duplicados dominados.
+    Cada estado conjunto es un entero con la casilla de cada avión empaquetada (ver
+    empaquetar_estado): mejor_g (que también marca los nodos cerrados) y la prueba de objetivo
+    trabajan sobre ese entero y solo se desempaqueta al expandir el nodo y al reconstruir los caminos.
+    Los nodos se guardan en un pool de arrays (estado, g, padre, movimientos empaquetados)
+    y los caminos solo se reconstruyen al alcanzar el objetivo.
+    Con ordenacion_clasica=True se usa la lista ordenada original para comparar makespans.
+    desempate es uno de DESEMPATES.
+    Para la búsqueda acotada (ver busqueda_acotada):
+    - peso: A* ponderado, f = g + peso * h. Con h admisible el makespan es como mucho peso veces el óptimo.
+    - cota: descarta los nodos con g + h >= cota (solo se buscan soluciones mejores que cota).
+    - limite_tiempo: instante de time.monotonic() a partir del cual se lanza TiempoAgotado.
+    heuristica recibe las casillas (ids) de los aviones (ver heuristicas.crear_heuristica);
+    por defecto es la suma de distancias Manhattan, como heuristica_global.
+    Si se pasa estadisticas (ver estadisticas.crear_estadisticas) se acumulan en ellas los
+    nodos generados, expandidos y reabiertos, el máximo de la lista abierta y las
+    evaluaciones de la heurística.
+    """
+    if ordenacion_clasica:
+        return a_estrella_multi_clasica(n_aviones, aviones, mapa, estadisticas, compilado)
+
+    n = n_aviones
+    if compilado is None:
+        compilado = compilar_mapa(mapa)
+    vecinos, columnas = compilado["vecinos"], compilado["columnas"]
+    bits = bits_por_avion(compilado)
+    estado_inicial = empaquetar_estado([x * columnas + y for (x, y), _ in aviones], bits)
+    estado_objetivo = empaquetar_estado([x * columnas + y for _, (x, y) in aviones], bits)
+    if heuristica is None:
+        heuristica = crear_heuristica("manhattan", aviones, mapa)
+
+    def decodificar(estado):
+        return tuple(divmod(celda, columnas) for celda in desempaquetar_estado(estado, n, bits))
+
+    # Pool de nodos: el nodo k ocupa la posición k de cada array. Si el estado cabe en 64 bits
+    # se guarda en un array sin signo en lugar de una lista de enteros de Python.
+    nodo_estados = array('Q', [estado_inicial]) if n * bits <= 64 else [estado_inicial]
+    nodo_g = array('i', [0])
+    nodo_padre = array('i', [-1])
+    # Códigos de movimiento empaquetados, BITS_MOVIMIENTO por avión
+    nodo_movimientos = array('Q', [0]) if n * BITS_MOVIMIENTO <= 64 else [0]
+
+    # Cada nodo se inserta una sola vez y en orden de índice, así que el índice sirve de desempate
+    # estable entre entradas con mismo f y g (con signo negativo para lifo)
+    signo_orden = -1 if desempate == "lifo" else 1
+    signo_g = -1 if admisible else 0
+    open_heap = [(0, 0, 0)]  # (f, -g o 0, signo_orden * índice del nodo)
+    mejor_g = {estado_inicial: 0}  # Mejor g de cada estado, o CERRADO si ya se expandió
+    generados, expandidos, reabiertos, evaluaciones, max_abiertos = 1, 0, 0, 0, 1
+
+    try:
+        while open_heap:
+            if limite_tiempo is not None and time.monotonic() > limite_tiempo:
+                raise TiempoAgotado()
+            _, _, orden = heapq.heappop(open_heap)
+            indice = signo_orden * orden
+            estado = nodo_estados[indice]
+            g = nodo_g[indice]
+
+            # Borrado perezoso: entrada ya cerrada o mejorada después de insertarse
+            g_estado = mejor_g[estado]
+            if g_estado == CERRADO or g > g_estado:
+                continue
+            mejor_g[estado] = CERRADO
+            expandidos += 1
+
+            if estado == estado_objetivo:
+                return reconstruir_caminos(indice, n, nodo_estados, nodo_padre, nodo_movimientos, decodificar)
+
+            g_nuevo = g + 1
+            for nuevo_estado, codigos, nuevas_celdas in generar_sucesores(desempaquetar_estado(estado, n, bits),
+                                                                          vecinos, bits):
+                # Duplicado cerrado o dominado: no se inserta
+                g_anterior = mejor_g.get(nuevo_estado)
+                if g_anterior is not None and (g_anterior == CERRADO or g_nuevo >= g_anterior):
+                    continue
+                h = heuristica(nuevas_celdas)
+                evaluaciones += 1
+                if h == float('inf'):
+                    continue  # Algún avión ya no puede llegar a su objetivo
+                if cota is not None and g_nuevo + h >= cota:
+                    continue  # No puede mejorar la solución que ya se tiene
+                if g_anterior is not None:
+                    reabiertos += 1  # Mejora de un nodo que ya estaba en la lista abierta
+                mejor_g[nuevo_estado] = g_nuevo
+
+                nuevo_indice = len(nodo_estados)
+                nodo_estados.append(nuevo_estado)
+                nodo_g.append(g_nuevo)
+                nodo_padre.append(indice)
+                nodo_movimientos.append(codigos)
+
+                heapq.heappush(open_heap, (g_nuevo + peso * h, signo_g * g_nuevo, signo_orden * nuevo_indice))
+                generados += 1
+            max_abiertos = max(max_abiertos, len(open_heap))
+
+        return None
+    finally:
+        if estadisticas is not None:
+            estadisticas["nodos_generados"] += generados
+            estadisticas["nodos_expandidos"] += expandidos
+            estadisticas["nodos_reabiertos"] += reabiertos
+            estadisticas["evaluaciones_heuristica"] += evaluaciones
+            estadisticas["max_abiertos"] = max(estadisticas["max_abiertos"], max_abiertos)
+
+def reconstruir_caminos(indice, n_aviones, nodo_estados, nodo_padre, nodo_movimientos, decodificar):
+    """
+    Recorre los punteros al padre desde el nodo objetivo y construye el camino de cada avión
+    con el mismo formato que la versión clásica: [(x, y, movimiento), ...].
+    decodificar pasa un estado del pool a la tupla de posiciones (x, y) de los aviones.
+    """
+    cadena = []
+    while indice != -1:
+        cadena.append(indice)
+        indice = nodo_padre[indice]
+    cadena.reverse()
+
+    mascara = (1 << BITS_MOVIMIENTO) - 1
+    caminos = [[] for _ in range(n_aviones)]
+    for paso, indice in enumerate(cadena):
+        posiciones = decodificar(nodo_estados[indice])
+        codigos = nodo_movimientos[indice]
+        for i in range(n_aviones):
+            mov = MOVIMIENTOS[(codigos >> (BITS_MOVIMIENTO * i)) & mascara][2] if paso else ''
+            caminos[i].append((posiciones[i][0], posiciones[i][1], mov))
+    return caminos
+
+def a_estrella_multi_clasica(n_aviones, aviones, mapa, estadisticas=None, compilado=None):
+    """
+    Versión original con lista ordenada y pop(0). Se conserva como referencia.
+    """
     n = n_aviones
+    if compilado is None:
+        compilado = compilar_mapa(mapa)
     posiciones_iniciales = tuple(avion[0] for avion in aviones)
     objetivos = tuple(avion[1] for avion in aviones)
     
@@ -77,11 +332,14 @@ def a_estrella_multi(n_aviones, aviones, mapa):
         if posiciones in visited:
             continue
         visited.add(posiciones)
+        if estadisticas is not None:
+            estadisticas["nodos_expandidos"] += 1
+            estadisticas["max_abiertos"] = max(estadisticas["max_abiertos"], len(open_list) + 1)
 
         if posiciones == objetivos:
             return caminos
 
-        movimientos_aviones = generar_movimientos_validos(n_aviones, posiciones, mapa)
+        movimientos_aviones = generar_movimientos_validos(n_aviones, posiciones, mapa, compilado)
         combinaciones = product(*[movimientos_aviones[i] for i in range(n)])
         combinaciones_validas = [
             tuple((nx, ny) for nx, ny, _ in comb)
@@ -99,31 +357,330 @@ def a_estrella_multi(n_aviones, aviones, mapa):
             g_nuevo = g + 1
             h = heuristica_global(nuevas_posiciones, objetivos)
             open_list.append((g_nuevo + h, nuevas_posiciones, g_nuevo, nuevos_caminos))
+            if estadisticas is not None:
+                estadisticas["nodos_generados"] += 1
+                estadisticas["evaluaciones_heuristica"] += 1
     
     return None
 
 # =========================================
-# PROGRAMA PRINCIPAL
+# DESCOMPOSICIÓN DE OPERADORES E INDEPENDENCIA
 # =========================================
-try:
-    ruta = "mapa.csv"
-    n, aviones, mapa = leer_mapa(ruta)
-except Exception as e:
-    print(f"Error al leer el archivo: {e}")
-    exit()
-
-solucion = a_estrella_multi(n, aviones, mapa)
-
-if solucion:
-    print("Solución encontrada:")
-    for i, camino in enumerate(solucion):
-        pasos_con_movimientos = []
-        for paso in camino:
-            pos, mov = paso[:2], paso[2]
-            if mov:
-                pasos_con_movimientos.append(f"{mov} {pos}")
+def a_estrella_od(grupo, aviones, mapa, horizonte, distancias, reservas=None, evitar=None, limite_expansiones=None,
+                  compilado=None):
+    """
+    A* con descomposición de operadores: en cada capa solo se mueve un avión del grupo,
+    así un nodo genera como mucho 5 sucesores en lugar de 5^n.
+    Busca caminos que dejen a todos los aviones del grupo en su objetivo exactamente en
+    el instante horizonte, respetando las reglas de no_hay_cruces y, si se indica, una
+    tabla de reservas de otros aviones. Devuelve la lista de caminos o None (también si se
+    supera limite_expansiones).
+    Como todo camino válido tiene makespan horizonte, los nodos se ordenan por suma de costes
+    (g + suma de distancias restantes) y la poda por makespan usa casillas_viables.
+    evitar es una tabla de reservas blanda (la de los demás grupos): a igualdad de f se
+    prefieren los caminos que chocan menos con ella.
+    """
+    if compilado is None:
+        compilado = compilar_mapa(mapa)
+    n = len(grupo)
+    posiciones_iniciales = tuple(aviones[i][0] for i in grupo)
+    objetivos = tuple(aviones[i][1] for i in grupo)
+    dist = [distancias[i] for i in grupo]
+    vertices_reservados = reservas["vertices"] if reservas else set()
+    aristas_reservadas = reservas["aristas"] if reservas else set()
+    vertices_evitar = evitar["vertices"] if evitar else set()
+    aristas_evitar = evitar["aristas"] if evitar else set()
+
+    viables = [casillas_viables(objetivos[j], compilado, horizonte, dist[j], reservas) for j in range(n)]
+    if any(posiciones_iniciales[j] not in viables[j][0] for j in range(n)):
+        return None
+
+    # Pool de nodos estándar (todos los aviones en el mismo instante)
+    nodo_posiciones = [posiciones_iniciales]
+    nodo_padre = [-1]
+    nodo_movimientos = [()]
+
+    contador = count()
+    # (g + restante, choques, -g, orden, g, t, previas, nuevas, movimientos, índice del nodo estándar)
+    open_heap = [(0, 0, 0, next(contador), 0, 0, posiciones_iniciales, (), (), 0)]
+    cerrados = set()
+
+    while open_heap:
+        _, choques, _, _, g, t, previas, nuevas, movs, indice = heapq.heappop(open_heap)
+        clave = (t, previas, nuevas)
+        if clave in cerrados:
+            continue
+        cerrados.add(clave)
+        if limite_expansiones is not None and len(cerrados) > limite_expansiones:
+            return None
+
+        k = len(nuevas)
+        if k == 0 and t == horizonte:
+            if previas == objetivos:
+                return reconstruir_caminos_od(indice, nodo_posiciones, nodo_padre, nodo_movimientos)
+            continue
+
+        origen = previas[k]
+        for nx, ny, mov in movimientos_validos_avion(origen, compilado):
+            destino = (nx, ny)
+            # Mismas reglas que no_hay_cruces, aplicadas al avión de esta capa
+            if destino in nuevas:
+                continue
+            if any(previas[j] == destino and nuevas[j] == origen for j in range(k)):
+                continue
+            if (t + 1, destino) in vertices_reservados or (t, destino, origen) in aristas_reservadas:
+                continue
+            if destino not in viables[k][t + 1]:
+                continue
+
+            siguientes = nuevas + (destino,)
+            siguientes_movs = movs + (mov,)
+            restante = sum(dist[j][siguientes[j]] for j in range(k + 1))
+            restante += sum(dist[j][previas[j]] for j in range(k + 1, n))
+
+            # Esperar en el propio objetivo no cuesta: así los aviones con holgura no se dispersan
+            g_nuevo = g if origen == destino == objetivos[k] else g + 1
+            choques_nuevo = choques + ((t + 1, destino) in vertices_evitar) + ((t, destino, origen) in aristas_evitar)
+            if k + 1 == n:
+                if (t + 1, siguientes, ()) in cerrados:
+                    continue
+                nodo_posiciones.append(siguientes)
+                nodo_padre.append(indice)
+                nodo_movimientos.append(siguientes_movs)
+                heapq.heappush(open_heap, (g_nuevo + restante, choques_nuevo, -g_nuevo, next(contador), g_nuevo, t + 1, siguientes, (), (), len(nodo_posiciones) - 1))
             else:
-                pasos_con_movimientos.append(f"{pos}")
-        print(f"Avión {i + 1}: " + " ".join(pasos_con_movimientos))
-else:
-    print("No se encontró solución. Puede que las posiciones iniciales u obstáculos impidan el movimiento.")
+                heapq.heappush(open_heap, (g_nuevo + restante, choques_nuevo, -g_nuevo, next(contador), g_nuevo, t, previas, siguientes, siguientes_movs, indice))
+
+    return None
+
+def casillas_viables(objetivo, compilado, horizonte, distancias, reservas=None):
+    """
+    Propagación hacia atrás en el tiempo: viables[t] contiene las casillas desde las que un
+    avión aislado puede estar en su objetivo justo en el instante horizonte, respetando la
+    regla de no esperar en casillas 'A' y las reservas. Es una poda exacta para un solo avión.
+    """
+    vertices_reservados = reservas["vertices"] if reservas else set()
+    aristas_reservadas = reservas["aristas"] if reservas else set()
+
+    viables = [set() for _ in range(horizonte + 1)]
+    if (horizonte, objetivo) not in vertices_reservados:
+        viables[horizonte].add(objetivo)
+    for t in range(horizonte - 1, -1, -1):
+        siguientes = viables[t + 1]
+        if not siguientes:
+            break
+        for casilla, d in distancias.items():
+            if d > horizonte - t or (t > 0 and (t, casilla) in vertices_reservados):
+                continue
+            for nx, ny, _ in movimientos_validos_avion(casilla, compilado):
+                destino = (nx, ny)
+                if destino in siguientes and (t, destino, casilla) not in aristas_reservadas:
+                    viables[t].add(casilla)
+                    break
+    return viables
+
+def reconstruir_caminos_od(indice, nodo_posiciones, nodo_padre, nodo_movimientos):
+    cadena = []
+    while indice != -1:
+        cadena.append(indice)
+        indice = nodo_padre[indice]
+    cadena.reverse()
+
+    caminos = [[] for _ in nodo_posiciones[0]]
+    for indice in cadena:
+        movs = nodo_movimientos[indice] or ('',) * len(caminos)
+        for i, (x, y) in enumerate(nodo_posiciones[indice]):
+            caminos[i].append((x, y, movs[i]))
+    return caminos
+
+LIMITE_EXPANSIONES_ESQUIVA = 5000  # Esfuerzo máximo al intentar que un grupo esquive a otro antes de fusionarlos
+
+def deteccion_independencia(n_aviones, aviones, mapa, horizonte_max=None, compilado=None):
+    """
+    Detección de independencia sobre a_estrella_od.
+    Cada avión empieza en su propio grupo; cuando los caminos de dos grupos chocan se intenta
+    replanificar uno evitando al otro con el mismo makespan y, si no es posible (o resulta
+    demasiado costoso), se fusionan.
+    El makespan empieza en la mayor distancia individual y solo crece cuando un grupo no tiene
+    solución, por lo que el primero encontrado es óptimo.
+    horizonte_max acota la búsqueda en instancias sin solución (por defecto casillas libres x aviones).
+    """
+    objetivos = [avion[1] for avion in aviones]
+    if len(set(objetivos)) < n_aviones:
+        return None  # Dos aviones no pueden terminar en la misma casilla
+    distancias = [distancias_desde(objetivo, mapa) for objetivo in objetivos]
+    if any(avion[0] not in distancias[i] for i, avion in enumerate(aviones)):
+        return None
+    if compilado is None:
+        compilado = compilar_mapa(mapa)
+
+    if horizonte_max is None:
+        libres = sum(fila.count('A') + fila.count('B') for fila in mapa)
+        horizonte_max = libres * n_aviones
+    horizonte = max(distancias[i][avion[0]] for i, avion in enumerate(aviones))
+    grupos = [[i] for i in range(n_aviones)]
+
+    while horizonte <= horizonte_max:
+        caminos = [None] * n_aviones
+        fallido = False
+        for grupo in grupos:
+            evitar = reservas_de_caminos([camino for camino in caminos if camino is not None])
+            caminos_grupo = a_estrella_od(grupo, aviones, mapa, horizonte, distancias, evitar=evitar,
+                                          compilado=compilado)
+            if caminos_grupo is None:
+                fallido = True
+                break
+            for i, camino in zip(grupo, caminos_grupo):
+                caminos[i] = camino
+        if fallido:
+            horizonte += 1
+            continue
+
+        pares_probados = set()
+        while True:
+            conflicto = buscar_conflicto(caminos)
+            if conflicto is None:
+                return caminos
+            _, i, j, _, _ = conflicto
+            grupo_i = next(grupo for grupo in grupos if i in grupo)
+            grupo_j = next(grupo for grupo in grupos if j in grupo)
+
+            par = (min(grupo_i[0], grupo_j[0]), max(grupo_i[0], grupo_j[0]))
+            if par not in pares_probados:
+                pares_probados.add(par)
+                # Intentar que un grupo esquive al otro sin cambiar el makespan
+                replanificado = False
+                for mover, fijo in ((grupo_i, grupo_j), (grupo_j, grupo_i)):
+                    reservas = reservas_de_caminos([caminos[a] for a in fijo])
+                    evitar = reservas_de_caminos([caminos[a] for a in range(n_aviones) if a not in mover and a not in fijo])
+                    alternativa = a_estrella_od(mover, aviones, mapa, horizonte, distancias, reservas, evitar,
+                                                limite_expansiones=LIMITE_EXPANSIONES_ESQUIVA * len(mover),
+                                                compilado=compilado)
+                    if alternativa is not None:
+                        for a, camino in zip(mover, alternativa):
+                            caminos[a] = camino
+                        replanificado = True
+                        break
+                if replanificado:
+                    continue
+
+            # Fusionar los dos grupos y planificarlos juntos
+            grupos.remove(grupo_i)
+            grupos.remove(grupo_j)
+            fusion = sorted(grupo_i + grupo_j)
+            grupos.append(fusion)
+            evitar = reservas_de_caminos([caminos[a] for a in range(n_aviones) if a not in fusion])
+            caminos_grupo = a_estrella_od(fusion, aviones, mapa, horizonte, distancias, evitar=evitar,
+                                          compilado=compilado)
+            if caminos_grupo is None:
+                horizonte += 1
+                break
+            for a, camino in zip(fusion, caminos_grupo):
+                caminos[a] = camino
+
+    return None
+
+# =========================================
+# SALIDA DE RESULTADOS
+# =========================================
+def imprimir_solucion(solucion):
+    if solucion:
+        print("Solución encontrada:")
+        for i, camino in enumerate(solucion):
+            pasos_con_movimientos = []
+            for paso in camino:
+                pos, mov = paso[:2], paso[2]
+                if mov:
+                    pasos_con_movimientos.append(f"{mov} {pos}")
+                else:
+                    pasos_con_movimientos.append(f"{pos}")
+            print(f"Avión {i + 1}: " + " ".join(pasos_con_movimientos))
+    else:
+        print("No se encontró solución. Puede que las posiciones iniciales u obstáculos impidan el movimiento.")
+
+# =========================================
+# PROGRAMA PRINCIPAL
+# =========================================
+def main():
+    parser = argparse.ArgumentParser(description="Planificación de rodaje de aviones con A*")
+    parser.add_argument("ruta", nargs="?", default="mapa.csv", help="Fichero del mapa (por defecto mapa.csv)")
+    parser.add_argument("--solver", choices=["astar", "odid", "cbs", "anytime", "focal"], default="astar",
+                        help="astar: A* sobre el estado conjunto; odid: descomposición de operadores con "
+                             "detección de independencia; cbs: Conflict-Based Search; anytime: A* ponderado "
+                             "(o focal) con pesos decrecientes hasta --limite-tiempo; focal: búsqueda focal "
+                             "con subóptimo acotado por --peso")
+    parser.add_argument("--ordenacion-clasica", action="store_true",
+                        help="Usar la lista abierta ordenada original en lugar del montículo")
+    parser.add_argument("--sin-cache", action="store_true",
+                        help="Compilar el mapa sin leer ni escribir la caché en disco")
+    parser.add_argument("--heuristica", choices=HEURISTICAS, default="manhattan",
+                        help="Heurística de a_estrella_multi (por defecto manhattan)")
+    parser.add_argument("--agregacion", choices=AGREGACIONES, default="suma",
+                        help="suma: suma de costes; max: makespan (con manhattan y distancia es admisible "
+                             "para el makespan; congestion puede sobrestimarlo). anytime y focal usan siempre "
+                             "max y no admiten congestion, para que sus cotas sean válidas")
+    parser.add_argument("--desempate", choices=DESEMPATES, default="fifo",
+                        help="Desempate de a_estrella_multi entre nodos con mismo f y g (por defecto fifo)")
+    parser.add_argument("--peso", type=float, default=1.5,
+                        help="Factor de subóptimo de --solver focal (por defecto 1.5)")
+    parser.add_argument("--limite-tiempo", type=float,
+                        help="Segundos de --solver anytime; al agotarlos se devuelve la mejor solución encontrada")
+    parser.add_argument("--metodo", choices=["ponderado", "focal"], default="ponderado",
+                        help="Búsqueda de cada iteración de --solver anytime (por defecto ponderado)")
+    parser.add_argument("--perfil", action="store_true",
+                        help="Guardar un perfil de cProfile de la búsqueda en <mapa>.prof")
+    parser.add_argument("--memoria", action="store_true",
+                        help="Medir el pico de memoria de la búsqueda con tracemalloc")
+    args = parser.parse_args()
+    if args.solver in ("anytime", "focal") and not es_admisible(args.heuristica, "max"):
+        parser.error(f"--solver {args.solver} necesita una heurística admisible (manhattan o distancia)")
+
+    estadisticas = crear_estadisticas(args.solver)
+    try:
+        with fase(estadisticas, "lectura"):
+            n, aviones, mapa = leer_mapa(args.ruta)
+    except Exception as e:
+        print(f"Error al leer el archivo: {e}")
+        exit()
+
+    with fase(estadisticas, "modelo"):
+        compilado = compilar_mapa(mapa) if args.sin_cache else cargar_mapa_compilado(args.ruta, mapa)
+        agregacion = "max" if args.solver in ("anytime", "focal") else args.agregacion
+        heuristica = crear_heuristica(args.heuristica, aviones, mapa, agregacion)
+        admisible = es_admisible(args.heuristica, agregacion)
+
+    if args.solver == "odid":
+        solver = deteccion_independencia
+        opciones = {"compilado": compilado}
+    elif args.solver == "cbs":
+        from cbs import cbs
+        solver = cbs
+        opciones = {"compilado": compilado}
+    elif args.solver == "anytime":
+        from busqueda_acotada import resolver_anytime
+        solver = resolver_anytime
+        opciones = {"limite_segundos": args.limite_tiempo, "metodo": args.metodo, "heuristica": heuristica,
+                    "estadisticas": estadisticas, "compilado": compilado}
+    elif args.solver == "focal":
+        from busqueda_acotada import resolver_focal
+        solver = resolver_focal
+        opciones = {"peso": args.peso, "heuristica": heuristica, "estadisticas": estadisticas, "compilado": compilado}
+    else:
+        solver = a_estrella_multi
+        opciones = {"ordenacion_clasica": args.ordenacion_clasica, "heuristica": heuristica, "estadisticas": estadisticas,
+                    "desempate": args.desempate, "admisible": admisible, "compilado": compilado}
+
+    ruta_perfil = os.path.splitext(args.ruta)[0] + ".prof" if args.perfil else None
+    with fase(estadisticas, "busqueda"):
+        solucion, pico_memoria = ejecutar_perfilado(solver, n, aviones, mapa, ruta_perfil=ruta_perfil,
+                                                    memoria=args.memoria, **opciones)
+    if pico_memoria is not None:
+        estadisticas["memoria_pico_bytes"] = pico_memoria
+
+    with fase(estadisticas, "salida"):
+        imprimir_solucion(solucion)
+    estadisticas["makespan"] = len(solucion[0]) - 1 if solucion else None
+    guardar_estadisticas(estadisticas, args.ruta)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+import heapq
+from itertools import count
+
+from heuristicas import INALCANZABLE, tabla_distancias
+from mapa_compilado import MOVIMIENTOS, OBSTACULO, compilar_mapa
+
+FLECHAS = {(dx, dy): flecha for dx, dy, flecha in MOVIMIENTOS}
+
+# =========================================
+# TABLA DE RESERVAS ESPACIO-TIEMPO
+# =========================================
+class TablaReservas:
+    """
+    Casillas y aristas ocupadas por los caminos ya planificados, con ids de casilla:
+    - vertices[(t, celda)]: avión que ocupa la casilla en el instante t.
+    - aristas[(t, origen, destino)]: avión que va de origen a destino entre t y t+1.
+    Con las aristas se detectan los cruces que prohíbe no_hay_cruces (dos aviones que se
+    intercambian la casilla). Las reservas se indexan por instante para poder expirarlas
+    en bloque cuando el reloj las deja atrás; un montículo con los instantes indexados evita
+    recorrer los instantes vacíos cuando el reloj da un salto grande.
+    """
+
+    def __init__(self):
+        self.vertices = {}
+        self.aristas = {}
+        self._por_instante = {}  # t -> claves de vertices y aristas con ese instante
+        self._instantes = []  # Montículo con las t de _por_instante (puede tener t ya vaciadas)
+        self.primer_instante = 0  # Las reservas anteriores a este instante ya se han expirado
+        self.ultimo_instante = -1
+
+    def bloquea(self, t, origen, destino):
+        """
+        Si ir de origen a destino entre t y t+1 choca con alguna reserva.
+        """
+        return (t + 1, destino) in self.vertices or (t, destino, origen) in self.aristas
+
+    def reservar(self, avion, t0, celdas):
+        """
+        Reserva el camino de un avión que empieza en t0 (celdas por instante).
+        """
+        anterior = None
+        for t, celda in enumerate(celdas, t0):
+            self.vertices[(t, celda)] = avion
+            if t not in self._por_instante:
+                self._por_instante[t] = set()
+                heapq.heappush(self._instantes, t)
+            self._por_instante[t].add((t, celda))
+            if anterior is not None:
+                self.aristas[(t - 1, anterior, celda)] = avion
+                self._por_instante[t - 1].add((t - 1, anterior, celda))
+            anterior = celda
+        self.ultimo_instante = max(self.ultimo_instante, t0 + len(celdas) - 1)
+
+    def liberar(self, avion, t0, celdas):
+        anterior = None
+        for t, celda in enumerate(celdas, t0):
+            if self.vertices.get((t, celda)) == avion:
+                del self.vertices[(t, celda)]
+                self._desindexar((t, celda))
+            if anterior is not None and self.aristas.get((t - 1, anterior, celda)) == avion:
+                del self.aristas[(t - 1, anterior, celda)]
+                self._desindexar((t - 1, anterior, celda))
+            anterior = celda
+
+    def _desindexar(self, clave):
+        claves = self._por_instante.get(clave[0])
+        if claves is not None:
+            claves.discard(clave)
+            if not claves:
+                del self._por_instante[clave[0]]
+
+    def expirar(self, t):
+        """
+        Elimina las reservas de los instantes anteriores a t.
+        """
+        while self._instantes and self._instantes[0] < t:
+            instante = heapq.heappop(self._instantes)
+            for clave in self._por_instante.pop(instante, ()):
+                if len(clave) == 2:
+                    self.vertices.pop(clave, None)
+                else:
+                    self.aristas.pop(clave, None)
+        self.primer_instante = max(self.primer_instante, t)
+
+    def __len__(self):
+        return len(self.vertices) + len(self.aristas)
+
+# =========================================
+# A* DE UN AVIÓN EN ESPACIO-TIEMPO
+# =========================================
+def a_estrella_espacio_tiempo(inicio, objetivo, t0, compilado, distancias, reservas, limite):
+    """
+    A* de un solo avión sobre estados (casilla, instante) que evita las reservas. Todos los
+    movimientos (también esperar) cuestan 1, así que g = t - t0 y la distancia real al
+    objetivo (distancias, tabla plana de tabla_distancias) es admisible. No se pasa de limite.
+    Devuelve las celdas del camino desde t0 hasta la llegada al objetivo, o None.
+    """
+    vecinos = compilado["vecinos"]
+    if distancias[inicio] == INALCANZABLE or (t0, inicio) in reservas.vertices:
+        return None
+
+    contador = count()
+    open_heap = [(distancias[inicio], next(contador), inicio, t0)]
+    padres = {(inicio, t0): None}
+    while open_heap:
+        _, _, celda, t = heapq.heappop(open_heap)
+        if celda == objetivo:
+            celdas = []
+            estado = (celda, t)
+            while estado is not None:
+                celdas.append(estado[0])
+                estado = padres[estado]
+            celdas.reverse()
+            return celdas
+        if t >= limite:
+            continue
+        for destino, _ in vecinos[celda]:
+            d = distancias[destino]
+            # Como g depende solo de t, la primera vez que se genera un estado ya es con su mejor g
+            if d == INALCANZABLE or (destino, t + 1) in padres or reservas.bloquea(t, celda, destino):
+                continue
+            padres[(destino, t + 1)] = (celda, t)
+            heapq.heappush(open_heap, (t + 1 - t0 + d, next(contador), destino, t + 1))
+    return None
+
+# =========================================
+# PLANIFICADOR POR PRIORIDADES
+# =========================================
+class PlanificadorPriorizado:
+    """
+    Planificación por prioridades para aviones que piden autorización de rodaje de uno en
+    uno: cada avión se planifica solo con a_estrella_espacio_tiempo contra la tabla de
+    reservas de los anteriores, que no se replanifican (la prioridad es el orden de llegada).
+    Un avión aparece en su casilla inicial en el instante de la petición y, al llegar a su
+    objetivo, despega y deja la casilla libre. Al avanzar el reloj se expiran las reservas
+    pasadas y se olvidan los aviones que ya han despegado.
+    """
+
+    def __init__(self, mapa):
+        self.mapa = mapa
+        self.compilado = compilar_mapa(mapa)
+        self.reservas = TablaReservas()
+        self.reloj = 0
+        self.planes = {}  # avión -> (t0, celdas), solo los que aún no han despegado
+        self._distancias = {}  # Tabla de distancias por objetivo (las pistas se repiten mucho)
+        self._libres = sum(tipo != OBSTACULO for tipo in self.compilado["celdas"])
+
+    def avanzar(self, t):
+        """
+        Mueve el reloj a t, expira las reservas anteriores y olvida los aviones que ya han despegado.
+        """
+        self.reloj = max(self.reloj, t)
+        self.reservas.expirar(self.reloj)
+        for avion in [avion for avion, (t0, celdas) in self.planes.items() if t0 + len(celdas) <= self.reloj]:
+            del self.planes[avion]
+
+    def solicitar(self, avion, inicio, objetivo, t=None):
+        """
+        Planifica y reserva el rodaje de avion de inicio a objetivo. Sale en el instante t, al
+        que se avanza el reloj, o en el instante actual si no se indica. Devuelve el camino con
+        el formato de a_estrella_multi desde la salida, o None si no hay camino compatible con
+        las reservas (por ejemplo, si otro avión ocupa la casilla inicial en ese instante).
+        """
+        if avion in self.planes:
+            raise ValueError(f"El avión {avion} ya tiene un rodaje planificado")
+        if t is not None:
+            self.avanzar(t)
+        t0 = self.reloj
+        columnas = self.compilado["columnas"]
+        if objetivo not in self._distancias:
+            self._distancias[objetivo] = tabla_distancias(objetivo, self.mapa)
+        # Pasadas todas las reservas el camino ya no se cruza con nadie: esto acota la búsqueda
+        limite = max(t0, self.reservas.ultimo_instante) + self._libres
+        celdas = a_estrella_espacio_tiempo(inicio[0] * columnas + inicio[1], objetivo[0] * columnas + objetivo[1], t0,
+                                           self.compilado, self._distancias[objetivo], self.reservas, limite)
+        if celdas is None:
+            return None
+        self.reservas.reservar(avion, t0, celdas)
+        self.planes[avion] = (t0, celdas)
+        return self.camino(avion)
+
+    def cancelar(self, avion):
+        """
+        Anula el rodaje de un avión y libera sus reservas.
+        """
+        t0, celdas = self.planes.pop(avion)
+        self.reservas.liberar(avion, t0, celdas)
+
+    def camino(self, avion):
+        """
+        Camino planificado de un avión: lista de (fila, columna, movimiento) desde su instante de salida.
+        """
+        _, celdas = self.planes[avion]
+        columnas = self.compilado["columnas"]
+        camino = []
+        for anterior, celda in zip([None] + celdas, celdas):
+            x, y = divmod(celda, columnas)
+            if anterior is None:
+                camino.append((x, y, ''))
+            else:
+                ax, ay = divmod(anterior, columnas)
+                camino.append((x, y, FLECHAS[(x - ax, y - ay)]))
+        return camino
@@ -0,0 +1,277 @@
+import argparse
+import glob
+import multiprocessing
+import os
+import time
+from collections import deque
+from multiprocessing.connection import wait
+
+try:
+    import resource  # Solo en sistemas POSIX; sin él no se aplica el límite de memoria
+except ImportError:
+    resource = None
+
+import parte_2
+from estadisticas import crear_estadisticas, fase, guardar_estadisticas
+from heuristicas import AGREGACIONES, HEURISTICAS, INALCANZABLE, crear_heuristica, es_admisible, tabla_distancias
+from mapa_compilado import cargar_mapa_compilado
+
+# Estados con los que termina una tarea
+COMPLETADA = "completada"
+TIEMPO_AGOTADO = "tiempo_agotado"
+MEMORIA_AGOTADA = "memoria_agotada"
+ERROR = "error"
+CANCELADA = "cancelada"
+
+# Configuraciones de a_estrella_multi que compiten en el portafolio. Con agregación max,
+# manhattan y distancia son admisibles para el makespan, así que su primera solución es óptima;
+# las demás suelen ser más rápidas pero solo garantizan el óptimo si alcanzan la cota inferior.
+CONFIGURACIONES = [
+    {"heuristica": "distancia", "agregacion": "max", "desempate": "fifo"},
+    {"heuristica": "distancia", "agregacion": "max", "desempate": "lifo"},
+    {"heuristica": "manhattan", "agregacion": "max", "desempate": "fifo"},
+    {"heuristica": "congestion", "agregacion": "suma", "desempate": "fifo"},
+    {"heuristica": "distancia", "agregacion": "suma", "desempate": "lifo"},
+]
+
+# =========================================
+# PLANIFICADOR DE PROCESOS
+# =========================================
+def _ejecutar_tarea(conexion, funcion, args, limite_memoria):
+    """
+    Cuerpo de cada proceso: aplica el límite de memoria, ejecuta funcion(*args) y envía
+    (estado, resultado) por la conexión.
+    """
+    if limite_memoria is not None and resource is not None:
+        _, duro = resource.getrlimit(resource.RLIMIT_AS)
+        if duro != resource.RLIM_INFINITY:
+            limite_memoria = min(limite_memoria, duro)
+        resource.setrlimit(resource.RLIMIT_AS, (limite_memoria, duro))
+    try:
+        conexion.send((COMPLETADA, funcion(*args)))
+    except MemoryError:
+        conexion.send((MEMORIA_AGOTADA, None))
+    except Exception as e:
+        conexion.send((ERROR, repr(e)))
+    finally:
+        conexion.close()
+
+def _terminar(proceso):
+    if proceso.is_alive():
+        proceso.terminate()
+        proceso.join(1)
+        if proceso.is_alive():
+            proceso.kill()
+    proceso.join()
+
+def ejecutar_tareas(tareas, procesos, timeout=None, limite_memoria=None, parar=None):
+    """
+    Ejecuta las tareas (clave, funcion, args) cada una en su propio proceso, como mucho procesos
+    a la vez, y genera (clave, estado, resultado, segundos) según van terminando.
+    - timeout: segundos tras los que se mata la tarea (estado TIEMPO_AGOTADO).
+    - limite_memoria: bytes de espacio de direcciones por proceso (estado MEMORIA_AGOTADA).
+    - parar(clave, estado, resultado): si devuelve True se matan las tareas en curso y estas
+      y las pendientes se generan como CANCELADA.
+    funcion y args se envían al proceso, así que deben poder serializarse con pickle.
+    """
+    pendientes = deque(tareas)
+    en_curso = {}  # conexión -> (clave, proceso, inicio)
+    try:
+        while pendientes or en_curso:
+            while pendientes and len(en_curso) < procesos:
+                clave, funcion, args = pendientes.popleft()
+                receptor, emisor = multiprocessing.Pipe(duplex=False)
+                proceso = multiprocessing.Process(target=_ejecutar_tarea, args=(emisor, funcion, args, limite_memoria),
+                                                  daemon=True)
+                proceso.start()
+                emisor.close()
+                en_curso[receptor] = (clave, proceso, time.monotonic())
+
+            espera = None
+            if timeout is not None:
+                primer_inicio = min(inicio for _, _, inicio in en_curso.values())
+                espera = max(0.0, primer_inicio + timeout - time.monotonic())
+            listos = wait(list(en_curso), espera)
+
+            ahora = time.monotonic()
+            for receptor in list(en_curso):
+                clave, proceso, inicio = en_curso[receptor]
+                if receptor in listos:
+                    try:
+                        estado, resultado = receptor.recv()
+                    except EOFError:
+                        # El proceso murió sin responder (p. ej. lo mató el sistema por memoria)
+                        proceso.join()
+                        estado, resultado = ERROR, f"el proceso terminó con código {proceso.exitcode}"
+                elif timeout is not None and ahora - inicio >= timeout:
+                    estado, resultado = TIEMPO_AGOTADO, None
+                else:
+                    continue
+                del en_curso[receptor]
+                _terminar(proceso)
+                receptor.close()
+                yield clave, estado, resultado, ahora - inicio
+
+                if parar is not None and parar(clave, estado, resultado):
+                    for receptor_cancelado, (clave_cancelada, proceso_cancelado, inicio) in list(en_curso.items()):
+                        del en_curso[receptor_cancelado]
+                        _terminar(proceso_cancelado)
+                        receptor_cancelado.close()
+                        yield clave_cancelada, CANCELADA, None, time.monotonic() - inicio
+                    while pendientes:
+                        yield pendientes.popleft()[0], CANCELADA, None, 0.0
+                    return
+    finally:
+        for receptor, (_, proceso, _) in en_curso.items():
+            _terminar(proceso)
+            receptor.close()
+
+# =========================================
+# PORTAFOLIO DE CONFIGURACIONES DE A*
+# =========================================
+def configuracion_admisible(configuracion):
+    return es_admisible(configuracion["heuristica"], configuracion["agregacion"])
+
+def cota_makespan(aviones, mapa):
+    """
+    Cota inferior del makespan: la mayor distancia real de un avión a su objetivo.
+    Devuelve None si algún avión no puede llegar a su objetivo.
+    """
+    columnas = len(mapa[0])
+    cota = 0
+    for (x, y), objetivo in aviones:
+        d = tabla_distancias(objetivo, mapa)[x * columnas + y]
+        if d == INALCANZABLE:
+            return None
+        cota = max(cota, d)
+    return cota
+
+def resolver_configuracion(n, aviones, mapa, configuracion, compilado=None):
+    """
+    Ejecuta a_estrella_multi con una configuración del portafolio. Devuelve (solución, estadísticas).
+    """
+    estadisticas = crear_estadisticas("astar")
+    with fase(estadisticas, "modelo"):
+        heuristica = crear_heuristica(configuracion["heuristica"], aviones, mapa, configuracion["agregacion"])
+    with fase(estadisticas, "busqueda"):
+        solucion = parte_2.a_estrella_multi(n, aviones, mapa, heuristica=heuristica, estadisticas=estadisticas,
+                                            desempate=configuracion["desempate"],
+                                            admisible=configuracion_admisible(configuracion), compilado=compilado)
+    estadisticas["makespan"] = len(solucion[0]) - 1 if solucion else None
+    return solucion, estadisticas
+
+def portafolio(n, aviones, mapa, configuraciones=CONFIGURACIONES, procesos=None, timeout=None, limite_memoria=None,
+               compilado=None):
+    """
+    Lanza a la vez una búsqueda por configuración y se queda con la primera que demuestra el
+    óptimo: la de una configuración admisible, la que alcanza cota_makespan o cualquiera que
+    termine sin solución (A* es completo con cualquier heurística). Las demás se cancelan.
+    Si ninguna lo demuestra se devuelve la de menor makespan con optimo=False.
+    Devuelve un diccionario con solucion, makespan, configuracion, optimo, estadisticas (las de
+    la configuración ganadora) y resultados (estado de cada configuración).
+    """
+    cota = cota_makespan(aviones, mapa)
+    mejor = {"solucion": None, "makespan": None, "configuracion": None, "optimo": cota is None,
+             "estadisticas": None, "resultados": []}
+    if cota is None:
+        return mejor
+
+    def demostrado(indice, estado, resultado):
+        if estado != COMPLETADA:
+            return False
+        solucion, _ = resultado
+        return solucion is None or configuracion_admisible(configuraciones[indice]) or len(solucion[0]) - 1 == cota
+
+    tareas = [(i, resolver_configuracion, (n, aviones, mapa, configuracion, compilado))
+              for i, configuracion in enumerate(configuraciones)]
+    for i, estado, resultado, segundos in ejecutar_tareas(tareas, procesos or len(configuraciones), timeout,
+                                                           limite_memoria, parar=demostrado):
+        makespan = None
+        if estado == COMPLETADA:
+            solucion, estadisticas = resultado
+            makespan = estadisticas["makespan"]
+            final = demostrado(i, estado, resultado)
+            if final or (solucion is not None and (mejor["makespan"] is None or makespan < mejor["makespan"])):
+                mejor.update(solucion=solucion, makespan=makespan, configuracion=configuraciones[i], optimo=final,
+                             estadisticas=estadisticas)
+        mejor["resultados"].append({"configuracion": configuraciones[i], "estado": estado, "makespan": makespan,
+                                    "segundos": round(segundos, 3)})
+    return mejor
+
+# =========================================
+# MODO LOTE
+# =========================================
+def resolver_mapa(ruta, configuracion, usar_cache=True):
+    n, aviones, mapa = parte_2.leer_mapa(ruta)
+    compilado = cargar_mapa_compilado(ruta, mapa) if usar_cache else None
+    return resolver_configuracion(n, aviones, mapa, configuracion, compilado)
+
+def resolver_directorio(directorio, configuracion, procesos, timeout=None, limite_memoria=None, patron="*.csv",
+                        usar_cache=True):
+    """
+    Resuelve en paralelo todos los mapas del directorio que encajan con patron, cada uno en su
+    proceso con su límite de tiempo y de memoria, y guarda un .stat junto a cada mapa.
+    Genera (ruta, estado, makespan, segundos) según van terminando.
+    """
+    rutas = sorted(glob.glob(os.path.join(directorio, patron)))
+    tareas = [(ruta, resolver_mapa, (ruta, configuracion, usar_cache)) for ruta in rutas]
+    for ruta, estado, resultado, segundos in ejecutar_tareas(tareas, procesos, timeout, limite_memoria):
+        if estado == COMPLETADA:
+            _, estadisticas = resultado
+        else:
+            estadisticas = crear_estadisticas("astar")
+            estadisticas["makespan"] = None
+            if estado == ERROR:
+                estadisticas["error"] = resultado
+        estadisticas["estado"] = estado
+        estadisticas["configuracion"] = configuracion
+        guardar_estadisticas(estadisticas, ruta)
+        yield ruta, estado, estadisticas["makespan"], segundos
+
+# =========================================
+# PROGRAMA PRINCIPAL
+# =========================================
+def main():
+    parser = argparse.ArgumentParser(
+        description="Portafolio de configuraciones de A* para un mapa, o resolución en lote de un directorio de mapas")
+    parser.add_argument("ruta", help="Fichero del mapa (portafolio) o directorio de mapas (lote)")
+    parser.add_argument("--procesos", type=int,
+                        help="Procesos simultáneos (por defecto uno por configuración en el portafolio y uno por "
+                             "CPU en el modo lote)")
+    parser.add_argument("--timeout", type=float, help="Segundos máximos por búsqueda")
+    parser.add_argument("--limite-memoria", type=int, help="MB máximos de memoria por proceso (solo POSIX)")
+    parser.add_argument("--patron", default="*.csv", help="Patrón de los mapas del directorio (por defecto *.csv)")
+    parser.add_argument("--sin-cache", action="store_true", help="Compilar los mapas sin usar la caché en disco")
+    parser.add_argument("--heuristica", choices=HEURISTICAS, default="distancia", help="Heurística del modo lote")
+    parser.add_argument("--agregacion", choices=AGREGACIONES, default="max", help="Agregación del modo lote")
+    parser.add_argument("--desempate", choices=parte_2.DESEMPATES, default="fifo", help="Desempate del modo lote")
+    args = parser.parse_args()
+    limite_memoria = args.limite_memoria * 1024 * 1024 if args.limite_memoria else None
+
+    if os.path.isdir(args.ruta):
+        configuracion = {"heuristica": args.heuristica, "agregacion": args.agregacion, "desempate": args.desempate}
+        lote = resolver_directorio(args.ruta, configuracion, args.procesos or os.cpu_count(), args.timeout,
+                                   limite_memoria, args.patron, not args.sin_cache)
+        for ruta, estado, makespan, segundos in lote:
+            print(f"{os.path.basename(ruta)}: {estado}, makespan {makespan}, {segundos:.2f} s")
+        return
+
+    n, aviones, mapa = parte_2.leer_mapa(args.ruta)
+    compilado = None if args.sin_cache else cargar_mapa_compilado(args.ruta, mapa)
+    resultado = portafolio(n, aviones, mapa, procesos=args.procesos, timeout=args.timeout,
+                           limite_memoria=limite_memoria, compilado=compilado)
+    parte_2.imprimir_solucion(resultado["solucion"])
+    for entrada in resultado["resultados"]:
+        print(f"{entrada['configuracion']}: {entrada['estado']}, makespan {entrada['makespan']}, "
+              f"{entrada['segundos']:.2f} s")
+    print(f"Makespan: {resultado['makespan']} ({'óptimo' if resultado['optimo'] else 'sin demostrar óptimo'})")
+
+    estadisticas = resultado["estadisticas"] or crear_estadisticas("portafolio")
+    estadisticas["solver"] = "portafolio"
+    estadisticas["configuracion"] = resultado["configuracion"]
+    estadisticas["optimo"] = resultado["optimo"]
+    estadisticas["portafolio"] = resultado["resultados"]
+    guardar_estadisticas(estadisticas, args.ruta)
+
+if __name__ == "__main__":
+    main()
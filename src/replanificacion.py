@@ -0,0 +1,231 @@
+import heapq
+import time
+
+from mapa_compilado import MOVIMIENTOS, actualizar_casilla, compilar_mapa
+from parte_2 import (LIMITE_EXPANSIONES_ESQUIVA, a_estrella_od, deteccion_independencia, distancias_desde,
+                     reservas_de_caminos)
+
+HOLGURA_REPARACION = 3  # Makespans por encima del mínimo que se prueban al reparar antes de replanificar todo
+
+# =========================================
+# REPARACIÓN INCREMENTAL DE DISTANCIAS
+# =========================================
+def actualizar_distancias(distancias, objetivo, mapa, casillas):
+    """
+    Repara en el sitio la tabla casilla -> distancia al objetivo (la de distancias_desde) tras
+    cambiar las casillas indicadas entre transitables y obstáculos, al estilo de Lifelong
+    Planning A*: rhs(c) es la distancia que dan las vecinas, y solo se procesan, por orden de
+    distancia, las casillas en las que rhs y la distancia guardada no coinciden.
+    Devuelve cuántas casillas se han procesado.
+    """
+    filas, columnas = len(mapa), len(mapa[0])
+    infinito = float('inf')
+
+    def transitable(casilla):
+        return mapa[casilla[0]][casilla[1]] in ('A', 'B')
+
+    def vecinas(casilla):
+        x, y = casilla
+        for dx, dy, movimiento in MOVIMIENTOS:
+            nx, ny = x + dx, y + dy
+            if movimiento != 'w' and 0 <= nx < filas and 0 <= ny < columnas:
+                yield nx, ny
+
+    def rhs(casilla):
+        if not transitable(casilla):
+            return infinito
+        if casilla == objetivo:
+            return 0
+        return min((distancias.get(vecina, infinito) + 1 for vecina in vecinas(casilla) if transitable(vecina)),
+                   default=infinito)
+
+    cola = []
+
+    def encolar_si_inconsistente(casilla):
+        g, r = distancias.get(casilla, infinito), rhs(casilla)
+        if g != r:
+            heapq.heappush(cola, (min(g, r), casilla))
+
+    for casilla in casillas:
+        encolar_si_inconsistente(casilla)
+        for vecina in vecinas(casilla):
+            encolar_si_inconsistente(vecina)
+
+    procesadas = 0
+    while cola:
+        clave, casilla = heapq.heappop(cola)
+        g, r = distancias.get(casilla, infinito), rhs(casilla)
+        if g == r:
+            continue
+        if clave != min(g, r):
+            heapq.heappush(cola, (min(g, r), casilla))  # Entrada obsoleta: se reinserta con su clave actual
+            continue
+        procesadas += 1
+        if g > r:
+            # La casilla se ha acercado: se fija su distancia y se propaga a las vecinas
+            distancias[casilla] = r
+        else:
+            # La casilla se ha alejado (o ya no llega): se invalida y se recalcula desde las vecinas
+            del distancias[casilla]
+            encolar_si_inconsistente(casilla)
+        for vecina in vecinas(casilla):
+            encolar_si_inconsistente(vecina)
+    return procesadas
+
+# =========================================
+# PLANIFICADOR INCREMENTAL
+# =========================================
+def llegada(camino, objetivo):
+    """
+    Primer instante a partir del cual el avión ya no sale de su objetivo.
+    """
+    t = len(camino) - 1
+    while t > 0 and camino[t - 1][:2] == objetivo:
+        t -= 1
+    return t
+
+def ajustar_horizonte(camino, objetivo, horizonte, mapa):
+    """
+    Recorta o alarga el camino esperando en el objetivo para que termine en el instante
+    horizonte. Devuelve None si hay que alargarlo y en el objetivo no se puede esperar ('A').
+    """
+    fin = llegada(camino, objetivo)
+    if fin > horizonte:
+        return None
+    ajustado = camino[:fin + 1]
+    if len(ajustado) < horizonte + 1 and mapa[objetivo[0]][objetivo[1]] == 'A':
+        return None
+    return ajustado + [(objetivo[0], objetivo[1], 'w')] * (horizonte + 1 - len(ajustado))
+
+class Planificador:
+    """
+    Planificador de rodaje de larga duración. Guarda el mapa compilado, las tablas de
+    distancias de cada avión y el último plan, y admite cambios (añadir o quitar aviones,
+    cambiar un objetivo, bloquear o desbloquear casillas) que se acumulan hasta llamar a
+    planificar. Este repara el plan replanificando solo los aviones afectados contra los
+    caminos del resto, y si la reparación falla vuelve a planificar desde cero con
+    deteccion_independencia. Los aviones se identifican por su índice en aviones, que se
+    desplaza al quitar uno. El plan reparado es válido pero no siempre de makespan óptimo.
+    """
+
+    def __init__(self, n_aviones, aviones, mapa):
+        self.mapa = [list(fila) for fila in mapa]
+        self.compilado = compilar_mapa(self.mapa)
+        self.aviones = list(aviones[:n_aviones])
+        self.distancias = [distancias_desde(objetivo, self.mapa) for _, objetivo in self.aviones]
+        self.caminos = None
+        self.afectados = set(range(len(self.aviones)))
+        self.historial = []  # Una entrada por llamada a planificar
+
+    @property
+    def n_aviones(self):
+        return len(self.aviones)
+
+    # ---- Cambios ----
+    def anadir_avion(self, inicio, objetivo):
+        """
+        Añade un avión y devuelve su índice.
+        """
+        self.aviones.append((inicio, objetivo))
+        self.distancias.append(distancias_desde(objetivo, self.mapa))
+        if self.caminos is not None:
+            self.caminos.append(None)
+        self.afectados.add(len(self.aviones) - 1)
+        return len(self.aviones) - 1
+
+    def quitar_avion(self, i):
+        del self.aviones[i]
+        del self.distancias[i]
+        if self.caminos is not None:
+            del self.caminos[i]
+        self.afectados = {j - (j > i) for j in self.afectados if j != i}
+
+    def cambiar_objetivo(self, i, objetivo):
+        self.aviones[i] = (self.aviones[i][0], objetivo)
+        self.distancias[i] = distancias_desde(objetivo, self.mapa)
+        self.afectados.add(i)
+
+    def bloquear(self, casilla):
+        """
+        Convierte la casilla en obstáculo ('G'). Quedan afectados los aviones que pasaban por ella.
+        """
+        self._cambiar_casilla(casilla, 'G')
+        if self.caminos is not None:
+            for i, camino in enumerate(self.caminos):
+                if camino is not None and any(paso[:2] == casilla for paso in camino):
+                    self.afectados.add(i)
+
+    def desbloquear(self, casilla, tipo='B'):
+        """
+        Vuelve a hacer transitable la casilla. El plan actual sigue siendo válido.
+        """
+        self._cambiar_casilla(casilla, tipo)
+
+    def _cambiar_casilla(self, casilla, tipo):
+        x, y = casilla
+        self.mapa[x][y] = tipo
+        actualizar_casilla(self.compilado, self.mapa, x, y)
+        for (_, objetivo), distancias in zip(self.aviones, self.distancias):
+            actualizar_distancias(distancias, objetivo, self.mapa, [casilla])
+
+    # ---- Planificación ----
+    def planificar(self):
+        """
+        Aplica los cambios pendientes y devuelve el plan (caminos con el formato de
+        a_estrella_multi) o None si no hay solución. Añade a historial el modo usado
+        ('reparacion' o 'completa'), los aviones replanificados, el makespan y los segundos.
+        """
+        inicio = time.perf_counter()
+        replanificados = len(self.afectados)
+        caminos = self._reparar() if self.caminos is not None else None
+        modo = "reparacion"
+        if caminos is None:
+            modo = "completa"
+            replanificados = self.n_aviones
+            caminos = deteccion_independencia(self.n_aviones, self.aviones, self.mapa,
+                                              compilado=self.compilado) if self.aviones else []
+        self.caminos = [list(camino) for camino in caminos] if caminos is not None else None
+        self.afectados = set() if caminos is not None else set(range(self.n_aviones))
+        self.historial.append({
+            "modo": modo,
+            "replanificados": replanificados,
+            "makespan": len(caminos[0]) - 1 if caminos else None,
+            "segundos": time.perf_counter() - inicio,
+        })
+        return self.caminos
+
+    def _reparar(self):
+        """
+        Replanifica los aviones afectados con a_estrella_od usando los caminos del resto como
+        reservas, desde el menor makespan posible y con HOLGURA_REPARACION de margen.
+        Devuelve los caminos o None si no lo consigue.
+        """
+        if not self.aviones:
+            return []
+        grupo = sorted(self.afectados)
+        fijos = [i for i in range(self.n_aviones) if i not in self.afectados]
+        if any(self.aviones[i][0] not in self.distancias[i] for i in grupo):
+            return None
+        minimo = max([llegada(self.caminos[i], self.aviones[i][1]) for i in fijos] +
+                     [self.distancias[i][self.aviones[i][0]] for i in grupo])
+
+        for horizonte in range(minimo, minimo + HOLGURA_REPARACION + 1):
+            caminos = [None] * self.n_aviones
+            grupo_horizonte = list(grupo)
+            for i in fijos:
+                caminos[i] = ajustar_horizonte(self.caminos[i], self.aviones[i][1], horizonte, self.mapa)
+                if caminos[i] is None:
+                    grupo_horizonte.append(i)  # No puede esperar en su objetivo: también se replanifica
+            grupo_horizonte.sort()
+            if not grupo_horizonte:
+                return caminos
+
+            reservas = reservas_de_caminos([camino for camino in caminos if camino is not None])
+            nuevos = a_estrella_od(grupo_horizonte, self.aviones, self.mapa, horizonte, self.distancias, reservas,
+                                   limite_expansiones=LIMITE_EXPANSIONES_ESQUIVA * len(grupo_horizonte),
+                                   compilado=self.compilado)
+            if nuevos is not None:
+                for i, camino in zip(grupo_horizonte, nuevos):
+                    caminos[i] = camino
+                return caminos
+        return None
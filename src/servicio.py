@@ -0,0 +1,457 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import CSPMaintenance
+import main as csp_main
+import parte_2
+from busqueda_acotada import a_estrella_anytime, resolver_focal
+from cbs import cbs
+from csp_bitset import MOTORES
+from csp_compilado import CLASES, compilar_instancia
+from heuristicas import AGREGACIONES, HEURISTICAS, crear_heuristica, es_admisible
+from mapa_compilado import compilar_mapa
+from optimizacion import OBJETIVOS, optimizar
+from portafolio import COMPLETADA, ERROR, TIEMPO_AGOTADO
+from soluciones import iterar_soluciones
+
+TAMANO_CACHE = 16  # Instancias que mantiene en memoria cada proceso trabajador
+TIEMPO_LIMITE = 60.0  # Segundos por petición si no indica tiempo_limite
+MARGEN_CANCELACION = 0.5  # Segundos que se deja al trabajador para parar solo antes de matarlo
+MAX_SOLUCIONES = 1  # Soluciones de mantenimiento por petición si no indica max_soluciones
+LIMITE_LINEA = 16 * 1024 * 1024  # Tamaño máximo de una petición (los datos pueden ir en línea)
+
+TIPOS = ("mantenimiento", "rodaje", "estado")
+SOLVERS_RODAJE = ("odid", "cbs", "astar", "anytime", "focal")
+# Nombre de las variables de cada modelo de mantenimiento (el programa del que sale define_problem)
+NOMBRES_VARIABLE = {
+    "CSPMaintenance": lambda avion, franja: f"{franja+1}-{avion['ID']}",
+    "main": lambda avion, franja: f"{avion['ID']}-{franja}",
+}
+
+# Protocolo: cada línea que llega por la conexión es una petición JSON y cada línea que se
+# devuelve es un mensaje JSON con el "id" de su petición. Las peticiones de una conexión se
+# resuelven a la vez, así que sus mensajes pueden llegar intercalados. Cada solución se envía
+# en cuanto se encuentra ({"solucion": ...}) y la petición termina con un mensaje con "estado"
+# (completada, tiempo_agotado o error). Campos de las peticiones:
+# - tipo: mantenimiento, rodaje o estado (contadores del servicio).
+# - ruta (fichero de entrada) o datos (el diccionario de leer_archivo_entrada para mantenimiento,
+#   {"aviones": [[inicio, objetivo], ...], "mapa": [[...], ...]} para rodaje).
+# - tiempo_limite: segundos; al agotarse se termina con tiempo_agotado.
+# - mantenimiento: modelo (CSPMaintenance o main), motor, simetrias, max_soluciones (null para
+#   todas), contar (solo el número de soluciones) u optimizar (objetivo de optimizacion.OBJETIVOS).
+# - rodaje: solver, heuristica, agregacion, peso (focal) y metodo (anytime, que envía cada mejora).
+
+# =========================================
+# CACHÉ LRU
+# =========================================
+class CacheLRU:
+    """
+    Diccionario de capacidad limitada que descarta la entrada usada hace más tiempo.
+    """
+
+    def __init__(self, capacidad):
+        self.capacidad = capacidad
+        self._entradas = OrderedDict()
+
+    def obtener(self, clave, crear):
+        """
+        Devuelve el valor de clave, creándolo con crear() si no está.
+        """
+        if clave in self._entradas:
+            self._entradas.move_to_end(clave)
+            return self._entradas[clave]
+        valor = self._entradas[clave] = crear()
+        if len(self._entradas) > self.capacidad:
+            self._entradas.popitem(last=False)
+        return valor
+
+    def __contains__(self, clave):
+        return clave in self._entradas
+
+    def __len__(self):
+        return len(self._entradas)
+
+# =========================================
+# PETICIONES
+# =========================================
+def validar_peticion(peticion):
+    """
+    Lanza ValueError si a la petición le falta algo o tiene alguna opción desconocida.
+    """
+    if not isinstance(peticion, dict) or peticion.get("tipo") not in TIPOS:
+        raise ValueError(f"El tipo de la petición debe ser uno de {', '.join(TIPOS)}")
+    if peticion["tipo"] == "estado":
+        return
+    if ("ruta" in peticion) == ("datos" in peticion):
+        raise ValueError("La petición debe indicar ruta o datos (solo uno de los dos)")
+    opciones = {
+        "mantenimiento": {"modelo": NOMBRES_VARIABLE, "motor": MOTORES, "optimizar": OBJETIVOS},
+        "rodaje": {"solver": SOLVERS_RODAJE, "heuristica": HEURISTICAS, "agregacion": AGREGACIONES,
+                   "metodo": ("ponderado", "focal")},
+    }[peticion["tipo"]]
+    for opcion, valores in opciones.items():
+        if opcion in peticion and peticion[opcion] not in valores:
+            raise ValueError(f"{opcion} debe ser uno de {', '.join(valores)}")
+    # Como en parte_2.py: las cotas de anytime y focal solo valen con una heurística admisible
+    if peticion.get("solver") in ("anytime", "focal") and not es_admisible(peticion.get("heuristica", "manhattan"), "max"):
+        raise ValueError(f"El solver {peticion['solver']} necesita una heurística admisible (manhattan o distancia)")
+
+def clave_entrada(peticion):
+    """
+    Clave de caché de los datos de una petición: la ruta con su fecha de modificación y tamaño
+    (si el fichero cambia se vuelve a leer) o un hash de los datos en línea.
+    """
+    if "ruta" in peticion:
+        estado = os.stat(peticion["ruta"])
+        origen = f"{os.path.abspath(peticion['ruta'])}:{estado.st_mtime_ns}:{estado.st_size}"
+    else:
+        origen = hashlib.sha1(json.dumps(peticion["datos"], sort_keys=True).encode()).hexdigest()
+    return f"{peticion['tipo']}:{peticion.get('modelo', 'CSPMaintenance')}:{origen}"
+
+# =========================================
+# TRABAJADORES
+# =========================================
+# Cada trabajador guarda en su CacheLRU, por clave_entrada, los datos leídos y compilados y los
+# modelos ya construidos, que se reutilizan entre peticiones (getSolutionIter empieza cada vez
+# una búsqueda nueva sobre el mismo problema).
+def cargar_mantenimiento(peticion):
+    modelo = peticion.get("modelo", "CSPMaintenance")
+    if "datos" in peticion:
+        datos = peticion["datos"]
+    elif modelo == "CSPMaintenance":
+        datos = CSPMaintenance.leer_archivo_entrada(peticion["ruta"])
+    else:
+        franjas, (filas, columnas), talleres_std, talleres_spc, parkings, aviones = csp_main.read_input(peticion["ruta"])
+        datos = {"franjas": franjas, "num_filas": filas, "num_columnas": columnas, "aviones": aviones,
+                 "distribucion_matriz": {"STD": talleres_std, "SPC": talleres_spc, "PRK": parkings}}
+    instancia = compilar_instancia(datos["num_filas"], datos["num_columnas"], datos["distribucion_matriz"])
+    return {"datos": datos, "instancia": instancia, "problemas": {}}
+
+def construir_problema(datos, instancia, modelo, romper_simetrias, motor):
+    if modelo == "CSPMaintenance":
+        return CSPMaintenance.define_problem(datos, None, instancia, romper_simetrias, motor)
+    distribucion = datos["distribucion_matriz"]
+    return csp_main.define_problem(datos["franjas"], (datos["num_filas"], datos["num_columnas"]), distribucion["STD"],
+                                  distribucion["SPC"], distribucion["PRK"], datos["aviones"], None, instancia,
+                                  romper_simetrias, motor)
+
+def formatear_horario(solucion, variables_aviones, aviones, instancia):
+    """
+    Solución de mantenimiento como {ID: [[clase, fila, columna] por franja]}.
+    """
+    clase, posiciones = instancia["clase"], instancia["posiciones"]
+    return {str(avion["ID"]): [[CLASES[clase[solucion[variable]]], *posiciones[solucion[variable]]]
+                               for variable in variables]
+            for variables, avion in zip(variables_aviones, aviones)}
+
+def resolver_mantenimiento(peticion, cache, limite):
+    entrada = cache.obtener(peticion["clave"], lambda: cargar_mantenimiento(peticion))
+    datos, instancia = entrada["datos"], entrada["instancia"]
+    modelo = peticion.get("modelo", "CSPMaintenance")
+    motor = peticion.get("motor", "constraint")
+    romper_simetrias = bool(peticion.get("simetrias", False))
+    nombre_variable = NOMBRES_VARIABLE[modelo]
+    variables_aviones = [[nombre_variable(avion, franja) for franja in range(datos["franjas"])]
+                         for avion in datos["aviones"]]
+    inicio = time.perf_counter()
+
+    if peticion.get("optimizar"):
+        # La ramificación y poda añade su restricción de cota al problema, así que no se reutiliza
+        problem = construir_problema(datos, instancia, modelo, romper_simetrias, motor)
+        mejor, coste = optimizar(problem, variables_aviones, datos["aviones"], instancia["clase"], peticion["optimizar"])
+        if mejor is not None:
+            yield {"solucion": formatear_horario(mejor, variables_aviones, datos["aviones"], instancia)}
+        yield {"estado": COMPLETADA, "soluciones": int(mejor is not None), "coste": coste,
+               "segundos": round(time.perf_counter() - inicio, 4)}
+        return
+
+    clave_problema = (motor, romper_simetrias)
+    if clave_problema not in entrada["problemas"]:
+        entrada["problemas"][clave_problema] = construir_problema(datos, instancia, modelo, romper_simetrias, motor)
+    contar = peticion.get("contar", False)
+    estado = COMPLETADA
+    n_soluciones = 0
+    for solucion in iterar_soluciones(entrada["problemas"][clave_problema], peticion.get("max_soluciones", MAX_SOLUCIONES)):
+        n_soluciones += 1
+        if not contar:
+            yield {"solucion": formatear_horario(solucion, variables_aviones, datos["aviones"], instancia)}
+        if time.monotonic() >= limite:
+            estado = TIEMPO_AGOTADO
+            break
+    yield {"estado": estado, "soluciones": n_soluciones, "segundos": round(time.perf_counter() - inicio, 4)}
+
+def cargar_rodaje(peticion):
+    if "datos" in peticion:
+        aviones = [(tuple(inicio), tuple(objetivo)) for inicio, objetivo in peticion["datos"]["aviones"]]
+        mapa = peticion["datos"]["mapa"]
+        n = len(aviones)
+    else:
+        n, aviones, mapa = parte_2.leer_mapa(peticion["ruta"])
+    return {"n": n, "aviones": aviones, "mapa": mapa, "compilado": compilar_mapa(mapa), "heuristicas": {}}
+
+def resolver_rodaje(peticion, cache, limite):
+    entrada = cache.obtener(peticion["clave"], lambda: cargar_rodaje(peticion))
+    n, aviones, mapa, compilado = entrada["n"], entrada["aviones"], entrada["mapa"], entrada["compilado"]
+    solver = peticion.get("solver", "odid")
+    # Como en parte_2.py, anytime y focal necesitan la agregación max para que sus cotas sean válidas
+    agregacion = "max" if solver in ("anytime", "focal") else peticion.get("agregacion", "suma")
+    nombre_heuristica = peticion.get("heuristica", "manhattan")
+    heuristica = None
+    if solver in ("astar", "anytime", "focal"):
+        if (nombre_heuristica, agregacion) not in entrada["heuristicas"]:
+            entrada["heuristicas"][(nombre_heuristica, agregacion)] = crear_heuristica(nombre_heuristica, aviones, mapa,
+                                                                                       agregacion)
+        heuristica = entrada["heuristicas"][(nombre_heuristica, agregacion)]
+    inicio = time.perf_counter()
+
+    if solver == "anytime":
+        caminos = None
+        for mejora in a_estrella_anytime(n, aviones, mapa, max(0.0, limite - time.monotonic()),
+                                         metodo=peticion.get("metodo", "ponderado"), heuristica=heuristica,
+                                         compilado=compilado):
+            caminos = mejora["caminos"]
+            yield {"solucion": caminos, "makespan": mejora["makespan"], "cota": mejora["cota"]}
+    else:
+        if solver == "odid":
+            caminos = parte_2.deteccion_independencia(n, aviones, mapa, compilado=compilado)
+        elif solver == "cbs":
+            caminos = cbs(n, aviones, mapa, compilado=compilado)
+        elif solver == "focal":
+            caminos = resolver_focal(n, aviones, mapa, peticion.get("peso", 1.5), heuristica, compilado=compilado)
+        else:
+            caminos = parte_2.a_estrella_multi(n, aviones, mapa, heuristica=heuristica,
+                                               admisible=es_admisible(nombre_heuristica, agregacion),
+                                               compilado=compilado)
+        if caminos:
+            yield {"solucion": caminos, "makespan": len(caminos[0]) - 1}
+    yield {"estado": COMPLETADA, "makespan": len(caminos[0]) - 1 if caminos else None,
+           "segundos": round(time.perf_counter() - inicio, 4)}
+
+def bucle_trabajador(conexion, tamano_cache):
+    """
+    Cuerpo de cada proceso trabajador: recibe peticiones (con clave y tiempo_limite ya
+    resueltos) y envía sus mensajes uno a uno, el último con el estado.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # El servicio decide cuándo termina cada trabajador
+    cache = CacheLRU(tamano_cache)
+    while True:
+        try:
+            peticion = conexion.recv()
+        except EOFError:
+            return
+        limite = time.monotonic() + peticion["tiempo_limite"]
+        resolver = resolver_mantenimiento if peticion["tipo"] == "mantenimiento" else resolver_rodaje
+        try:
+            for mensaje in resolver(peticion, cache, limite):
+                conexion.send(mensaje)
+        except Exception as e:
+            conexion.send({"estado": ERROR, "error": repr(e)})
+
+class Trabajador:
+    """
+    Proceso trabajador con su conexión y una réplica de las claves de su caché, que el
+    servicio usa para enviarle las peticiones de las instancias que ya tiene en memoria.
+    """
+
+    def __init__(self, contexto, tamano_cache):
+        self.conexion, extremo = contexto.Pipe()
+        self.proceso = contexto.Process(target=bucle_trabajador, args=(extremo, tamano_cache), daemon=True)
+        self.proceso.start()
+        extremo.close()
+        self.claves = CacheLRU(tamano_cache)
+
+    def terminar(self):
+        if self.proceso.is_alive():
+            self.proceso.terminate()
+            self.proceso.join(1)
+            if self.proceso.is_alive():
+                self.proceso.kill()
+        self.proceso.join()
+
+# =========================================
+# SERVICIO
+# =========================================
+class Servicio:
+    """
+    Servicio de planificación persistente: reparte las peticiones entre procesos trabajadores
+    que mantienen en caché las instancias ya leídas y los modelos construidos, y reenvía sus
+    mensajes a la conexión de la que vino cada petición. Si un trabajador no termina dentro del
+    tiempo límite se mata y se sustituye por otro (con la caché vacía).
+    """
+
+    def __init__(self, procesos=None, tamano_cache=TAMANO_CACHE, tiempo_limite=TIEMPO_LIMITE):
+        self.tiempo_limite = tiempo_limite
+        self.contadores = {"peticiones": 0, "aciertos_cache": 0, "tiempo_agotado": 0, "errores": 0}
+        # spawn: el servicio tiene hilos, y hacer fork de un proceso con hilos no es seguro
+        self._contexto = multiprocessing.get_context("spawn")
+        self._tamano_cache = tamano_cache
+        self._trabajadores = [Trabajador(self._contexto, tamano_cache) for _ in range(procesos or os.cpu_count() or 1)]
+        self._libres = list(self._trabajadores)
+        self._hay_libres = asyncio.Condition()
+        # Un hilo por trabajador para esperar sus mensajes sin bloquear el bucle de eventos
+        self._hilos = ThreadPoolExecutor(len(self._trabajadores))
+
+    def estado(self):
+        return {**self.contadores, "procesos": len(self._trabajadores), "ocupados": len(self._trabajadores) - len(self._libres)}
+
+    def cerrar(self):
+        for trabajador in self._trabajadores:
+            trabajador.terminar()
+        self._hilos.shutdown()
+
+    async def _adquirir(self, clave):
+        async with self._hay_libres:
+            await self._hay_libres.wait_for(lambda: self._libres)
+            trabajador = next((trabajador for trabajador in self._libres if clave in trabajador.claves), self._libres[0])
+            self._libres.remove(trabajador)
+            return trabajador
+
+    async def _liberar(self, trabajador):
+        async with self._hay_libres:
+            self._libres.append(trabajador)
+            self._hay_libres.notify()
+
+    async def _reemplazar(self, trabajador, recepcion):
+        trabajador.terminar()
+        try:
+            await asyncio.wrap_future(recepcion)  # El hilo que esperaba sale al cerrarse la otra punta
+        except (EOFError, OSError):
+            pass
+        trabajador.conexion.close()
+        nuevo = Trabajador(self._contexto, self._tamano_cache)
+        self._trabajadores[self._trabajadores.index(trabajador)] = nuevo
+        return nuevo
+
+    async def resolver(self, peticion, enviar):
+        """
+        Resuelve una petición en un trabajador y llama a enviar(mensaje) con cada mensaje.
+        """
+        self.contadores["peticiones"] += 1
+        tiempo_limite = float(peticion.get("tiempo_limite", self.tiempo_limite))
+        try:
+            clave = clave_entrada(peticion)
+        except OSError as e:
+            self.contadores["errores"] += 1
+            await enviar({"estado": ERROR, "error": repr(e)})
+            return
+        trabajador = await self._adquirir(clave)
+        try:
+            if clave in trabajador.claves:
+                self.contadores["aciertos_cache"] += 1
+            trabajador.claves.obtener(clave, lambda: None)
+            trabajador.conexion.send(dict(peticion, clave=clave, tiempo_limite=tiempo_limite))
+            limite = time.monotonic() + tiempo_limite + MARGEN_CANCELACION
+            while True:
+                recepcion = self._hilos.submit(trabajador.conexion.recv)
+                await asyncio.wait([asyncio.wrap_future(recepcion)], timeout=max(0.0, limite - time.monotonic()))
+                if not recepcion.done():
+                    self.contadores["tiempo_agotado"] += 1
+                    trabajador = await self._reemplazar(trabajador, recepcion)
+                    mensaje = {"estado": TIEMPO_AGOTADO}
+                elif recepcion.exception() is not None:
+                    self.contadores["errores"] += 1
+                    trabajador = await self._reemplazar(trabajador, recepcion)
+                    mensaje = {"estado": ERROR, "error": "el proceso trabajador terminó inesperadamente"}
+                else:
+                    mensaje = recepcion.result()
+                    if mensaje.get("estado") == ERROR:
+                        self.contadores["errores"] += 1
+                    elif mensaje.get("estado") == TIEMPO_AGOTADO:
+                        self.contadores["tiempo_agotado"] += 1
+                await enviar(mensaje)
+                if "estado" in mensaje:
+                    return
+        finally:
+            await self._liberar(trabajador)
+
+    async def atender_conexion(self, lector, escritor):
+        """
+        Atiende una conexión: lee peticiones línea a línea y resuelve cada una en su propia
+        tarea, escribiendo los mensajes según llegan.
+        """
+        cerrojo = asyncio.Lock()
+        tareas = set()
+
+        async def enviar(identificador, mensaje):
+            linea = json.dumps({"id": identificador, **mensaje}, ensure_ascii=False) + "\n"
+            async with cerrojo:
+                escritor.write(linea.encode())
+                try:
+                    await escritor.drain()
+                except ConnectionError:
+                    pass  # El cliente se ha ido; la petición termina igualmente
+
+        while True:
+            try:
+                linea = await lector.readline()
+            except ConnectionError:
+                break
+            except ValueError:
+                await enviar(None, {"estado": ERROR, "error": f"petición de más de {LIMITE_LINEA} bytes"})
+                break
+            if not linea:
+                break
+            if not linea.strip():
+                continue
+            peticion = None
+            try:
+                peticion = json.loads(linea)
+                validar_peticion(peticion)
+            except ValueError as e:
+                await enviar(peticion.get("id") if isinstance(peticion, dict) else None, {"estado": ERROR, "error": str(e)})
+                continue
+            identificador = peticion.get("id")
+            if peticion["tipo"] == "estado":
+                await enviar(identificador, {"estado": COMPLETADA, **self.estado()})
+                continue
+            tarea = asyncio.create_task(self.resolver(peticion, lambda mensaje, i=identificador: enviar(i, mensaje)))
+            tareas.add(tarea)
+            tarea.add_done_callback(tareas.discard)
+        if tareas:
+            await asyncio.gather(*tareas)
+        escritor.close()
+
+async def servir(servicio, ruta_socket=None, puerto=None):
+    if ruta_socket is not None:
+        servidor = await asyncio.start_unix_server(servicio.atender_conexion, path=ruta_socket, limit=LIMITE_LINEA)
+        print(f"Servicio escuchando en {ruta_socket}")
+    else:
+        servidor = await asyncio.start_server(servicio.atender_conexion, "127.0.0.1", puerto, limit=LIMITE_LINEA)
+        print(f"Servicio escuchando en 127.0.0.1:{puerto}")
+    async with servidor:
+        await servidor.serve_forever()
+
+# =========================================
+# PROGRAMA PRINCIPAL
+# =========================================
+def main():
+    parser = argparse.ArgumentParser(
+        description="Servicio local de planificación (mantenimiento y rodaje) con instancias en caché")
+    conexion = parser.add_mutually_exclusive_group(required=True)
+    conexion.add_argument("--socket", help="Ruta del socket Unix en el que escuchar")
+    conexion.add_argument("--puerto", type=int, help="Puerto de 127.0.0.1 en el que escuchar")
+    parser.add_argument("--procesos", type=int, help="Procesos trabajadores (por defecto uno por CPU)")
+    parser.add_argument("--tamano-cache", type=int, default=TAMANO_CACHE,
+                        help="Instancias que guarda en memoria cada trabajador")
+    parser.add_argument("--tiempo-limite", type=float, default=TIEMPO_LIMITE,
+                        help="Segundos por petición si la petición no indica tiempo_limite")
+    args = parser.parse_args()
+
+    servicio = Servicio(args.procesos, args.tamano_cache, args.tiempo_limite)
+    try:
+        asyncio.run(servir(servicio, args.socket, args.puerto))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servicio.cerrar()
+
+if __name__ == "__main__":
+    main()
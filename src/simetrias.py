@@ -0,0 +1,50 @@
+from collections import Counter
+from math import factorial
+
+from constraint import Unassigned
+
+# =========================================
+# AVIONES INTERCAMBIABLES
+# =========================================
+def grupos_intercambiables(aviones):
+    """
+    Agrupa los aviones con los mismos (TIPO, RESTR, T1, T2), en el orden de entrada.
+    Intercambiar las franjas de dos aviones de un grupo da otra solución válida, así que
+    solo se devuelven los grupos de dos o más aviones.
+    """
+    grupos = {}
+    for avion in aviones:
+        grupos.setdefault((avion["TIPO"], avion["RESTR"], avion["T1"], avion["T2"]), []).append(avion)
+    return [grupo for grupo in grupos.values() if len(grupo) > 1]
+
+def restriccion_orden_lexicografico(*variables):
+    """
+    Las variables son las franjas de dos aviones intercambiables seguidas (primera mitad, segunda
+    mitad). Exige que las del primero sean lexicográficamente menores o iguales que las del segundo,
+    de modo que de cada permutación de una solución solo queda la ordenada.
+    Con una asignación parcial se decide en la primera franja distinta con ambas asignadas.
+    """
+    mitad = len(variables) // 2
+    for primero, segundo in zip(variables[:mitad], variables[mitad:]):
+        if primero is Unassigned or segundo is Unassigned:
+            return True
+        if primero != segundo:
+            return primero < segundo
+    return True
+
+# =========================================
+# RECUENTO EXPANDIDO
+# =========================================
+def multiplicidad(solucion, grupos_variables):
+    """
+    Número de soluciones del problema sin romper simetrías que representa una solución canónica:
+    en cada grupo de k aviones, k! / (m1! · m2! ...) donde mi son las repeticiones de cada
+    calendario idéntico. grupos_variables tiene, por grupo, la lista de variables de cada avión.
+    """
+    total = 1
+    for variables_grupo in grupos_variables:
+        calendarios = Counter(tuple(solucion[variable] for variable in variables) for variables in variables_grupo)
+        total *= factorial(len(variables_grupo))
+        for repeticiones in calendarios.values():
+            total //= factorial(repeticiones)
+    return total
@@ -0,0 +1,52 @@
+import os
+import shutil
+from itertools import islice
+
+INTERVALO_FLUSH = 1000  # Soluciones escritas entre dos flush del fichero de salida
+
+# =========================================
+# ITERACIÓN PEREZOSA DE SOLUCIONES
+# =========================================
+def iterar_soluciones(problem, max_soluciones=None):
+    """
+    Devuelve las soluciones del CSP una a una con getSolutionIter, sin guardarlas en memoria.
+    Con max_soluciones la búsqueda se detiene en cuanto se han encontrado esas soluciones.
+    """
+    return islice(problem.getSolutionIter(), max_soluciones)
+
+def contar_soluciones(soluciones, peso=None):
+    """
+    Cuenta exactamente las soluciones de un iterador sin almacenarlas. Con peso, cada
+    solución cuenta peso(solucion) (p. ej. las soluciones que representa una canónica).
+    """
+    if peso is None:
+        return sum(1 for _ in soluciones)
+    return sum(peso(solucion) for solucion in soluciones)
+
+# =========================================
+# ESCRITURA INCREMENTAL
+# =========================================
+def escribir_soluciones(ruta, soluciones, escribir_solucion=None, intervalo_flush=INTERVALO_FLUSH, peso=None):
+    """
+    Escribe en ruta la cabecera "N. Sol: n" seguida de las soluciones, escritas una a una
+    con escribir_solucion(archivo, indice, solucion) según las va encontrando el solver.
+    Como n solo se conoce al final, el cuerpo se vuelca primero a ruta + ".parcial" (con
+    flush cada intervalo_flush soluciones, para poder seguir el progreso) y después se copia
+    tras la cabecera. Con escribir_solucion=None solo se cuentan, y con peso cada solución
+    cuenta peso(solucion) en n, como en contar_soluciones. Devuelve n.
+    """
+    ruta_parcial = ruta + ".parcial"
+    n_soluciones = 0
+    with open(ruta_parcial, 'w') as cuerpo:
+        for indice, solucion in enumerate(soluciones, 1):
+            n_soluciones += 1 if peso is None else peso(solucion)
+            if escribir_solucion is not None:
+                escribir_solucion(cuerpo, indice, solucion)
+                if indice % intervalo_flush == 0:
+                    cuerpo.flush()
+
+    with open(ruta, 'w') as archivo, open(ruta_parcial, 'r') as cuerpo:
+        archivo.write(f"N. Sol: {n_soluciones}\n")
+        shutil.copyfileobj(cuerpo, archivo)
+    os.remove(ruta_parcial)
+    return n_soluciones
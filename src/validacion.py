@@ -0,0 +1,268 @@
+import argparse
+import re
+import time
+
+import numpy as np
+
+from csp_compilado import CLASES, PRK, SIN_CLASE, SPC, STD, compilar_instancia
+from mapa_compilado import OBSTACULO, SIN_ESPERA, compilar_mapa
+
+# Reglas que se comprueban, en el orden de los bits de codigos_violacion
+REGLAS_HORARIOS = ("dominio", "capacidad", "jumbos_misma_posicion", "jumbos_adyacentes", "maniobrabilidad",
+                   "tareas", "orden", "etiqueta")
+REGLAS_CAMINOS = ("inicio", "objetivo", "obstaculo", "movimiento", "colision_vertice", "colision_arista")
+
+TAMANO_LOTE = 20000  # Soluciones que se validan a la vez (acota la memoria de las matrices intermedias)
+MODELOS = ("CSPMaintenance", "main")
+
+# =========================================
+# CARGA DE HORARIOS DE MANTENIMIENTO
+# =========================================
+# Un lote de horarios es una matriz de enteros soluciones x aviones x franjas con el id de
+# casilla de la instancia compilada (fila * columnas + columna). Las posiciones fuera de la
+# matriz se cargan con el id num_filas * num_columnas, una casilla ficticia que no pertenece
+# al dominio ni es vecina de ninguna.
+def horarios_a_matriz(soluciones, aviones, franjas, nombre_variable):
+    """
+    Carga soluciones del solver (diccionarios variable -> id de casilla) en una matriz.
+    nombre_variable(avion, franja) es el mismo que recibe csp_bitset.ProblemaMantenimiento.
+    """
+    nombres = [nombre_variable(avion, franja) for avion in aviones for franja in range(franjas)]
+    valores = np.fromiter((solucion[nombre] for solucion in soluciones for nombre in nombres), dtype=np.int32)
+    return valores.reshape(-1, len(aviones), franjas)
+
+PATRON_POSICION = re.compile(r"(STD|SPC|PRK|None)\((\d+), (\d+)\)")
+
+def leer_horarios_csv(ruta, instancia, aviones):
+    """
+    Lee las soluciones escritas por CSPMaintenance.generar_salida_csv o main.save_output.
+    Devuelve (matriz, etiquetas): etiquetas tiene la misma forma y la clase con la que el
+    fichero etiqueta cada posición (SIN_CLASE si no la reconoce), para comprobar que coincide
+    con la de la instancia. Los aviones se ordenan como en aviones, buscándolos por ID.
+    """
+    num_filas, num_columnas = instancia["num_filas"], instancia["num_columnas"]
+    fuera = num_filas * num_columnas
+    orden = {str(avion["ID"]): a for a, avion in enumerate(aviones)}
+    codigo_clase = {nombre: codigo for codigo, nombre in enumerate(CLASES)}
+
+    soluciones = []
+    with open(ruta, 'r') as archivo:
+        for linea in archivo:
+            linea = linea.strip()
+            if linea.startswith("Solucion"):
+                soluciones.append([None] * len(aviones))
+            elif soluciones and ":" in linea:
+                cabecera, posiciones = linea.split(":", 1)
+                filas = []
+                for etiqueta, x, y in PATRON_POSICION.findall(posiciones):
+                    x, y = int(x), int(y)
+                    celda = x * num_columnas + y if x < num_filas and y < num_columnas else fuera
+                    filas.append((celda, codigo_clase.get(etiqueta, SIN_CLASE)))
+                soluciones[-1][orden[cabecera.split("-")[0]]] = filas
+
+    franjas = max((len(filas) for solucion in soluciones for filas in solucion if filas), default=0)
+    matriz = np.full((len(soluciones), len(aviones), franjas), fuera, dtype=np.int32)
+    etiquetas = np.full(matriz.shape, SIN_CLASE, dtype=np.int8)
+    for s, solucion in enumerate(soluciones):
+        for a, filas in enumerate(solucion):
+            if filas:
+                matriz[s, a, :len(filas)], etiquetas[s, a, :len(filas)] = zip(*filas)
+    return matriz, etiquetas
+
+# =========================================
+# VALIDACIÓN DE HORARIOS
+# =========================================
+def tablas_instancia(instancia, vecinos):
+    """
+    Tablas de la instancia con una entrada más para la casilla ficticia de fuera de la matriz:
+    clase, pertenencia al dominio y matriz de adyacencia (booleana) a partir de las máscaras vecinos.
+    """
+    n_celdas = instancia["num_filas"] * instancia["num_columnas"]
+    clase = np.full(n_celdas + 1, SIN_CLASE, dtype=np.int8)
+    clase[:n_celdas] = instancia["clase"]
+    en_dominio = np.zeros(n_celdas + 1, dtype=bool)
+    en_dominio[instancia["dominio"]] = True
+    adyacencia = np.zeros((n_celdas + 1, n_celdas + 1), dtype=bool)
+    for celda, mascara in enumerate(vecinos):
+        adyacencia[celda, :n_celdas] = [mascara >> vecina & 1 for vecina in range(n_celdas)]
+    return clase, en_dominio, adyacencia
+
+def validar_horarios(matriz, instancia, aviones, vecinos=None, t2_contiguo=False, etiquetas=None,
+                     tamano_lote=TAMANO_LOTE):
+    """
+    Comprueba a la vez todas las soluciones de una matriz soluciones x aviones x franjas con
+    operaciones sobre arrays. Las reglas son las de define_problem con todas las variables
+    asignadas; vecinos y t2_contiguo eligen el modelo igual que en ProblemaMantenimiento
+    (vecinos restringidos al dominio y t2_contiguo=False en main.py; los de la instancia y
+    t2_contiguo=True en CSPMaintenance.py). Devuelve un diccionario regla -> array booleano
+    con las soluciones que la incumplen.
+    """
+    clase, en_dominio, adyacencia = tablas_instancia(instancia, instancia["vecinos"] if vecinos is None else vecinos)
+    maniobra = adyacencia.astype(np.float32)
+    jumbos = np.flatnonzero([avion["TIPO"] == "JMB" for avion in aviones])
+    primero, segundo = np.triu_indices(len(jumbos), 1)
+    primero, segundo = jumbos[primero], jumbos[segundo]
+    t2 = np.array([avion["T2"] for avion in aviones])
+    total = t2 + [avion["T1"] for avion in aviones]
+    restr = np.array([avion["RESTR"] == "T" for avion in aviones])[:, None]
+
+    violaciones = {regla: np.zeros(len(matriz), dtype=bool) for regla in REGLAS_HORARIOS}
+    for inicio in range(0, len(matriz), tamano_lote):
+        lote = matriz[inicio:inicio + tamano_lote]
+        n, _, franjas = lote.shape
+        resultado = {regla: violaciones[regla][inicio:inicio + n] for regla in REGLAS_HORARIOS}
+
+        resultado["dominio"][:] = ~en_dominio[lote].all(axis=(1, 2))
+
+        # Capacidad: con las casillas de cada franja ordenadas, tres aviones en la misma son dos saltos iguales
+        ordenadas = np.sort(lote, axis=1)
+        resultado["capacidad"][:] = (ordenadas[:, 2:] == ordenadas[:, :-2]).any(axis=(1, 2))
+
+        # Jumbos por parejas: ni en la misma casilla ni en casillas adyacentes
+        celdas_1, celdas_2 = lote[:, primero], lote[:, segundo]
+        resultado["jumbos_misma_posicion"][:] = (celdas_1 == celdas_2).any(axis=(1, 2))
+        resultado["jumbos_adyacentes"][:] = adyacencia[celdas_1, celdas_2].any(axis=(1, 2))
+
+        # Maniobrabilidad: cuántas vecinas libres tiene cada casilla en cada franja, leído en las ocupadas
+        indice_solucion = np.arange(n)[:, None, None]
+        indice_franja = np.arange(franjas)[None, None, :]
+        libres = np.ones((n, franjas, len(clase)), dtype=np.float32)
+        libres[indice_solucion, indice_franja, lote] = 0
+        salidas = libres @ maniobra.T
+        resultado["maniobrabilidad"][:] = (salidas[indice_solucion, indice_franja, lote] == 0).any(axis=(1, 2))
+
+        # Tareas: cuentas de SPC y de talleres, y el orden con las SPC acumuladas hasta cada franja
+        clases = clase[lote]
+        es_spc = clases == SPC
+        es_std = clases == STD
+        n_spc = es_spc.sum(axis=2)
+        resultado["tareas"][:] = ((n_spc < t2) | (n_spc + es_std.sum(axis=2) < total)).any(axis=1)
+        acumuladas = np.cumsum(es_spc, axis=2)
+        pendientes = acumuladas < t2[:, None]
+        fuera_de_orden = es_std & pendientes
+        if t2_contiguo:
+            fuera_de_orden |= (clases == PRK) & pendientes & (acumuladas > 0)
+        resultado["orden"][:] = (fuera_de_orden & restr).any(axis=(1, 2))
+
+        if etiquetas is not None:
+            resultado["etiqueta"][:] = (etiquetas[inicio:inicio + n] != clases).any(axis=(1, 2))
+    return violaciones
+
+# =========================================
+# CARGA Y VALIDACIÓN DE CAMINOS DE RODAJE
+# =========================================
+def caminos_a_matriz(soluciones, columnas):
+    """
+    Carga soluciones de los solvers de rodaje (por avión, lista de (fila, columna, movimiento))
+    en una matriz soluciones x aviones x instantes de ids de casilla. Las soluciones más cortas
+    se rellenan repitiendo su última casilla; devuelve (matriz, longitudes).
+    """
+    longitudes = np.array([len(solucion[0]) for solucion in soluciones], dtype=np.int32)
+    n_aviones = len(soluciones[0]) if soluciones else 0
+    matriz = np.empty((len(soluciones), n_aviones, longitudes.max(initial=0)), dtype=np.int32)
+    for s, solucion in enumerate(soluciones):
+        for a, camino in enumerate(solucion):
+            celdas = [x * columnas + y for x, y, _ in camino]
+            matriz[s, a, :len(celdas)] = celdas
+            matriz[s, a, len(celdas):] = celdas[-1]
+    return matriz, longitudes
+
+def validar_caminos(matriz, longitudes, aviones, mapa, tamano_lote=TAMANO_LOTE):
+    """
+    Comprueba a la vez soluciones de rodaje soluciones x aviones x instantes: que empiecen en
+    la casilla inicial y acaben en el objetivo, que no pisen obstáculos, que cada paso sea un
+    movimiento del mapa (sin esperar en casillas 'A') y las reglas de no_hay_cruces (dos
+    aviones en la misma casilla o intercambiándose la casilla). Devuelve un diccionario
+    regla -> array booleano con las soluciones que la incumplen.
+    """
+    compilado = compilar_mapa(mapa)
+    columnas = compilado["columnas"]
+    tipos = np.array(compilado["celdas"], dtype=np.int8)
+    inicios = np.array([x * columnas + y for (x, y), _ in aviones], dtype=np.int32)
+    objetivos = np.array([x * columnas + y for _, (x, y) in aviones], dtype=np.int32)
+    primero, segundo = np.triu_indices(len(aviones), 1)
+
+    violaciones = {regla: np.zeros(len(matriz), dtype=bool) for regla in REGLAS_CAMINOS}
+    for inicio in range(0, len(matriz), tamano_lote):
+        lote = matriz[inicio:inicio + tamano_lote]
+        finales = longitudes[inicio:inicio + tamano_lote] - 1
+        n = len(lote)
+        resultado = {regla: violaciones[regla][inicio:inicio + n] for regla in REGLAS_CAMINOS}
+
+        resultado["inicio"][:] = (lote[:, :, 0] != inicios).any(axis=1)
+        resultado["objetivo"][:] = (lote[np.arange(n), :, finales] != objetivos).any(axis=1)
+        resultado["obstaculo"][:] = (tipos[lote] == OBSTACULO).any(axis=(1, 2))
+
+        # Pasos: como mucho una casilla en horizontal o vertical, y esperar solo fuera de las 'A'
+        x, y = np.divmod(lote, columnas)
+        anteriores, nuevas = lote[:, :, :-1], lote[:, :, 1:]
+        en_plan = np.arange(lote.shape[2] - 1) < finales[:, None, None]
+        distancia = np.abs(np.diff(x, axis=2)) + np.abs(np.diff(y, axis=2))
+        espera_prohibida = (anteriores == nuevas) & (tipos[anteriores] == SIN_ESPERA)
+        resultado["movimiento"][:] = (((distancia > 1) | espera_prohibida) & en_plan).any(axis=(1, 2))
+
+        ordenadas = np.sort(lote, axis=1)
+        resultado["colision_vertice"][:] = (ordenadas[:, 1:] == ordenadas[:, :-1]).any(axis=(1, 2))
+        intercambio = ((anteriores[:, primero] == nuevas[:, segundo]) & (anteriores[:, segundo] == nuevas[:, primero])
+                       & (anteriores[:, primero] != nuevas[:, primero]))
+        resultado["colision_arista"][:] = intercambio.any(axis=(1, 2))
+    return violaciones
+
+# =========================================
+# INFORMES
+# =========================================
+def codigos_violacion(violaciones):
+    """
+    Un entero por solución con el bit i puesto si incumple la i-ésima regla del diccionario.
+    """
+    codigos = np.zeros(len(next(iter(violaciones.values()))), dtype=np.int32)
+    for bit, incumplen in enumerate(violaciones.values()):
+        codigos |= incumplen.astype(np.int32) << bit
+    return codigos
+
+def reglas_incumplidas(violaciones, solucion):
+    """
+    Nombres de las reglas que incumple una solución (por su índice en el lote).
+    """
+    return [regla for regla, incumplen in violaciones.items() if incumplen[solucion]]
+
+def resumen(violaciones):
+    """
+    Soluciones válidas y número de soluciones que incumplen cada regla.
+    """
+    invalidas = np.logical_or.reduce(list(violaciones.values()))
+    return {"validas": int((~invalidas).sum()), **{regla: int(incumplen.sum()) for regla, incumplen in violaciones.items()}}
+
+# =========================================
+# PROGRAMA PRINCIPAL
+# =========================================
+def main():
+    parser = argparse.ArgumentParser(description="Validación vectorizada de las soluciones de mantenimiento escritas en CSV")
+    parser.add_argument("entrada", help="Fichero de entrada del problema")
+    parser.add_argument("salida", help="CSV con las soluciones que se validan")
+    parser.add_argument("--modelo", choices=MODELOS, default="CSPMaintenance",
+                        help="Programa que generó el CSV (formato de entrada y variante de las restricciones)")
+    args = parser.parse_args()
+
+    if args.modelo == "CSPMaintenance":
+        from CSPMaintenance import leer_archivo_entrada
+        datos = leer_archivo_entrada(args.entrada)
+        aviones = datos["aviones"]
+        instancia = compilar_instancia(datos["num_filas"], datos["num_columnas"], datos["distribucion_matriz"])
+        vecinos = instancia["vecinos"]
+    else:
+        from main import read_input
+        _, tamano, talleres_std, talleres_spc, parkings, aviones = read_input(args.entrada)
+        instancia = compilar_instancia(tamano[0], tamano[1], {"STD": talleres_std, "SPC": talleres_spc, "PRK": parkings})
+        vecinos = [mascara & instancia["mascara_dominio"] for mascara in instancia["vecinos"]]
+
+    matriz, etiquetas = leer_horarios_csv(args.salida, instancia, aviones)
+    inicio = time.perf_counter()
+    violaciones = validar_horarios(matriz, instancia, aviones, vecinos, args.modelo == "CSPMaintenance", etiquetas)
+    segundos = time.perf_counter() - inicio
+    for solucion in np.flatnonzero(codigos_violacion(violaciones)):
+        print(f"Solucion {solucion + 1}: incumple {', '.join(reglas_incumplidas(violaciones, solucion))}")
+    print(f"{resumen(violaciones)} ({len(matriz)} soluciones en {segundos:.4f} s)")
+
+if __name__ == "__main__":
+    main()
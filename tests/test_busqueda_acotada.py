@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from busqueda_acotada import a_estrella_anytime
+from generador import generar_mapa_rodaje
+
+def mejoras(instancia, pesos):
+    n, aviones, mapa = instancia
+    return [(mejora["makespan"], mejora["cota"], mejora["peso"])
+            for mejora in a_estrella_anytime(n, aviones, mapa, pesos=pesos)]
+
+@pytest.mark.parametrize("semilla", [31, 37])
+def test_fallo_con_peso_mayor_que_1_no_demuestra_el_optimo(semilla):
+    instancia = generar_mapa_rodaje(6, 6, 4, semilla=semilla)
+    primera = mejoras(instancia, (3,))
+    assert primera[-1][1] > 1
+    assert mejoras(instancia, (3, 3)) == primera
+    _, cota, peso = mejoras(instancia, (3, 3, 1))[-1]
+    assert (cota, peso) == (1.0, 1)
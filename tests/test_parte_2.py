@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import parte_2
+from benchmark import generar_mapa_abierto
+from generador import generar_mapa_rodaje
+
+def makespan(caminos):
+    return len(caminos[0]) - 1 if caminos else None
+
+@pytest.mark.parametrize("semilla", range(40))
+def test_monticulo_igual_makespan_que_lista_clasica(semilla):
+    n, aviones, mapa = generar_mapa_rodaje(5, 5, 3, semilla=semilla)
+    clasica = parte_2.a_estrella_multi(n, aviones, mapa, ordenacion_clasica=True)
+    assert makespan(parte_2.a_estrella_multi(n, aviones, mapa)) == makespan(clasica)
+
+@pytest.mark.parametrize("instancia", [generar_mapa_abierto(6, 8, 4), generar_mapa_rodaje(8, 8, 4, semilla=2024)])
+def test_monticulo_igual_makespan_en_instancias_del_benchmark(instancia):
+    n, aviones, mapa = instancia
+    clasica = parte_2.a_estrella_multi(n, aviones, mapa, ordenacion_clasica=True)
+    assert makespan(parte_2.a_estrella_multi(n, aviones, mapa)) == makespan(clasica)
+
+@pytest.mark.parametrize("ordenacion_clasica", [False, True])
+def test_cambios_en_el_mapa_se_ven_en_la_siguiente_busqueda(ordenacion_clasica):
+    mapa = [['B', 'B', 'B'], ['B', 'B', 'B']]
+    aviones = [((0, 0), (0, 2))]
+    assert [paso[:2] for paso in parte_2.a_estrella_multi(1, aviones, mapa, ordenacion_clasica)[0]] == [(0, 0), (0, 1), (0, 2)]
+    mapa[0][1] = 'G'
+    caminos = parte_2.a_estrella_multi(1, aviones, mapa, ordenacion_clasica)
+    assert (0, 1) not in [paso[:2] for paso in caminos[0]]
+    assert makespan(caminos) == 4
@@ -0,0 +1,18 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from generador import generar_mapa_rodaje
+from planificacion_priorizada import PlanificadorPriorizado
+
+def test_cancelar_y_expirar_vacian_el_indice_por_instante():
+    n, aviones, mapa = generar_mapa_rodaje(8, 8, 4, semilla=1)
+    planificador = PlanificadorPriorizado(mapa)
+    for avion, (inicio, objetivo) in enumerate(aviones):
+        assert planificador.solicitar(avion, inicio, objetivo) is not None
+    planificador.cancelar(0)
+    reservas = planificador.reservas
+    assert sum(len(claves) for claves in reservas._por_instante.values()) == len(reservas)
+    planificador.avanzar(10 ** 12)
+    assert len(reservas) == 0 and not reservas._por_instante and not reservas._instantes